@@ -2,7 +2,9 @@ from ..utils.factory import register_class
 
 from .bus import BaseBus                        # noqa: 401
 from .bus import FileBus
+from .bus import FileBusJournal                 # noqa: 401
 from .bus import SharedBus                      # noqa: 401
+from .bus import BusScheduler                   # noqa: 401
 from .bus import SharedFileBus
 
 from .register import BaseRegister
@@ -11,8 +13,13 @@ from .register import RegisterWithConversion
 from .register import RegisterWithDynamicConversion
 from .register import RegisterWithThreshold
 from .register import RegisterWithMapping
+from .register import RegisterDescriptor         # noqa: 401
 
 from .device import BaseDevice
+from .device import LazyRegisters               # noqa: 401
+
+from .block import RegisterBlock                # noqa: 401
+from .batch import BatchConverter               # noqa: 401
 
 from .joint import PVL                          # noqa: 401
 from .joint import PVLList                      # noqa: 401
@@ -25,14 +32,20 @@ from .sensor import SensorXYZ
 
 from .thread import BaseThread                  # noqa: 401
 from .thread import BaseLoop                    # noqa: 401
+from .stats import LoopStats                    # noqa: 401
 
+from .sync import SyncSnapshot                  # noqa: 401
 from .sync import BaseSync                      # noqa: 401
 from .sync import BaseReadSync                  # noqa: 401
 from .sync import BaseWriteSync                 # noqa: 401
+from .sync import GroupSync                     # noqa: 401
 
 from .robot import BaseRobot                    # noqa: 401
 from .robot import JointManager                 # noqa: 401
 
+from .aio import AsyncSync                      # noqa: 401
+from .aio import AsyncRobot                     # noqa: 401
+
 register_class(FileBus)
 register_class(SharedFileBus)
 
@@ -54,3 +67,4 @@ register_class(SensorXYZ)
 
 register_class(BaseReadSync)
 register_class(BaseWriteSync)
+register_class(GroupSync)
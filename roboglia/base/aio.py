@@ -0,0 +1,244 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+
+from ..utils import check_key, check_type, run_blocking
+from .bus import SharedBus
+from .sync import BaseSync, GroupSync
+from .robot import BaseRobot
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSync():
+    """Drives a sync from an asyncio event loop instead of its own thread.
+
+    At every period of the sync the ``atomic`` method is executed outside
+    the event loop, on the I/O worker of the bus if it has one (see
+    :py:meth:`SharedBus.run_async`), and the loop then sleeps until the
+    next deadline with ``asyncio.sleep``. The deadlines, the ``overrun``
+    policy and the statistics are the same as for :py:class:`BaseLoop`.
+
+    The sync itself must not be started with its own ``start`` method.
+
+    Parameters
+    ----------
+    sync: BaseSync or GroupSync
+        The sync to drive.
+    """
+    def __init__(self, sync):
+        check_type(sync, (BaseSync, GroupSync), 'async sync', 'AsyncSync',
+                   logger)
+        self.__sync = sync
+        self.__task = None
+        # set by stop(); the loop ends after the execution in progress
+        self.__stopping = False
+        # True while ``atomic`` is executed outside the event loop
+        self.__busy = False
+
+    @property
+    def sync(self):
+        """The sync driven."""
+        return self.__sync
+
+    @property
+    def name(self):
+        """The name of the sync."""
+        return self.__sync.name
+
+    @property
+    def running(self):
+        """``True`` if the sync is being executed by the event loop."""
+        return self.__task is not None and not self.__task.done()
+
+    def __execute(self, function):
+        """Returns an awaitable for ``function`` executed on the bus of the
+        sync or on the default executor for syncs with several buses."""
+        if isinstance(self.__sync.bus, SharedBus):
+            return self.__sync.bus.run_async(function)
+        return run_blocking(function)
+
+    def __prepare(self):
+        self.__sync.claim_registers()
+        self.__sync.setup()
+
+    def __cleanup(self):
+        self.__sync.release_registers()
+        self.__sync.teardown()
+
+    async def start(self):
+        """Refreshes and claims the registers of the sync, then schedules
+        its execution in the running event loop.
+
+        Returns
+        -------
+        bool:
+            ``False`` if the sync could not be started because a bus is not
+            open.
+        """
+        closed = [bus.name for bus in self.__sync.buses if not bus.is_open]
+        if closed:
+            logger.error(f'sync {self.name}: attempt to start with buses '
+                         f'not open: {closed}')
+            return False
+        if self.running:
+            await self.stop()
+        await self.__execute(self.__prepare)
+        self.__stopping = False
+        self.__task = asyncio.ensure_future(self.run())
+        logger.info(f'"{self.name}" started in event loop')
+        return True
+
+    async def stop(self):
+        """Stops the execution of the sync and releases its registers. An
+        execution of ``atomic`` in progress is allowed to finish first, as
+        it cannot be interrupted. An exception raised by the sync is raised
+        again here."""
+        if self.__task is None:
+            logger.info(f'"{self.name}" is not running; nothing to do')
+            return
+        task, self.__task = self.__task, None
+        self.__stopping = True
+        if not self.__busy:
+            # waiting for the next period
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.__execute(self.__cleanup)
+            logger.info(f'"{self.name}" stopped in event loop')
+
+    async def run(self):
+        """The loop executed in the event loop."""
+        loop = asyncio.get_running_loop()
+        sync = self.__sync
+        period = sync.period
+        stats = sync.stats
+        stats.reset()
+        deadline = loop.time()
+        while not self.__stopping:
+            start_time = loop.time()
+            self.__busy = True
+            try:
+                await self.__execute(sync.atomic)
+            finally:
+                self.__busy = False
+            now = loop.time()
+            stats.record_execution(now - start_time, start_time - deadline)
+            # the deadlines are absolute so that the errors do not add up
+            deadline += period
+            if now > deadline:
+                if sync.overrun == 'skip':
+                    missed = int((now - deadline) / period) + 1
+                    stats.record_overrun(missed)
+                    deadline += missed * period
+                else:
+                    stats.record_overrun()
+                    if sync.overrun == 'slip':
+                        deadline = now
+            if not self.__stopping:
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+
+class AsyncRobot():
+    """An asyncio facade for a :py:class:`BaseRobot`.
+
+    The robot is started and stopped without blocking the event loop and
+    its syncs are driven by the event loop (see :py:class:`AsyncSync`)
+    instead of running in their own threads. The joints can be read,
+    written and commanded through the ``JointManager`` with coroutines.
+
+    Parameters
+    ----------
+    robot: BaseRobot
+        The robot to use.
+    """
+    def __init__(self, robot):
+        check_type(robot, BaseRobot, 'async robot', 'AsyncRobot', logger)
+        self.__robot = robot
+        self.__syncs = {name: AsyncSync(sync)
+                        for name, sync in robot.syncs.items()}
+
+    @classmethod
+    def from_yaml(cls, file_name):
+        """Creates the robot from a YAML file (see
+        :py:meth:`BaseRobot.from_yaml`)."""
+        return cls(BaseRobot.from_yaml(file_name))
+
+    @property
+    def robot(self):
+        """The robot used."""
+        return self.__robot
+
+    @property
+    def syncs(self):
+        """The :py:class:`AsyncSync` objects driving the syncs of the
+        robot, by name."""
+        return self.__syncs
+
+    @property
+    def joints(self):
+        """The joints of the robot."""
+        return self.__robot.joints
+
+    async def start(self):
+        """Starts the robot (see :py:meth:`BaseRobot.start`) and then the
+        syncs that have ``auto`` set to ``True`` in the event loop."""
+        await run_blocking(self.__robot.start, syncs=False)
+        await asyncio.gather(*[sync.start()
+                               for sync in self.__syncs.values()
+                               if sync.sync.auto_start])
+
+    async def stop(self):
+        """Stops the syncs and then the robot (see
+        :py:meth:`BaseRobot.stop`)."""
+        await asyncio.gather(*[sync.stop()
+                               for sync in self.__syncs.values()
+                               if sync.running])
+        await run_blocking(self.__robot.stop, syncs=False)
+
+    def __joint(self, name):
+        check_key(name, self.joints, 'async robot', 'AsyncRobot', logger,
+                  f'joint {name} does not exist')
+        return self.joints[name]
+
+    async def joint_value(self, name):
+        """Returns the ``value`` of the joint (a :py:class:`PVL`)."""
+        joint = self.__joint(name)
+        return await joint.device.run_async(getattr, joint, 'value')
+
+    async def set_joint_value(self, name, pvl):
+        """Sets the ``value`` of the joint, bypassing the
+        ``JointManager``."""
+        joint = self.__joint(name)
+        await joint.device.run_async(setattr, joint, 'value', pvl)
+
+    async def submit(self, stream, commands, adjustments=False):
+        """Submits commands to the ``JointManager`` (see
+        :py:meth:`JointManager.submit`). ``stream`` can be any object with
+        a ``name`` attribute, for instance the behaviour issuing the
+        commands."""
+        return await run_blocking(self.__robot.manager.submit, stream,
+                                  commands, adjustments=adjustments)
+
+    async def stop_submit(self, stream, adjustments=False):
+        """Notifies the ``JointManager`` that the stream has finished (see
+        :py:meth:`JointManager.stop_submit`)."""
+        return await run_blocking(self.__robot.manager.stop_submit, stream,
+                                  adjustments=adjustments)
@@ -0,0 +1,262 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+
+from ..utils import check_not_empty, check_key
+from .register import BaseRegister, BoolRegister, RegisterWithConversion, \
+    RegisterWithDynamicConversion, RegisterWithThreshold, RegisterDescriptor
+
+try:
+    import numpy as np
+except ImportError:                 # pragma: no cover
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class BatchConverter():
+    """Converts at once the values of the register with the same name from
+    a group of devices, using NumPy.
+
+    The registers are resolved when the converter is created, together
+    with the conversion parameters of each of them (that are kept as
+    arrays), so that the conversions are performed with a few array
+    operations instead of one call of ``value_to_external`` /
+    ``value_to_internal`` for every register.
+
+    The vectorized conversions cover :py:class:`BaseRegister`,
+    :py:class:`BoolRegister`, :py:class:`RegisterWithConversion`,
+    :py:class:`RegisterWithDynamicConversion` and
+    :py:class:`RegisterWithThreshold`. If the registers are of other
+    classes, or the devices use different classes for the register, the
+    converter falls back to the registers' own conversion methods.
+
+    .. note:: NumPy is not a dependency of ``roboglia``; you need to
+        install it in order to use this class.
+
+    Parameters
+    ----------
+    register: str
+        The name of the register.
+
+    group: set or list of BaseDevice or subclass
+        The devices. The values are ordered by the name of the devices
+        (see :py:meth:`devices`).
+
+    Raises
+    ------
+        ImportError: if NumPy is not installed
+        KeyError: if one of the devices does not have the register
+    """
+    def __init__(self, register=None, group=None):
+        if np is None:                  # pragma: no cover
+            mess = 'BatchConverter requires NumPy to be installed'
+            logger.critical(mess)
+            raise ImportError(mess)
+        check_not_empty(register, 'register', 'batch', 'converter', logger)
+        check_not_empty(group, 'group', 'batch', register, logger)
+        self.__name = register
+        self.__devices = sorted(group, key=lambda device: device.name)
+        self.__registers = []
+        for device in self.__devices:
+            check_key(register, device.registers, 'batch', register, logger,
+                      f'device {device.name} does not have a register '
+                      f'{register}')
+            self.__registers.append(device.registers[register])
+        regs = self.__registers
+        classes = set(RegisterDescriptor.base_class(reg) for reg in regs)
+        kind = classes.pop() if len(classes) == 1 else None
+        if kind is None:
+            self.__kind = 'scalar'
+        elif issubclass(kind, RegisterWithDynamicConversion):
+            self.__kind = 'dynamic'
+        elif issubclass(kind, RegisterWithConversion):
+            self.__kind = 'linear'
+        elif issubclass(kind, RegisterWithThreshold):
+            self.__kind = 'threshold'
+        elif issubclass(kind, BoolRegister):
+            self.__kind = 'bool'
+        elif kind is BaseRegister:
+            self.__kind = 'identity'
+        else:
+            self.__kind = 'scalar'
+        if self.__kind in ['linear', 'dynamic']:
+            self.__factor = np.array([reg.factor for reg in regs])
+            self.__offset = np.array([reg.offset for reg in regs])
+            self.__sign = np.array([reg.sign_bit or 0 for reg in regs])
+        elif self.__kind == 'threshold':
+            self.__factor = np.array([reg.factor for reg in regs])
+            self.__threshold = np.array([reg.threshold for reg in regs])
+        elif self.__kind == 'bool':
+            self.__bits = np.array([reg.bits or 0 for reg in regs])
+            self.__all = np.array([reg.mode == 'all' for reg in regs])
+            self.__mask = np.array([reg.mask or 0 for reg in regs])
+        self.__minim = np.array([reg.minim for reg in regs])
+        self.__maxim = np.array([reg.maxim for reg in regs])
+        logger.debug(f'batch converter for {register} uses {self.__kind} '
+                     f'conversion for {len(regs)} registers')
+
+    @property
+    def name(self):
+        """The name of the register converted."""
+        return self.__name
+
+    @property
+    def devices(self):
+        """The devices, ordered by name. The values in the arrays are in
+        the same order."""
+        return self.__devices
+
+    @property
+    def registers(self):
+        """The register objects, in the order of :py:meth:`devices`."""
+        return self.__registers
+
+    @property
+    def kind(self):
+        """The conversion used: ``identity``, ``bool``, ``linear``,
+        ``dynamic``, ``threshold`` or ``scalar`` (when the conversion
+        falls back to the registers' methods)."""
+        return self.__kind
+
+    def int_values(self):
+        """Returns the internal values of the registers as an array.
+        The values are the ones already available in the registers; no
+        communication with the devices is performed."""
+        return np.fromiter((reg.int_value for reg in self.__registers),
+                           dtype=np.int64, count=len(self.__registers))
+
+    def __dynamic_factor(self):
+        """The additional factors of the dynamic conversions, from the
+        current values of the factor registers."""
+        return np.array([reg.factor_reg.value_to_external(
+                         reg.factor_reg.int_value)
+                         for reg in self.__registers])
+
+    def to_external(self, values=None):
+        """Converts internal values to external format.
+
+        Parameters
+        ----------
+        values: array-like or ``None``
+            The internal values, in the order of :py:meth:`devices`. If
+            ``None`` the current :py:meth:`int_values` are used.
+
+        Returns
+        -------
+        numpy.ndarray:
+            The values in external format (``bool`` for the
+            :py:class:`BoolRegister`, ``float`` for the other conversions).
+        """
+        values = self.int_values() if values is None \
+            else np.asarray(values, dtype=np.int64)
+        kind = self.__kind
+        if kind == 'identity':
+            return values
+        if kind in ['linear', 'dynamic']:
+            sign = self.__sign
+            values = np.where((sign > 0) & (values > sign / 2),
+                              values - sign, values)
+            result = (values - self.__offset) / self.__factor
+            if kind == 'dynamic':
+                result = result * self.__dynamic_factor()
+            return result
+        if kind == 'threshold':
+            threshold = self.__threshold
+            return np.where(values < threshold, values,
+                            threshold - values) / self.__factor
+        if kind == 'bool':
+            bits = self.__bits
+            masked = values & bits
+            return np.where(bits == 0, values != 0,
+                            np.where(self.__all, masked == bits,
+                                     masked != 0))
+        return np.array([reg.value_to_external(int(value))
+                         for reg, value in zip(self.__registers, values)])
+
+    def to_internal(self, values):
+        """Converts values from external format to internal format. The
+        results are rounded and trimmed to the ``minim`` and ``maxim`` of
+        each register, the same way as when setting the ``value`` of a
+        register.
+
+        Parameters
+        ----------
+        values: array-like
+            The external values, in the order of :py:meth:`devices`.
+
+        Returns
+        -------
+        numpy.ndarray:
+            The internal values as integers.
+        """
+        kind = self.__kind
+        if kind == 'bool':
+            values = np.asarray(values, dtype=bool)
+            bits = self.__bits
+            on = np.where(bits == 0, 1, bits)
+            mask = self.__mask
+            current = self.int_values() & ~mask
+            result = np.where(mask == 0,
+                              np.where(values, on, 0),
+                              np.where(values, bits | current, current))
+        elif kind == 'scalar':
+            result = np.array([reg.value_to_internal(value)
+                               for reg, value in zip(self.__registers,
+                                                     values)])
+        else:
+            values = np.asarray(values, dtype=float)
+            if kind == 'identity':
+                result = values
+            elif kind == 'threshold':
+                result = np.where(values >= 0, values * self.__factor,
+                                  -values * self.__factor + self.__threshold)
+            else:
+                factor = self.__factor
+                if kind == 'dynamic':
+                    factor = factor / self.__dynamic_factor()
+                result = np.rint(values * factor + self.__offset)
+                sign = self.__sign
+                result = np.where((result < 0) & (sign > 0),
+                                  result + sign, result)
+        result = np.rint(result).astype(np.int64)
+        return np.clip(result, self.__minim, self.__maxim)
+
+    def values(self):
+        """Returns the values of the registers in external format (the
+        batch equivalent of reading the ``value`` of each register when the
+        registers are synced)."""
+        return self.to_external()
+
+    def write(self, values):
+        """Converts the external values and stores them in the registers
+        (the batch equivalent of setting the ``value`` of each register).
+        Registers that are not synced are written to the devices
+        immediately; read-only registers are skipped with a warning.
+
+        Parameters
+        ----------
+        values: array-like
+            The external values, in the order of :py:meth:`devices`.
+        """
+        for reg, value in zip(self.__registers, self.to_internal(values)):
+            if reg.access == 'R':
+                logger.warning(f'attempted to write in RO register '
+                               f'{reg.name} of device {reg.device.name}')
+                continue
+            reg.int_value = int(value)
+            if not reg.sync:
+                reg.write()
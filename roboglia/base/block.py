@@ -0,0 +1,326 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+STRUCT_CODES = {1: 'B', 2: 'H', 4: 'I'}
+"""Mapping between the register size and the ``struct`` format code."""
+
+STRUCT_ORDERS = {'LH': '<', 'HL': '>'}
+"""Mapping between the register order and the ``struct`` byte order."""
+
+
+class RegisterBlock():
+    """A precompiled layout of a range of registers from one device that
+    are transferred as one block of bytes.
+
+    The layout is determined once (normally in the ``setup`` of a sync)
+    and includes the resolved register objects, their offsets in the block
+    and the ``struct`` formats needed to convert them. The block also
+    keeps a preallocated ``bytearray`` that is reused every time the
+    values are packed, so that syncs do not have to allocate data for
+    every execution.
+
+    Registers that share the same address (clones) are included only once,
+    using the main register.
+
+    If all the registers are stored in the register file of the device
+    (see :py:meth:`BaseDevice.image`) the block copies the bytes directly
+    between the data and the image instead of converting the values.
+
+    Parameters
+    ----------
+    registers: list of BaseRegister or subclass
+        The registers included in the block. They must all belong to the
+        same device and must not overlap (other than clones).
+
+    start: int or None
+        The start address of the block. If ``None`` the lowest address of
+        the registers is used.
+
+    length: int or None
+        The length of the block in bytes. If ``None`` the block will extend
+        to the end of the register with the highest address.
+
+    Raises
+    ------
+        ValueError: if the registers are from different devices, overlap,
+        have sizes other than 1, 2 or 4 or do not fit in the range
+        specified by ``start`` and ``length``.
+    """
+    def __init__(self, registers=[], start=None, length=None):
+        if not registers:
+            mess = 'a register block needs at least one register'
+            logger.critical(mess)
+            raise ValueError(mess)
+        self.__device = registers[0].device
+        fields = []
+        for reg in sorted(registers, key=lambda reg: reg.address):
+            if reg.device is not self.__device:
+                mess = f'register {reg.name} is from device ' + \
+                       f'{reg.device.name} instead of {self.__device.name}'
+                logger.critical(mess)
+                raise ValueError(mess)
+            # use the main register for clones
+            main = reg.clone if reg.clone else reg
+            if fields and fields[-1].address == main.address:
+                continue
+            if fields and \
+                    main.address < fields[-1].address + fields[-1].size:
+                mess = f'register {reg.name} overlaps register ' + \
+                       f'{fields[-1].name} of device {self.__device.name}'
+                logger.critical(mess)
+                raise ValueError(mess)
+            if main.size not in STRUCT_CODES:
+                mess = f'register {reg.name} of device ' + \
+                       f'{self.__device.name} has unsupported size ' + \
+                       f'{main.size}'
+                logger.critical(mess)
+                raise ValueError(mess)
+            fields.append(main)
+        self.__fields = fields
+        self.__start = fields[0].address if start is None else start
+        end = fields[-1].address + fields[-1].size
+        self.__length = end - self.__start if length is None else length
+        if self.__start > fields[0].address or \
+                self.__start + self.__length < end:
+            mess = f'registers of device {self.__device.name} do not fit ' + \
+                   f'in block [{self.__start}:' + \
+                   f'{self.__start + self.__length}]'
+            logger.critical(mess)
+            raise ValueError(mess)
+        self.__offsets = [reg.address - self.__start for reg in fields]
+        self.__buffer = bytearray(self.__length)
+        # one struct for each byte order used by the registers; the
+        # registers with the other order are treated as pad bytes
+        self.__structs = []
+        for order in sorted(set(reg.order for reg in fields)):
+            order_fields = [reg for reg in fields if reg.order == order]
+            self.__structs.append((self.__compile(order_fields, order),
+                                   order_fields))
+        # if all registers have the same order one struct does the packing
+        # otherwise we have to go register by register
+        if len(self.__structs) == 1:
+            self.__field_structs = None
+        else:
+            self.__field_structs = [
+                struct.Struct(STRUCT_ORDERS[reg.order] +
+                              STRUCT_CODES[reg.size])
+                for reg in fields]
+        # if the registers are stored in the device's register file the
+        # data is copied as slices (offset, address, length), merging the
+        # adjacent registers
+        image = fields[0].image
+        self.__image = None
+        self.__copies = []
+        if image is not None and all(reg.image is image for reg in fields):
+            self.__image = image
+            for reg, offset in zip(fields, self.__offsets):
+                if self.__copies and self.__copies[-1][1] + \
+                        self.__copies[-1][2] == reg.address:
+                    self.__copies[-1][2] += reg.size
+                else:
+                    self.__copies.append([offset, reg.address, reg.size])
+
+    @classmethod
+    def adjacent(cls, registers):
+        """Groups registers in blocks of registers that are adjacent in the
+        same device, so that each block can be transferred without
+        including other registers.
+
+        Parameters
+        ----------
+        registers: list of BaseRegister or subclass
+            The registers; they can be from different devices. Registers
+            that have the same address, and are not clones, are placed in
+            different blocks.
+
+        Returns
+        -------
+        list of RegisterBlock:
+            The blocks, grouped by device in the order the devices appear
+            in ``registers`` and ordered by address for each device.
+        """
+        by_device = {}
+        for reg in registers:
+            by_device.setdefault(reg.device, []).append(reg)
+        blocks = []
+        for regs in by_device.values():
+            regs.sort(key=lambda reg: reg.address)
+            run = [regs[0]]
+            for reg in regs[1:]:
+                if reg.address == run[-1].address + run[-1].size:
+                    run.append(reg)
+                else:
+                    blocks.append(cls(run))
+                    run = [reg]
+            blocks.append(cls(run))
+        return blocks
+
+    def __compile(self, fields, order):
+        """Builds a ``struct.Struct`` for the ``fields`` provided, with pad
+        bytes for the gaps, covering the whole block."""
+        fmt = STRUCT_ORDERS[order]
+        pos = self.__start
+        for reg in fields:
+            if reg.address > pos:
+                fmt += f'{reg.address - pos}x'
+            fmt += STRUCT_CODES[reg.size]
+            pos = reg.address + reg.size
+        if self.__start + self.__length > pos:
+            fmt += f'{self.__start + self.__length - pos}x'
+        return struct.Struct(fmt)
+
+    @property
+    def device(self):
+        """The device the block belongs to."""
+        return self.__device
+
+    @property
+    def start(self):
+        """The start address of the block."""
+        return self.__start
+
+    @property
+    def length(self):
+        """The length of the block in bytes."""
+        return self.__length
+
+    @property
+    def registers(self):
+        """The registers (without duplicates) included in the block,
+        ordered by address."""
+        return self.__fields
+
+    @property
+    def buffer(self):
+        """The preallocated buffer used for packing the data."""
+        return self.__buffer
+
+    @property
+    def dirty(self):
+        """``True`` if any of the registers in the block is ``dirty``."""
+        for reg in self.__fields:
+            if reg.dirty:
+                return True
+        return False
+
+    def dirty_range(self):
+        """Determines the range between the first and the last ``dirty``
+        register in the block.
+
+        Returns
+        -------
+        tuple or None:
+            ``(offset, length)`` of the range in the block or ``None`` if no
+            register is ``dirty``.
+        """
+        first = last = None
+        for index, reg in enumerate(self.__fields):
+            if reg.dirty:
+                if first is None:
+                    first = index
+                last = index
+        if first is None:
+            return None
+        offset = self.__offsets[first]
+        end = self.__offsets[last] + self.__fields[last].size
+        return offset, end - offset
+
+    def mark_dirty(self):
+        """Flags again all the registers in the block as ``dirty``, for
+        instance when the transmission of the data failed."""
+        for reg in self.__fields:
+            reg.dirty = True
+
+    def pack(self):
+        """Packs the internal values of the registers in the preallocated
+        buffer and clears their ``dirty`` flag.
+
+        The flags are cleared before the values are retrieved so that any
+        change produced in the meantime will be picked up by the next
+        execution.
+
+        Returns
+        -------
+        bytearray:
+            The buffer of the block with the packed values.
+        """
+        fields = self.__fields
+        for reg in fields:
+            reg.dirty = False
+        if self.__image is not None:
+            image = self.__image
+            for offset, address, length in self.__copies:
+                self.__buffer[offset: offset + length] = \
+                    image[address: address + length]
+        elif not self.__field_structs:
+            self.__structs[0][0].pack_into(
+                self.__buffer, 0, *[int(reg.int_value) for reg in fields])
+        else:
+            for reg, field_struct, offset in zip(fields,
+                                                 self.__field_structs,
+                                                 self.__offsets):
+                field_struct.pack_into(self.__buffer, offset,
+                                       int(reg.int_value))
+        return self.__buffer
+
+    def unpack(self, data, offset=0):
+        """Decodes the values of all registers from a block of data in
+        one pass (one ``struct.unpack_from`` for each byte order used by the
+        registers) and refreshes them (see :py:meth:`BaseRegister.refresh`)
+        without marking them ``dirty``. If the registers are
+        stored in the device's register file the bytes are copied directly
+        in the image.
+
+        Parameters
+        ----------
+        data: bytes, bytearray, memoryview or list of int
+            The data received from the device. A list (as produced by the
+            communication libraries) is converted to ``bytes`` first.
+
+        offset: int
+            The position in ``data`` where the block starts. Default 0.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the data was decoded, ``False`` if ``data`` is
+            shorter than the block, in which case no register is updated.
+        """
+        if isinstance(data, list):
+            data = bytes(data)
+        if len(data) - offset < self.__length:
+            logger.error(f'received {len(data) - offset} bytes for block '
+                         f'[{self.__start}:{self.__start + self.__length}] '
+                         f'of device {self.__device.name}; expected '
+                         f'{self.__length}')
+            return False
+        if self.__image is not None:
+            image = self.__image
+            for block_offset, address, length in self.__copies:
+                start = offset + block_offset
+                image[address: address + length] = data[start: start + length]
+            for reg in self.__fields:
+                reg.mark_read()
+            return True
+        for block_struct, fields in self.__structs:
+            values = block_struct.unpack_from(data, offset)
+            for reg, value in zip(fields, values):
+                reg.refresh(value)
+        return True
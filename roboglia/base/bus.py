@@ -13,10 +13,17 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import heapq
+import itertools
 import logging
+import struct
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from ..utils import check_type, check_options, check_not_empty
+from ..utils import run_blocking
 
 
 logger = logging.getLogger(__name__)
@@ -111,7 +118,8 @@ class BaseBus():
                 # sync.bus == self will not work:
                 # sync.bus could be a SharedBus and
                 # self will be the base bus (ex. FileBus or Dynamixel Bus)
-                if sync.bus.name == self.name and sync.started:
+                names = [bus.name for bus in sync.buses]
+                if self.name in names and sync.started:
                     logger.error(f'Attempted to close bus {self.name} that is '
                                  'used by running syncs')
                     return False
@@ -164,9 +172,68 @@ class BaseBus():
 
         val: int
             The value needed to the written to the device.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the value was transmitted to the device.
         """
         raise NotImplementedError
 
+    def read_block(self, device, start_address, length):
+        """Reads a range of bytes from a device in one transaction. Must be
+        overridden by the buses that support it.
+
+        Parameters
+        ----------
+        device: BaseDevice or subclass
+            The device to read from.
+
+        start_address: int
+            The address of the first byte.
+
+        length: int
+            The number of bytes to read.
+
+        Returns
+        -------
+        list of int:
+            The bytes read or ``None`` if the read failed.
+        """
+        raise NotImplementedError
+
+    def write_block(self, device, start_address, data):
+        """Writes a range of bytes to a device in one transaction. Must be
+        overridden by the buses that support it.
+
+        Parameters
+        ----------
+        device: BaseDevice or subclass
+            The device to write to.
+
+        start_address: int
+            The address of the first byte.
+
+        data: list of int
+            The bytes to write.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the data was written successfully.
+        """
+        raise NotImplementedError
+
+
+JOURNAL_MAGIC = b'RGLJ0001'
+"""The header of the journal files written by :py:class:`FileBus`."""
+
+JOURNAL_RECORD = struct.Struct('<dHHq')
+"""The format of a record in the journal of :py:class:`FileBus`: the
+timestamp (as produced by ``time.time()``), the ``dev_id`` of the device,
+the address of the register and the value written (rounded to an integer).
+"""
+
 
 class FileBus(BaseBus):
     """A bus that writes to a file with cache provided for testing purposes.
@@ -175,21 +242,57 @@ class FileBus(BaseBus):
     local memory. Reads use this buffer to return values or use the default
     values from the register defintion.
 
-    Same parameters as :py:class:`BaseBus`.
+    In ``journal`` mode only the writes are recorded, as fixed-size binary
+    records (see ``JOURNAL_RECORD``) in a buffered file that is flushed
+    at most ``flush_interval`` seconds after a write (by a timer if the
+    bus remains quiet) and when the bus is closed. The
+    journal can be read with :py:class:`FileBusJournal` and loaded in a
+    ``FileBus`` with :py:meth:`replay`.
+
+    ``FileBus`` inherits the parameters from :py:class:`BaseBus`. In
+    addition it includes the following parameters.
+
+    Parameters
+    ----------
+    journal: bool
+        If ``True`` the file is a binary journal of the writes instead of
+        a text log of all the reads and writes. Default ``False``.
+
+    flush_interval: float
+        The maximum time in seconds a write stays in the buffer of the
+        journal before being flushed. Default 1.0.
     """
-    def __init__(self, name='FILEBUS', robot=None, port='', auto=True):
+    def __init__(self, name='FILEBUS', robot=None, port='', auto=True,
+                 journal=False, flush_interval=1.0):
         super().__init__(name=name,
                          robot=robot,
                          port=port,
                          auto=auto)
+        check_options(journal, [True, False], 'bus', self.name, logger)
+        self.__journal = journal
+        check_type(flush_interval, float, 'bus', self.name, logger)
+        self.__flush_interval = flush_interval
+        self.__last_flush = 0.0
+        self.__flush_timer = None
+        self.__flush_lock = threading.Lock()
         self.__fp = None
         self.__last = {}
         logger.debug(f'FileBus "{self.name}" initialized')
 
+    @property
+    def journal(self):
+        """``True`` if the bus writes a binary journal."""
+        return self.__journal
+
     def open(self):
         """Opens the file associated with the ``FileBus``."""
         if self.is_open:
             logger.warning(f'bus {self.name} already open')
+        elif self.__journal:
+            self.__fp = open(self.port, 'wb')
+            self.__fp.write(JOURNAL_MAGIC)
+            self.__last_flush = time.perf_counter()
+            logger.debug(f'FileBus {self.name} opened in journal mode')
         else:
             self.__fp = open(self.port, 'w')
             logger.debug(f'FileBus {self.name} opened')
@@ -198,9 +301,80 @@ class FileBus(BaseBus):
         """Closes the file associated with the ``FileBus``."""
         if self.is_open:
             if super().close():
-                self.__fp.close()
+                with self.__flush_lock:
+                    if self.__flush_timer is not None:
+                        self.__flush_timer.cancel()
+                        self.__flush_timer = None
+                    self.__fp.close()
                 logger.debug(f'FileBus {self.name} closed')
 
+    def replay(self, journal):
+        """Loads the values written in a journal in the buffer of the
+        ``FileBus``, so that the reads return them.
+
+        Parameters
+        ----------
+        journal: str or FileBusJournal
+            The journal or the name of the journal file.
+
+        Returns
+        -------
+        int:
+            The number of records replayed.
+        """
+        if not isinstance(journal, FileBusJournal):
+            journal = FileBusJournal(journal)
+        count = 0
+        for _, dev_id, address, value in journal:
+            self.__last[(dev_id, address)] = value
+            count += 1
+        logger.debug(f'FileBus "{self.name}" replayed {count} records')
+        return count
+
+    def __record(self, reg, value):
+        """Appends a write to the journal. Returns ``True`` if the record
+        was written."""
+        try:
+            record = JOURNAL_RECORD.pack(time.time(), reg.device.dev_id,
+                                         reg.address, round(value))
+            with self.__flush_lock:
+                self.__fp.write(record)
+                now = time.perf_counter()
+                if now - self.__last_flush >= self.__flush_interval:
+                    self.__flush()
+                elif self.__flush_timer is None:
+                    # flushes the record even if no other write follows
+                    delay = self.__last_flush + self.__flush_interval - now
+                    self.__flush_timer = threading.Timer(delay,
+                                                         self.__timed_flush)
+                    self.__flush_timer.daemon = True
+                    self.__flush_timer.start()
+        except Exception as e:
+            logger.error(f'error executing write to journal '
+                         f'for bus: {self.name}: {e}')
+            return False
+        return True
+
+    def __flush(self):
+        """Flushes the journal; must be called with the flush lock."""
+        if self.__flush_timer is not None:
+            self.__flush_timer.cancel()
+            self.__flush_timer = None
+        self.__fp.flush()
+        self.__last_flush = time.perf_counter()
+
+    def __timed_flush(self):
+        """Flushes the journal from the timer."""
+        with self.__flush_lock:
+            self.__flush_timer = None
+            if not self.is_open:
+                return
+            try:
+                self.__flush()
+            except Exception as e:      # pragma: no cover
+                logger.error(f'error flushing journal for bus: '
+                             f'{self.name}: {e}')
+
     @property
     def is_open(self):
         """Returns ``True`` is the file is opened."""
@@ -228,11 +402,19 @@ class FileBus(BaseBus):
 
         value: int
             The value needed to the written to the device.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the value was recorded.
         """
         if not self.is_open:
             logger.error(f'attempt to write to closed bus {self.name}')
+            return False
         else:
             self.__last[(reg.device.dev_id, reg.address)] = value
+            if self.__journal:
+                return self.__record(reg, value)
             text = f'written {value} in register "{reg.name}"" ' + \
                    f'({reg.address}) of device "{reg.device.name}" ' + \
                    f'({reg.device.dev_id})'
@@ -242,7 +424,9 @@ class FileBus(BaseBus):
             except Exception:           # pragma: no cover
                 logger.error(f'error executing write and flush to file '
                              f'for bus: {self.name}')
+                return False
             logger.debug(f'FileBus "{self.name}" {text}')
+            return True
 
     def read(self, reg):
         """Reads the value from the buffer of ``FileBus`` and logs it.
@@ -278,6 +462,9 @@ class FileBus(BaseBus):
         if (reg.device.dev_id, reg.address) not in self.__last:
             self.__last[(reg.device.dev_id, reg.address)] = reg.default
         val = self.__last[(reg.device.dev_id, reg.address)]
+        if self.__journal:
+            # the journal records only the changes
+            return val
         text = f'read {val} from register "{reg.name}" ({reg.address}) ' +\
                f'of device "{reg.device.name}" ({reg.device.dev_id})'
         try:
@@ -300,6 +487,199 @@ class FileBus(BaseBus):
         return result
 
 
+class FileBusJournal():
+    """Reads a journal written by a :py:class:`FileBus` in ``journal``
+    mode.
+
+    Iterating over the journal produces the records as tuples
+    ``(timestamp, dev_id, address, value)`` in the order they were
+    written. An incomplete record at the end of the file (for instance if
+    the program was interrupted before the bus was closed) is ignored.
+
+    Parameters
+    ----------
+    file_name: str
+        The name of the journal file.
+
+    Raises
+    ------
+        ValueError: if the file is not a journal
+    """
+    def __init__(self, file_name):
+        self.__file_name = file_name
+        with open(file_name, 'rb') as f:
+            header = f.read(len(JOURNAL_MAGIC))
+        if header != JOURNAL_MAGIC:
+            mess = f'file {file_name} is not a FileBus journal'
+            logger.critical(mess)
+            raise ValueError(mess)
+
+    @property
+    def file_name(self):
+        """The name of the journal file."""
+        return self.__file_name
+
+    def __iter__(self):
+        with open(self.__file_name, 'rb') as f:
+            f.seek(len(JOURNAL_MAGIC))
+            data = f.read()
+        extra = len(data) % JOURNAL_RECORD.size
+        if extra:
+            logger.warning(f'journal {self.__file_name} ends with an '
+                           f'incomplete record; {extra} bytes ignored')
+            data = data[:-extra]
+        return JOURNAL_RECORD.iter_unpack(data)
+
+    def values(self):
+        """Returns the last value written for each register.
+
+        Returns
+        -------
+        dict:
+            The values by ``(dev_id, address)``.
+        """
+        return {(dev_id, address): value
+                for _, dev_id, address, value in self}
+
+    def render(self, robot=None):
+        """Produces the records as text, one line per record. If a
+        ``robot`` is provided the names of the devices and registers are
+        included.
+
+        Returns
+        -------
+        str:
+            The text of the journal.
+        """
+        lines = []
+        for timestamp, dev_id, address, value in self:
+            text = f'{timestamp:.6f} written {value} in register ' + \
+                   f'({address}) of device ({dev_id})'
+            if robot:
+                device = robot.device_by_id(dev_id)
+                reg = device.register_by_address(address) if device \
+                    else None
+                if reg:
+                    text = f'{timestamp:.6f} written {value} in ' + \
+                           f'register "{reg.name}" ({address}) of ' + \
+                           f'device "{device.name}" ({dev_id})'
+            lines.append(text)
+        return '\n'.join(lines)
+
+
+class BusScheduler():
+    """Arbitrates the exclusive access to a bus between several users based
+    on priorities and deadlines.
+
+    A plain lock grants the access to whoever happens to be first when the
+    bus is released. The scheduler keeps instead a queue of the users waiting
+    for the bus and, when the bus is released, grants the access to the one
+    with the highest ``priority``; between users with the same priority the
+    one with the earliest ``deadline`` is served first (and then in the order
+    of the requests). This way a control loop can go ahead of a slow
+    diagnostic read that requested the bus earlier.
+
+    A deadline is considered missed if the access is granted after the
+    deadline or if the request times out; these are counted in
+    :py:meth:`missed_deadlines`.
+
+    The scheduler offers the same ``acquire`` / ``release`` interface as a
+    ``threading.Lock`` and is used by :py:class:`SharedBus` when it is
+    created with ``scheduler=True``.
+    """
+    def __init__(self):
+        self.__cond = threading.Condition()
+        self.__busy = False
+        self.__waiting = []
+        self.__counter = itertools.count()
+        self.__granted = 0
+        self.__missed = 0
+
+    @property
+    def waiting(self):
+        """The number of users waiting for the bus."""
+        return len(self.__waiting)
+
+    @property
+    def granted(self):
+        """The number of times the access to the bus was granted."""
+        return self.__granted
+
+    @property
+    def missed_deadlines(self):
+        """The number of requests that were granted after their deadline or
+        that timed out."""
+        return self.__missed
+
+    def reset_statistics(self):
+        """Resets the counters of the scheduler."""
+        with self.__cond:
+            self.__granted = 0
+            self.__missed = 0
+
+    def __grant(self, deadline):
+        """Marks the bus as used and updates the statistics. Must be called
+        with the condition acquired."""
+        self.__busy = True
+        self.__granted += 1
+        if deadline is not None and time.perf_counter() > deadline:
+            self.__missed += 1
+
+    def acquire(self, priority=0, deadline=None, timeout=-1):
+        """Requests the exclusive use of the bus.
+
+        Parameters
+        ----------
+        priority: int
+            The priority of the request; higher numbers are served first.
+            Default 0.
+
+        deadline: float or None
+            The latest time (as returned by ``time.perf_counter()``) when the
+            access should be granted. ``None`` means no deadline.
+
+        timeout: float
+            The maximum time in seconds to wait for the bus. A negative
+            value means wait indefinitely. Default -1.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the access was granted, ``False`` if the request
+            timed out.
+        """
+        with self.__cond:
+            if not self.__busy and not self.__waiting:
+                self.__grant(deadline)
+                return True
+            entry = (-priority,
+                     float('inf') if deadline is None else deadline,
+                     next(self.__counter))
+            heapq.heappush(self.__waiting, entry)
+            end = None if timeout < 0 else time.perf_counter() + timeout
+            while self.__busy or self.__waiting[0] != entry:
+                remaining = None if end is None else \
+                    end - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    self.__waiting.remove(entry)
+                    heapq.heapify(self.__waiting)
+                    if deadline is not None:
+                        self.__missed += 1
+                    # the next in line might be able to go now
+                    self.__cond.notify_all()
+                    return False
+                self.__cond.wait(remaining)
+            heapq.heappop(self.__waiting)
+            self.__grant(deadline)
+            return True
+
+    def release(self):
+        """Releases the bus and wakes up the users waiting for it."""
+        with self.__cond:
+            self.__busy = False
+            self.__cond.notify_all()
+
+
 class SharedBus():
     """Implements a bus that provides a locking mechanism for the access to
     the underlying hardware, aimed specifically for use in multi-threaded
@@ -321,35 +701,101 @@ class SharedBus():
     timeout: float
         A timeout for acquiring the lock that controls the access to the bus
 
+    scheduler: bool
+        If ``True`` the access to the bus is arbitrated by a
+        :py:class:`BusScheduler` that serves the waiting users in the order
+        of their priority and deadline instead of a plain lock.
+        Default ``False``.
+
+    priority: int
+        The priority used with the scheduler for the ad-hoc accesses
+        (:py:meth:`read` and :py:meth:`write`) to the bus. Syncs have their
+        own priority. Default 0.
+
+    write_behind: float
+        If greater than 0 the :py:meth:`write` requests are not sent
+        immediately; instead they are collected for this time (in seconds)
+        and then sent together by :py:meth:`flush` (subclasses can merge
+        them in fewer packets, see :py:meth:`naked_flush`). Several writes
+        of the same register in this interval result in only one write
+        with the latest value of the register. Default 0.0 (writes are sent
+        immediately).
+
+    worker: bool
+        If ``True`` the bus owns a dedicated I/O thread with a work queue
+        that executes, in order, the functions passed to :py:meth:`submit`.
+        The robot uses it to open, refresh and close the buses in parallel
+        so that the serial waits on one port overlap with the work on the
+        others. Default ``False`` (:py:meth:`submit` executes the function
+        in the caller's thread).
+
     **kwargs:
         keyword arguments that are passed to the BusClass for
         instantiation
     """
-    def __init__(self, BusClass, timeout=0.5, **kwargs):
+    def __init__(self, BusClass, timeout=0.5, scheduler=False, priority=0,
+                 write_behind=0.0, worker=False, **kwargs):
         self.__main_bus = BusClass(**kwargs)
         self.__timeout = timeout
         check_type(self.__timeout, float, 'bus', self.__main_bus.name, logger)
         if self.__timeout > 0.5:
             logger.warning(f'timeout {self.__timeout} for shareable '
                            f'{self.__main_bus.name} might be excessive.')
-        self.__lock = threading.Lock()
+        check_options(scheduler, [True, False], 'bus', self.__main_bus.name,
+                      logger)
+        check_type(priority, int, 'bus', self.__main_bus.name, logger)
+        self.__priority = priority
+        if scheduler:
+            self.__lock = BusScheduler()
+            self.__scheduler = self.__lock
+        else:
+            self.__lock = threading.Lock()
+            self.__scheduler = None
+        check_type(write_behind, float, 'bus', self.__main_bus.name, logger)
+        self.__write_behind = write_behind
+        # registers waiting to be written; a dict keeps the order
+        self.__pending = {}
+        self.__pending_lock = threading.Lock()
+        self.__flush_lock = threading.Lock()
+        self.__timer = None
+        check_options(worker, [True, False], 'bus', self.__main_bus.name,
+                      logger)
+        self.__use_worker = worker
+        self.__worker = None
+        self.__worker_lock = threading.Lock()
 
     @property
     def lock(self):
+        """The object controlling the access to the bus: a
+        ``threading.Lock`` or a :py:class:`BusScheduler`."""
         return self.__lock
 
+    @property
+    def scheduler(self):
+        """The :py:class:`BusScheduler` used by the bus or ``None`` if the
+        bus uses a plain lock."""
+        return self.__scheduler
+
+    @property
+    def priority(self):
+        """The priority used with the scheduler for ad-hoc accesses."""
+        return self.__priority
+
     @property
     def timeout(self):
         """Returns the timeout for requesting access to lock."""
         return self.__timeout
 
-    def can_use(self):
+    def can_use(self, priority=None, deadline=None):
         """Tries to acquire the resource on behalf of the caller.
 
         This method should be called every time a user of the bus wants to
         perform an operation. If the result is ``False`` the user does not
         have exclusive use of the bus and the actions are not guaranteed.
 
+        If the bus uses a scheduler the ``priority`` and ``deadline`` are
+        used to order the requests; otherwise they are ignored.
+
         .. warning:: It is the responsibility of the user to call
             :py:meth:`~SharedBus.stop_using` as soon as possible after
             preforming the intended work with the bus if this method
@@ -357,6 +803,16 @@ class SharedBus():
             being blocked by this user and prohibiting other users to
             access it.
 
+        Parameters
+        ----------
+        priority: int or None
+            The priority of the request (higher is served first). ``None``
+            uses the priority of the bus. Default ``None``.
+
+        deadline: float or None
+            The time (as returned by ``time.perf_counter()``) by which the
+            access is needed. ``None`` means no deadline.
+
         Returns
         -------
         bool
@@ -365,12 +821,189 @@ class SharedBus():
             to do in case there is a ``False`` return including
             logging or Raising.
         """
+        if self.__scheduler:
+            if priority is None:
+                priority = self.__priority
+            return self.__scheduler.acquire(priority=priority,
+                                            deadline=deadline,
+                                            timeout=self.__timeout)
         return self.__lock.acquire(timeout=self.__timeout)
 
     def stop_using(self):
         """Releases the resource."""
         self.__lock.release()
 
+    @property
+    def worker(self):
+        """``True`` if the bus executes the functions passed to
+        :py:meth:`submit` on its own I/O thread."""
+        return self.__use_worker
+
+    def submit(self, function, *args, **kwargs):
+        """Executes ``function(*args, **kwargs)`` on the I/O worker of the
+        bus, after the functions submitted before it. The worker thread is
+        started with the first submission. If the bus does not use a
+        worker the function is executed immediately in the caller's thread.
+
+        The function is not wrapped in :py:meth:`can_use` and
+        :py:meth:`stop_using`; it should use the **safe** methods of the bus
+        or acquire the bus itself.
+
+        Returns
+        -------
+        concurrent.futures.Future:
+            The future with the result of the function or the exception
+            it raised.
+        """
+        if self.__use_worker:
+            with self.__worker_lock:
+                if self.__worker is None:
+                    self.__worker = ThreadPoolExecutor(
+                        max_workers=1,
+                        thread_name_prefix=f'{self.__main_bus.name}-io')
+                return self.__worker.submit(function, *args, **kwargs)
+        future = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def run_async(self, function, *args, **kwargs):
+        """Returns an awaitable for the execution of
+        ``function(*args, **kwargs)`` outside the event loop: on the I/O
+        worker of the bus if it has one (see :py:meth:`submit`) or on the
+        default executor of the running event loop otherwise. It must be
+        called from a coroutine.
+
+        Returns
+        -------
+        asyncio.Future:
+            The future with the result of the function.
+        """
+        if self.__use_worker:
+            return asyncio.wrap_future(self.submit(function, *args, **kwargs))
+        return run_blocking(function, *args, **kwargs)
+
+    async def aread(self, reg):
+        """Awaitable version of :py:meth:`read`."""
+        return await self.run_async(self.read, reg)
+
+    async def awrite(self, reg, value):
+        """Awaitable version of :py:meth:`write`."""
+        return await self.run_async(self.write, reg, value)
+
+    async def aread_block(self, device, start_address, length):
+        """Awaitable version of :py:meth:`read_block`."""
+        return await self.run_async(self.read_block, device, start_address,
+                                    length)
+
+    async def awrite_block(self, device, start_address, data):
+        """Awaitable version of :py:meth:`write_block`."""
+        return await self.run_async(self.write_block, device, start_address,
+                                    data)
+
+    @property
+    def write_behind(self):
+        """The time the writes are delayed to be sent together or 0 if the
+        writes are sent immediately."""
+        return self.__write_behind
+
+    @property
+    def pending(self):
+        """The registers waiting to be written by :py:meth:`flush`."""
+        with self.__pending_lock:
+            return list(self.__pending)
+
+    def flush(self):
+        """Sends all the pending writes. It is invoked automatically
+        ``write_behind`` seconds after the first write that is delayed,
+        before any :py:meth:`read` and before the bus is closed, but it can
+        be called explicitly.
+
+        The method acts as a barrier: when it returns ``True`` all the writes
+        requested before the call have been transmitted (by this call or
+        by a flush that was already in progress).
+
+        Returns
+        -------
+        bool:
+            ``False`` if the bus could not be acquired or some writes
+            failed; these writes are kept pending in this case and the
+            flush is scheduled again.
+        """
+        with self.__flush_lock:
+            with self.__pending_lock:
+                registers = list(self.__pending)
+                self.__pending.clear()
+                timer = self.__timer
+                self.__timer = None
+            if timer is not None:
+                timer.cancel()
+            if not registers:
+                return True
+            if not self.can_use():
+                logger.error(f'failed to acquire bus {self.__main_bus.name} '
+                             f'to flush {len(registers)} writes; retrying '
+                             f'later')
+                self.__requeue(registers)
+                return False
+            try:
+                failed = self.naked_flush(registers)
+            finally:
+                self.stop_using()
+            if failed:
+                logger.error(f'bus {self.__main_bus.name}: {len(failed)} '
+                             f'writes failed; retrying later')
+                self.__requeue(failed)
+                return False
+            return True
+
+    def __requeue(self, registers):
+        """Puts back the registers that were not written in front of the
+        pending writes and schedules the flush again."""
+        with self.__pending_lock:
+            # the failed writes go before those requested meanwhile
+            pending = dict.fromkeys(registers)
+            pending.update(self.__pending)
+            self.__pending.clear()
+            self.__pending.update(pending)
+            self.__schedule()
+
+    def naked_flush(self, registers):
+        """Writes the current internal values of the registers without
+        invoking the lock. Used by :py:meth:`flush` after it acquired the
+        bus. ``SharedBus`` writes the registers one by one; subclasses can
+        override it to send them in fewer packets.
+
+        Parameters
+        ----------
+        registers: list of BaseRegister or subclass
+            The registers to write, in the order they were requested.
+
+        Returns
+        -------
+        list of BaseRegister or subclass:
+            The registers that could not be written.
+        """
+        return [reg for reg in registers
+                if not self.__main_bus.write(reg, reg.int_value)]
+
+    def __defer(self, reg):
+        """Adds the register to the pending writes and, if needed, schedules
+        the flush."""
+        with self.__pending_lock:
+            self.__pending[reg] = None
+            self.__schedule()
+
+    def __schedule(self):
+        """Starts the timer for the flush if it is not already started;
+        must be called with the pending lock."""
+        if self.__timer is None:
+            self.__timer = threading.Timer(self.__write_behind, self.flush)
+            self.__timer.daemon = True
+            self.__timer.start()
+
     def naked_read(self, reg):
         """Calls the main bus read without invoking the lock. This is
         intended for those users that plan to use a series of read operations
@@ -439,8 +1072,63 @@ class SharedBus():
 
         value: int
             The value needed to the written to the device.
+
+        Returns
+        -------
+        bool:
+            The result of the main bus ``write``.
+        """
+        return self.__main_bus.write(reg, value)
+
+    def naked_read_block(self, device, start_address, length):
+        """Calls the main bus ``read_block`` without invoking the lock (see
+        :py:meth:`naked_read`)."""
+        return self.__main_bus.read_block(device, start_address, length)
+
+    def naked_write_block(self, device, start_address, data):
+        """Calls the main bus ``write_block`` without invoking the lock (see
+        :py:meth:`naked_write`)."""
+        return self.__main_bus.write_block(device, start_address, data)
+
+    def read_block(self, device, start_address, length):
+        """Performs a **safe** ``read_block`` of the main bus by wrapping it
+        in a request to acquire the bus. The pending writes (see
+        ``write_behind``) are sent first.
+
+        Returns
+        -------
+        list of int:
+            The bytes read or ``None`` if the read failed or the bus could
+            not be acquired.
+        """
+        if self.__write_behind > 0:
+            self.flush()
+        if self.can_use():
+            data = self.__main_bus.read_block(device, start_address, length)
+            self.stop_using()
+            return data
+        logger.error(f'failed to acquire bus {self.__main_bus.name}')
+        return None
+
+    def write_block(self, device, start_address, data):
+        """Performs a **safe** ``write_block`` of the main bus by wrapping
+        it in a request to acquire the bus. The pending writes (see
+        ``write_behind``) are sent first so that they do not overwrite the
+        data later.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the data was written.
         """
-        self.__main_bus.write(reg, value)
+        if self.__write_behind > 0:
+            self.flush()
+        if self.can_use():
+            result = self.__main_bus.write_block(device, start_address, data)
+            self.stop_using()
+            return result
+        logger.error(f'failed to acquire bus {self.__main_bus.name}')
+        return False
 
     def read(self, reg):
         """Overrides the main bus' :py:meth:`~roboglia.base.BaseBus.read`
@@ -466,6 +1154,9 @@ class SharedBus():
             to secure with bus within the ``timeout``.
 
         """
+        if self.__write_behind > 0:
+            # the pending writes must reach the devices before the read
+            self.flush()
         if self.can_use():
             value = self.__main_bus.read(reg)
             self.stop_using()
@@ -492,13 +1183,37 @@ class SharedBus():
             providing it to the caller.
 
         value: int
-            The value to be written to the device.
+            The value to be written to the device. If the bus uses
+            ``write_behind`` the value written is the internal value of the
+            register when the writes are flushed.
+
+        Returns
+        -------
+        bool:
+            The result of the main bus ``write`` or ``False`` if the bus
+            could not be acquired. Deferred writes return ``True``.
         """
+        if self.__write_behind > 0:
+            self.__defer(reg)
+            return True
         if self.can_use():
-            self.__main_bus.write(reg, value)
+            result = self.__main_bus.write(reg, value)
             self.stop_using()
-        else:
-            logger.error(f'failed to acquire bus {self.__main_bus.name}')
+            return result
+        logger.error(f'failed to acquire bus {self.__main_bus.name}')
+        return False
+
+    def close(self):
+        """Flushes the pending writes before closing the main bus. The I/O
+        worker, if started, ends after finishing the functions already
+        submitted; a new one is started if the bus is used again."""
+        self.flush()
+        self.__main_bus.close()
+        with self.__worker_lock:
+            if self.__worker is not None:
+                # no wait: ``close`` itself might run on the worker
+                self.__worker.shutdown(wait=False)
+                self.__worker = None
 
     def __repr__(self):
         """Invokes the main bus representation but changes the class name
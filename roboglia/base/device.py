@@ -15,17 +15,71 @@
 
 import os
 import logging
+import threading
+from collections.abc import Mapping
 
 from ..utils import get_registered_class, check_not_empty, \
-                    check_type, check_key
+                    check_type, check_key, check_options
 
-from ..utils import load_yaml_with_include
+from ..utils import load_yaml_with_include, default_cache_dir
+from ..utils import run_blocking
 
 from .bus import BaseBus, SharedBus
+from .block import RegisterBlock
 
 logger = logging.getLogger(__name__)
 
 
+class LazyRegisters(Mapping):
+    """The registers of a device created with ``lazy: True``.
+
+    The mapping contains the names of all the registers in the model of the
+    device, but the register objects are created only when they are first
+    requested (by name, through iteration of the values or, by the device,
+    as attributes).
+
+    Parameters
+    ----------
+    names: list of str
+        The names of the registers, in the order they are created by a
+        device that is not ``lazy``.
+
+    factory: callable
+        A function that creates the register with the given name.
+    """
+    def __init__(self, names, factory):
+        self.__names = dict.fromkeys(names)
+        self.__factory = factory
+        self.__created = {}
+        self.__lock = threading.RLock()
+
+    def __getitem__(self, name):
+        register = self.__created.get(name)
+        if register is None:
+            if name not in self.__names:
+                raise KeyError(name)
+            with self.__lock:
+                register = self.__created.get(name)
+                if register is None:
+                    register = self.__factory(name)
+                    self.__created[name] = register
+        return register
+
+    def __contains__(self, name):
+        return name in self.__names
+
+    def __iter__(self):
+        return iter(self.__names)
+
+    def __len__(self):
+        return len(self.__names)
+
+    @property
+    def created(self):
+        """The registers already created, as a dictionary."""
+        return self.__created
+
+
 class BaseDevice():
     """A base virtual class for all devices.
 
@@ -89,6 +143,27 @@ class BaseDevice():
         As no syncs are currently implemented this will automatically
         trigger a ``write`` call to store that value in the device.
 
+    register_file: bool
+        If ``True`` the device keeps the internal values of its registers
+        in a register file: a ``bytearray`` that mirrors the control table
+        of the device, with each value stored at the register's address in
+        the device's byte order. The registers access their values in this
+        image (see :py:meth:`BaseRegister.attach`) and the syncs copy the
+        data received from the device directly in it. Default ``False``.
+
+    max_age: float or ``None``
+        The time in seconds the values read from the device are reused by
+        the registers that are not synced and do not have their own
+        ``max_age`` (see :py:meth:`BaseRegister.value`). If ``None`` (the
+        default) the ``max_age`` in the model file is used, if present.
+
+    lazy: bool
+        If ``True`` the register objects are created only when they are
+        first used (as attributes of the device, through :py:meth:`registers`
+        or :py:meth:`register_by_address`) instead of creating all the
+        registers of the model when the device is created. Default
+        ``False``.
+
     Raises
     ------
         KeyError
@@ -102,8 +177,25 @@ class BaseDevice():
     device creation.
     """
 
+    descriptors = {}
+    """The descriptors of the registers (see :py:class:`RegisterDescriptor`)
+    by model file, register name and register class. The registers of all
+    the devices with the same model share the descriptors produced when
+    the first of them was created.
+    """
+
+    cache_dir = None
+    """The directory where the resolved device models are stored between
+    runs, so that the YAML files are parsed only when they change (see
+    :py:func:`~roboglia.utils.load_yaml_with_include`). If ``None`` the
+    ``ROBOGLIA_CACHE`` environment variable is used when a model is loaded
+    (see :py:func:`~roboglia.utils.default_cache_dir`); the persistent
+    cache is not used if neither is set.
+    """
+
     def __init__(self, name='DEVICE', bus=None, dev_id=None, model=None,
-                 path=None, inits=[], **kwargs):
+                 path=None, inits=[], register_file=False, max_age=None,
+                 lazy=False, **kwargs):
         # these are already checked by robot
         self.__name = name
         check_not_empty(bus, 'bus', 'device', name, logger)
@@ -119,47 +211,93 @@ class BaseDevice():
             path = self.get_model_path()
         model_file = os.path.join(path, model + '.yml')
         if model_file not in BaseDevice.cache:
-            model_ini = load_yaml_with_include(model_file)
+            cache_dir = BaseDevice.cache_dir
+            if cache_dir is None:
+                cache_dir = default_cache_dir()
+            model_ini = load_yaml_with_include(model_file, cache_dir)
             BaseDevice.cache[model_file] = model_ini
         else:
             model_ini = BaseDevice.cache[model_file]
-        self.__registers = {}
-        self.__reg_by_addr = {}
+        self.__model_file = model_file
+        self.__model_registers = model_ini['registers']
+        # main registers first so that the clones can refer to them
+        names = []
         clones = []
-        for reg_name, reg_info in model_ini['registers'].items():
-            # add name to the dictionary
-            reg_info['name'] = reg_name
-            reg_info['device'] = self
+        self.__addr_names = {}
+        for reg_name, reg_info in self.__model_registers.items():
             if reg_info.get('clone', False):
-                # we register clones at the end after we have the main
-                # registers so that we can refer to them
-                clones.append(reg_info)
+                clones.append(reg_name)
             else:
-                reg_class_name = reg_info.get('class', self.default_register())
-                reg_class = get_registered_class(reg_class_name)
-                new_register = reg_class(**reg_info)
-                # we add as an attribute of the register too
-                self.__dict__[reg_name] = new_register
-                self.__registers[reg_name] = new_register
-                self.__reg_by_addr[reg_info['address']] = new_register
-        # now the clones
-        for reg_info in clones:
+                names.append(reg_name)
+                self.__addr_names[reg_info.get('address', 0)] = reg_name
+        for reg_name in clones:
+            reg_info = self.__model_registers[reg_name]
             # check that the register address is covered by a main register
-            check_key('address', reg_info, 'register', reg_info['name'],
-                      logger)
-            check_key(reg_info['address'], self.__reg_by_addr, 'register',
-                      reg_info['name'], logger,
+            check_key('address', reg_info, 'register', reg_name, logger)
+            check_key(reg_info['address'], self.__addr_names, 'register',
+                      reg_name, logger,
                       f'no main register with address {reg_info["address"]} '
                       'defined')
-            reg_info['clone'] = self.register_by_address(reg_info['address'])
-            reg_name = reg_info['name']
-            reg_class_name = reg_info.get('class', self.default_register())
-            reg_class = get_registered_class(reg_class_name)
-            new_register = reg_class(**reg_info)
-            # we add as an attribute of the register too
-            self.__dict__[reg_name] = new_register
-            self.__registers[reg_name] = new_register
+        names.extend(clones)
         self.__inits = inits
+        if max_age is None:
+            max_age = model_ini.get('max_age', None)
+        if max_age is not None:
+            check_type(max_age, [int, float], 'device', name, logger)
+        self.__max_age = max_age
+        check_options(register_file, [True, False], 'device', name, logger)
+        self.__image = None
+        if register_file:
+            self.__image = bytearray(
+                max((reg_info.get('address', 0) + reg_info.get('size', 1)
+                     for reg_info in self.__model_registers.values()),
+                    default=0))
+        check_options(lazy, [True, False], 'device', name, logger)
+        if lazy:
+            self.__registers = LazyRegisters(names, self.__new_register)
+        else:
+            self.__registers = {}
+            for reg_name in names:
+                self.__registers[reg_name] = self.__new_register(reg_name)
+
+    def __new_register(self, reg_name):
+        """Creates the register object from its description in the model.
+        The first device of a model validates the description and produces
+        the register descriptor used by the other devices with the same
+        model. The description in the model is not changed as it is shared
+        by all the devices with the same model."""
+        reg_info = self.__model_registers[reg_name]
+        clone = None
+        if reg_info.get('clone', False):
+            clone = self.register_by_address(reg_info['address'])
+        reg_class_name = reg_info.get('class', self.default_register())
+        reg_class = get_registered_class(reg_class_name)
+        key = (self.__model_file, reg_name, reg_class)
+        descriptor = BaseDevice.descriptors.get(key, None)
+        if descriptor is None:
+            # the constructor validates the description
+            template = reg_class(**dict(reg_info, name=reg_name,
+                                        device=self, clone=clone))
+            descriptor = template.descriptor()
+            BaseDevice.descriptors[key] = descriptor
+        new_register = descriptor.create(self, clone,
+                                         reg_info.get('sync', False))
+        # we add as an attribute of the register too
+        self.__dict__[reg_name] = new_register
+        if self.__image is not None and not new_register.clone and \
+                not new_register.attach(self.__image):
+            logger.debug(f'register {reg_name} of device {self.name} '
+                         'keeps its own storage')
+        return new_register
+
+    def __getattr__(self, name):
+        """Creates the registers of a ``lazy`` device when they are first
+        accessed as attributes."""
+        registers = self.__dict__.get('_BaseDevice__registers')
+        if registers is not None and name in registers:
+            return registers[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no "
+                             f"attribute '{name}'")
 
     @property
     def name(self):
@@ -178,11 +316,40 @@ class BaseDevice():
 
         Returns
         -------
-        dict:
-            The dictionary of registers with the register name as key.
+        dict or LazyRegisters:
+            The dictionary of registers with the register name as key. For
+            ``lazy`` devices it is a :py:class:`LazyRegisters` mapping that
+            creates the registers when they are requested.
         """
         return self.__registers
 
+    @property
+    def max_age(self):
+        """The ``max_age`` used by the registers that do not have their own
+        or ``None`` if the device does not define one (in this case the
+        registers use :py:attr:`BaseRegister.default_max_age`)."""
+        return self.__max_age
+
+    def cache_stats(self):
+        """Returns the totals of the cache hits and misses of the registers
+        of the device as a tuple ``(hits, misses)``. For ``lazy`` devices
+        only the registers already created are included."""
+        registers = self.__registers
+        if isinstance(registers, LazyRegisters):
+            registers = registers.created
+        hits = misses = 0
+        for register in registers.values():
+            hits += register.cache_hits
+            misses += register.cache_misses
+        return hits, misses
+
+    @property
+    def image(self):
+        """The register file of the device (a ``bytearray`` mirroring the
+        control table) or ``None`` if the device was not created with
+        ``register_file``."""
+        return self.__image
+
     def register_by_address(self, address):
         """Returns the register identified by the given address. If the
         address is not available in the device it will return ``None``.
@@ -193,7 +360,10 @@ class BaseDevice():
             The device at `address` or ``None`` if no register with that
             address exits.
         """
-        return self.__reg_by_addr.get(address, None)
+        reg_name = self.__addr_names.get(address, None)
+        if reg_name is None:
+            return None
+        return self.__registers[reg_name]
 
     @property
     def dev_id(self):
@@ -261,6 +431,117 @@ class BaseDevice():
         """
         self.bus.write(register, value)
 
+    def __named_registers(self, names):
+        """Returns the registers with the given names."""
+        registers = []
+        for reg_name in names:
+            check_key(reg_name, self.registers, 'device', self.name, logger,
+                      f'device {self.name} does not have a register '
+                      f'{reg_name}')
+            registers.append(self.registers[reg_name])
+        return registers
+
+    def read_registers(self, names):
+        """Reads several registers with one transaction that covers the
+        range of addresses from the first to the last of them (using the
+        ``read_block`` method of the bus) and updates the registers with
+        the data received.
+
+        Parameters
+        ----------
+        names: list of str
+            The names of the registers.
+
+        Returns
+        -------
+        dict or None:
+            The values of the registers in external format, by name, or
+            ``None`` if the read failed (in which case the registers are
+            not changed).
+        """
+        registers = self.__named_registers(names)
+        block = RegisterBlock(registers)
+        data = self.bus.read_block(self, block.start, block.length)
+        if data is None or not block.unpack(data):
+            return None
+        # registers at the same address that are not clones keep their
+        # own values and are skipped by the block
+        fields = {reg.address: reg for reg in block.registers}
+        for reg in registers:
+            main = reg.clone if reg.clone else reg
+            if fields[main.address] is not main:
+                main.int_value = fields[main.address].int_value
+            # the registers now mirror the device
+            main.dirty = False
+        return {reg.name: reg.value_to_external(reg.int_value)
+                for reg in registers}
+
+    def write_registers(self, values):
+        """Updates several registers and writes them to the device with one
+        transaction for every range of adjacent registers (using the
+        ``write_block`` method of the bus). The values are converted and
+        trimmed the same way as when setting the ``value`` of a register;
+        read-only registers are skipped with a warning.
+
+        Parameters
+        ----------
+        values: dict
+            The values in external format, by register name.
+
+        Returns
+        -------
+        bool:
+            ``True`` if all the data was written successfully.
+        """
+        registers = []
+        for reg in self.__named_registers(values):
+            if reg.access == 'R':
+                logger.warning(f'attempted to write in RO register '
+                               f'{reg.name} of device {self.name}')
+                continue
+            int_value = reg.value_to_internal(values[reg.name])
+            reg.int_value = max(reg.minim, min(reg.maxim, int_value))
+            registers.append(reg)
+        success = True
+        if registers:
+            for block in RegisterBlock.adjacent(registers):
+                if not self.bus.write_block(self, block.start,
+                                            list(block.pack())):
+                    block.mark_dirty()
+                    success = False
+        return success
+
+    def run_async(self, function, *args, **kwargs):
+        """Returns an awaitable for the execution of
+        ``function(*args, **kwargs)`` outside the event loop: with
+        :py:meth:`SharedBus.run_async` if the device is on a shared bus, on
+        the default executor of the running event loop otherwise. It must
+        be called from a coroutine."""
+        if isinstance(self.bus, SharedBus):
+            return self.bus.run_async(function, *args, **kwargs)
+        return run_blocking(function, *args, **kwargs)
+
+    async def aread(self, name):
+        """Returns the ``value`` of the register ``name``. The register is
+        accessed the same way as with ``getattr(device, name).value`` but
+        without blocking the event loop."""
+        register = self.__named_registers([name])[0]
+        return await self.run_async(getattr, register, 'value')
+
+    async def awrite(self, name, value):
+        """Sets the ``value`` of the register ``name`` without blocking the
+        event loop."""
+        register = self.__named_registers([name])[0]
+        await self.run_async(setattr, register, 'value', value)
+
+    async def aread_registers(self, names):
+        """Awaitable version of :py:meth:`read_registers`."""
+        return await self.run_async(self.read_registers, names)
+
+    async def awrite_registers(self, values):
+        """Awaitable version of :py:meth:`write_registers`."""
+        return await self.run_async(self.write_registers, values)
+
     def open(self):
         """Performs initialization of the device by reading all registers
         that are not flagged for ``sync`` replication and, if ``init``
@@ -395,17 +395,17 @@ class Joint():
         check_type(device, BaseDevice, 'joint', self.name, logger)
         self.__device = device
         check_not_empty(pos_read, 'pos_read', 'joint', self.name, logger)
-        check_key(pos_read, device.__dict__, 'joint', self.name, logger,
+        check_key(pos_read, device.registers, 'joint', self.name, logger,
                   f'device {device.name} does not have a register '
                   f'{pos_read}')
         self.__pos_r = getattr(device, pos_read)
         check_not_empty(pos_read, 'pos_read', 'joint', self.name, logger)
-        check_key(pos_write, device.__dict__, 'joint', self.name, logger,
+        check_key(pos_write, device.registers, 'joint', self.name, logger,
                   f'device {device.name} does not have a register '
                   f'{pos_write}')
         self.__pos_w = getattr(device, pos_write)
         if activate:
-            check_key(activate, device.__dict__, 'joint', self.__name, logger,
+            check_key(activate, device.registers, 'joint', self.__name, logger,
                       f'device {device.name} does not have a register '
                       f'{activate}')
             self.__activate = getattr(device, activate)
@@ -581,13 +581,13 @@ class JointPV(Joint):
     def __init__(self, vel_read=None, vel_write=None, **kwargs):
         super().__init__(**kwargs)
         check_not_empty(vel_read, 'vel_read', 'joint', self.name, logger)
-        check_key(vel_read, self.device.__dict__,
+        check_key(vel_read, self.device.registers,
                   'joint', self.name, logger,
                   f'device {self.device.name} does not have a register '
                   f'{vel_read}')
         self.__vel_r = getattr(self.device, vel_read)
         check_not_empty(vel_write, 'vel_write', 'joint', self.name, logger)
-        check_key(vel_write, self.device.__dict__,
+        check_key(vel_write, self.device.registers,
                   'joint', self.name, logger,
                   f'device {self.device.name} does not have a register '
                   f'{vel_write}')
@@ -672,13 +672,13 @@ class JointPVL(JointPV):
     def __init__(self, load_read=None, load_write=None, **kwargs):
         super().__init__(**kwargs)
         check_not_empty(load_read, 'load_read', 'joint', self.name, logger)
-        check_key(load_read, self.device.__dict__,
+        check_key(load_read, self.device.registers,
                   'joint', self.name, logger,
                   f'device {self.device.name} does not have a register '
                   f'{load_read}')
         self.__load_r = getattr(self.device, load_read)
         check_not_empty(load_write, 'load_write', 'joint', self.name, logger)
-        check_key(load_write, self.device.__dict__,
+        check_key(load_write, self.device.registers,
                   'joint', self.name, logger,
                   f'device {self.device.name} does not have a register '
                   f'{load_write}')
@@ -14,11 +14,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
-import inspect
+import struct
+import time
 
 from ..utils import check_type, check_options, check_not_empty
-from .device import BaseDevice
+from .device import BaseDevice, LazyRegisters
 from .sync import BaseSync
+from .block import STRUCT_CODES, STRUCT_ORDERS
 
 logger = logging.getLogger(__name__)
 
@@ -99,24 +101,39 @@ class BaseRegister():
     default: int
         The default value for the register; implicit 0
 
+    max_age: float or ``None``
+        The time in seconds a value read from the device is reused by
+        :py:meth:`value` before reading the device again, for registers that
+        are not synced. 0 means the device is read every time. If ``None``
+        (the default) the register uses the ``max_age`` of the device (see
+        :py:meth:`max_age`).
+
+    .. note:: The attributes that describe the register (everything set in
+        the constructor apart from the device, the clone and the state of
+        the register) are kept in the instance ``__dict__`` while the state
+        uses ``__slots__``. This allows :py:class:`RegisterDescriptor` to
+        move the description in a class shared by the registers of all the
+        devices with the same model. Subclasses should keep any other state
+        in their own ``__slots__``, initialized in :py:meth:`bind`.
     """
+    __slots__ = ('__dict__', '__weakref__', '__device', '__clone', '__sync',
+                 '__int_value', '__dirty', '__owner', '__image', '__struct',
+                 '__read_time', '__hits', '__misses')
+
+    default_max_age = 0.0
+    """The ``max_age`` used by the registers when neither they nor their
+    devices specify one. Changing it affects all the registers."""
+
     def __init__(self, name='REGISTER', device=None, address=0, clone=None,
                  size=1, minim=0, maxim=None, access='R', sync=False,
-                 word=False, bulk=True, order='LH', default=0, **kwargs):
+                 word=False, bulk=True, order='LH', default=0, max_age=None,
+                 **kwargs):
         # these are already checked by the device
         self.__name = name
-        # device
-        check_not_empty(device, 'device', 'register', self.name, logger)
-        check_type(device, BaseDevice, 'register', self.name, logger)
-        self.__device = device
         # address
         if address != 0:
             check_not_empty(address, 'address', 'register', self.name, logger)
         self.__address = address
-        # clone
-        if clone:
-            check_type(clone, BaseRegister, 'register', self.name, logger)
-        self.__clone = clone
         # size
         check_not_empty(size, 'size', 'register', self.name, logger)
         check_type(size, int, 'register', self.name, logger)
@@ -133,9 +150,6 @@ class BaseRegister():
         # access
         check_options(access, ['R', 'RW'], 'register', self.name, logger)
         self.__access = access
-        # sync
-        check_options(sync, [True, False], 'register', self.name, logger)
-        self.__sync = sync
         # word
         check_options(word, [True, False], 'register', self.name, logger)
         self.__word = word
@@ -148,7 +162,104 @@ class BaseRegister():
         # default
         check_type(default, int, 'register', self.name, logger)
         self.__default = default
+        # max_age
+        if max_age is not None:
+            check_type(max_age, [int, float], 'register', self.name, logger)
+        self.__max_age = max_age
+        self.bind(device, clone, sync)
+
+    def bind(self, device, clone=None, sync=False):
+        """Links the register with its device (and, for clones, the main
+        register) and initializes the state of the register. It is called
+        by the constructor and by :py:meth:`RegisterDescriptor.create` for
+        the registers that share their description.
+
+        Subclasses that keep additional state should override it.
+        """
+        # device
+        check_not_empty(device, 'device', 'register', self.name, logger)
+        check_type(device, BaseDevice, 'register', self.name, logger)
+        self.__device = device
+        # clone
+        if clone:
+            check_type(clone, BaseRegister, 'register', self.name, logger)
+        self.__clone = clone
+        # sync
+        check_options(sync, [True, False], 'register', self.name, logger)
+        self.__sync = sync
         self.__int_value = self.default
+        self.__dirty = False
+        # the sync that owns the register (see claim())
+        self.__owner = None
+        # storage in the device's register file (see attach())
+        self.__image = None
+        self.__struct = None
+        # the read cache (see value)
+        self.__read_time = None
+        self.__hits = 0
+        self.__misses = 0
+
+    def descriptor(self):
+        """Returns a :py:class:`RegisterDescriptor` that creates registers
+        sharing the description of this one."""
+        return RegisterDescriptor(self)
+
+    def attach(self, image):
+        """Moves the storage of the internal value in a register file (the
+        image of the device's control table), at the register's address.
+        The current internal value is copied in the image.
+
+        Clones, registers with sizes other than 1, 2 or 4 and registers
+        that can hold values that cannot be represented as unsigned
+        integers of their size keep their own storage.
+
+        Parameters
+        ----------
+        image: bytearray
+            The register file of the device.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the register uses the register file.
+        """
+        if self.clone or self.size not in STRUCT_CODES or self.minim < 0 \
+                or self.maxim >= pow(2, self.size * 8) \
+                or self.address + self.size > len(image):
+            return False
+        self.__struct = struct.Struct(STRUCT_ORDERS[self.order] +
+                                      STRUCT_CODES[self.size])
+        self.__struct.pack_into(image, self.address, int(self.__int_value))
+        self.__image = image
+        return True
+
+    @property
+    def image(self):
+        """The register file where the internal value is stored or ``None``
+        if the register keeps its own storage (see :py:meth:`attach`). For
+        clones it is the one of the main register."""
+        if self.clone:
+            return self.clone.image
+        return self.__image
+
+    def __store(self, value):
+        """Stores the internal value and returns ``True`` if it changed."""
+        if self.__image is None:
+            if value == self.__int_value:
+                return False
+            self.__int_value = value
+            return True
+        value = int(value)
+        if value == self.__struct.unpack_from(self.__image,
+                                              self.__address)[0]:
+            return False
+        try:
+            self.__struct.pack_into(self.__image, self.__address, value)
+        except struct.error:
+            logger.error(f'value {value} cannot be stored in register '
+                         f'{self.name} of device {self.device.name}')
+            return False
+        return True
 
     @property
     def name(self):
@@ -217,14 +328,73 @@ class BaseRegister():
 
     @sync.setter
     def sync(self, value):
-        """Sets the register as being synced by a loop. Only subclasses
-        of :py:class:`BaseSync` are allowed to do this change."""
-        caller = inspect.stack()[1].frame.f_locals['self']
-        if isinstance(caller, BaseSync):
-            self.__sync = (value is True)
-        else:
-            logger.error('only BaseSync subclasses can chance the sync '
-                         'flag of a register')
+        """The ``sync`` flag cannot be changed directly; the syncs use
+        :py:meth:`claim` and :py:meth:`release`."""
+        logger.error(f'the sync flag of register {self.name} of device '
+                     f'{self.device.name} can only be changed by a sync '
+                     'with claim() and release()')
+
+    @property
+    def owner(self):
+        """The sync that claimed the register or ``None``."""
+        return self.__owner
+
+    def claim(self, sync):
+        """Marks the register as being synced by a loop. The sync object
+        acts as the token of the ownership: only one sync can own a
+        register and its clones (that share the same data) at a time and
+        any attempt of another sync to claim one of them is reported.
+
+        Parameters
+        ----------
+        sync: BaseSync or subclass
+            The sync that claims the register.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the register is now owned by ``sync``, ``False`` if
+            it is owned by another sync.
+        """
+        if not isinstance(sync, BaseSync):
+            logger.error(f'only BaseSync subclasses can claim register '
+                         f'{self.name} of device {self.device.name}')
+            return False
+        for owner in self.__family_owners():
+            if owner is not sync:
+                logger.error(f'sync {sync.name} cannot claim register '
+                             f'{self.name} of device {self.device.name}; '
+                             f'it is already synced by {owner.name}')
+                return False
+        self.__owner = sync
+        self.__sync = True
+        return True
+
+    def __family_owners(self):
+        """Returns the owners of the main register and of its clones."""
+        main = self.clone or self
+        registers = self.device.registers
+        if isinstance(registers, LazyRegisters):
+            # the registers not created yet cannot be owned
+            registers = registers.created
+        family = [main] + [reg for reg in registers.values()
+                           if reg.clone is main]
+        return [reg.owner for reg in family if reg.owner is not None]
+
+    def release(self, sync):
+        """Releases the ownership of the register if it is owned by
+        ``sync``; the register is not synced anymore.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the register was released.
+        """
+        if self.__owner is not sync:
+            return False
+        self.__owner = None
+        self.__sync = False
+        return True
 
     @property
     def word(self):
@@ -251,22 +421,47 @@ class BaseRegister():
         main register."""
         if self.clone:
             return self.clone.int_value
+        if self.__image is not None:
+            return self.__struct.unpack_from(self.__image, self.__address)[0]
         return self.__int_value
 
     @int_value.setter
     def int_value(self, value):
-        """If clone, store the value in the main register."""
+        """If clone, store the value in the main register. If the value is
+        different from the one already stored the register is marked as
+        ``dirty``."""
         # caller = inspect.stack()[1].frame.f_locals['self']
         # if isinstance(caller, (BaseSync, BaseRegister)):
         # fixes bug #64
         if not self.clone:
-            self.__int_value = value
+            if self.__store(value):
+                self.__dirty = True
         else:
             self.clone.int_value = value
         # else:
         #     logger.error('only BaseSync subclasses can change the '
         #                  'internal value')
 
+    @property
+    def dirty(self):
+        """Indicates that the internal value has changed since it was last
+        transmitted to the device. Write syncs use this flag to skip the
+        registers (or whole devices) that have not changed and clear it
+        after the data was sent successfully. If the register is a clone it
+        reflects the flag of the main register."""
+        if self.clone:
+            return self.clone.dirty
+        return self.__dirty
+
+    @dirty.setter
+    def dirty(self, value):
+        """Sets or clears the ``dirty`` flag. If clone, the flag of the main
+        register is updated."""
+        if not self.clone:
+            self.__dirty = (value is True)
+        else:
+            self.clone.dirty = value
+
     def value_to_external(self, value):
         """Converts the presented value to external format according to
         register's settings. This method should be overridden by subclasses
@@ -309,12 +504,42 @@ class BaseRegister():
         """
         return value
 
+    @property
+    def max_age(self):
+        """The time in seconds a value read from the device is reused. It is
+        the ``max_age`` of the register, if provided, otherwise the one of
+        the device (see :py:meth:`BaseDevice.max_age`) and finally
+        :py:attr:`default_max_age`."""
+        if self.__max_age is not None:
+            return self.__max_age
+        max_age = self.device.max_age
+        if max_age is not None:
+            return max_age
+        return BaseRegister.default_max_age
+
+    @property
+    def cache_hits(self):
+        """The number of times :py:meth:`value` used the value already
+        available instead of reading the device."""
+        return self.__hits
+
+    @property
+    def cache_misses(self):
+        """The number of times :py:meth:`value` had to read the device."""
+        return self.__misses
+
+    def invalidate(self):
+        """Discards the value cached for :py:meth:`value` so that the next
+        access reads the device."""
+        self.__read_time = None
+
     @property
     def value(self):
         """Provides the value of the register in external format. If the
         register is not marked for ``sync`` then it requests the device
         to perform a ``read`` in order to refresh the content of the
-        register.
+        register, unless the last read was performed less than
+        :py:meth:`max_age` seconds ago.
 
         Returns
         -------
@@ -325,7 +550,13 @@ class BaseRegister():
             value (hence the ``any`` return type).
         """
         if not self.sync and not self.clone:
-            self.read()
+            read_time = self.__read_time
+            if read_time is not None and self.max_age and \
+                    time.perf_counter() - read_time <= self.max_age:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+                self.read()
         return self.value_to_external(self.int_value)
 
     @value.setter
@@ -360,6 +591,7 @@ class BaseRegister():
         to the device. Calls the device's method to write the value of
         register.
         """
+        self.__read_time = None
         self.device.write_register(self, self.int_value)
 
     def read(self):
@@ -373,7 +605,34 @@ class BaseRegister():
         # a value of None indicates that there was an issue with readind
         # the data from the device
         if value is not None:       # pragma: no branch
-            self.__int_value = value
+            self.refresh(value)
+
+    def refresh(self, value):
+        """Stores an internal value received from the device. Unlike
+        setting :py:meth:`int_value` the register is not marked ``dirty``,
+        since it now mirrors the device. Read syncs use this to update the
+        registers. If clone, the main register is updated.
+        """
+        if self.clone:
+            self.clone.refresh(value)
+            return
+        self.__store(value)
+        self.__dirty = False
+        self.__read_time = time.perf_counter()
+
+    def mark_read(self):
+        """Records that the value of the register was just received from
+        the device, for registers whose storage was already updated
+        directly (for instance in the register file by
+        :py:meth:`RegisterBlock.unpack`): the ``dirty`` flag is cleared and
+        the read time is set, as :py:meth:`refresh` does. If clone, the
+        main register is updated.
+        """
+        if self.clone:
+            self.clone.mark_read()
+            return
+        self.__dirty = False
+        self.__read_time = time.perf_counter()
 
     def __str__(self):
         """Representation of the register [name]: value."""
@@ -577,13 +836,20 @@ class RegisterWithDynamicConversion(RegisterWithConversion):
         KeyError: if any of the mandatory fields are not provided
         ValueError: if value provided are wrong or the wrong type
     """
+    __slots__ = ('__factor_reg',)
+
     def __init__(self, factor_reg=None, **kwargs):
         super().__init__(**kwargs)
         check_type(factor_reg, str, 'register', self.name, logger)
+        self.__factor_reg_name = factor_reg
+
+    def bind(self, device, clone=None, sync=False):
+        """Extends the inherited method to reset the reference to the
+        register providing the additional factor."""
+        super().bind(device, clone, sync)
         # the registers may not be in order and the referenced register
         # might have not been setup yet; so we need to delay the access to
         # it for when all registers in the device are setup
-        self.__factor_reg_name = factor_reg
         self.__factor_reg = None
 
     @property
@@ -780,3 +1046,81 @@ class RegisterWithMapping(BaseRegister):
             masked_int_value = self.int_value & (~int(self.mask))
             int_val = int_val | masked_int_value
         return int_val
+
+
+class RegisterDescriptor():
+    """The description of a register in a device model, shared by the
+    registers of all the devices with that model.
+
+    The descriptor is produced from a register created normally, with all
+    the parameters validated by the constructor. The attributes that
+    describe the register (name, address, size, limits, conversion
+    parameters, etc.) are copied in a subclass of the register's class
+    and the registers created with :py:meth:`create` are instances of it;
+    only the link to the device and the state of the register (value,
+    flags) are kept for each of them. This way the parameters of a model
+    are validated and stored only once regardless of the number of
+    devices, while an attribute set later on a register (in its own
+    ``__dict__``) does not change the other registers.
+
+    Parameters
+    ----------
+    register: BaseRegister or subclass
+        The register used as a template.
+    """
+    def __init__(self, register):
+        check_type(register, BaseRegister, 'descriptor', register.name,
+                   logger)
+        reg_class = type(register)
+        description = dict(register.__dict__)
+        if description or '_register_class' not in reg_class.__dict__:
+            # the class the shared description was produced from
+            base_class = getattr(reg_class, '_register_class', reg_class)
+            description.update(_register_class=base_class, __slots__=(),
+                               __module__=reg_class.__module__,
+                               __qualname__=reg_class.__qualname__,
+                               __doc__=reg_class.__doc__)
+            reg_class = type(reg_class.__name__, (reg_class,), description)
+        self.__class = reg_class
+
+    @property
+    def name(self):
+        """The name of the register."""
+        return self.__class._BaseRegister__name
+
+    @property
+    def register_class(self):
+        """The class of the registers created; it is a subclass of the
+        class of the template that holds the description."""
+        return self.__class
+
+    @staticmethod
+    def base_class(register):
+        """Returns the class a register was defined with (for instance
+        ``RegisterWithConversion``), ignoring the subclass that holds the
+        shared description."""
+        reg_class = type(register)
+        return getattr(reg_class, '_register_class', reg_class)
+
+    def create(self, device, clone=None, sync=False):
+        """Creates a register for a device using the description.
+
+        Parameters
+        ----------
+        device: BaseDevice or subclass
+            The device the register belongs to.
+
+        clone: BaseRegister or subclass or ``None``
+            The main register if the register is a clone.
+
+        sync: bool
+            The initial ``sync`` flag of the register.
+
+        Returns
+        -------
+        BaseRegister or subclass:
+            The new register.
+        """
+        register = self.__class.__new__(self.__class)
+        register.bind(device, clone, sync)
+        return register
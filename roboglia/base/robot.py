@@ -18,6 +18,7 @@ import logging
 import threading
 import statistics
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from ..utils import get_registered_class, check_key, check_type, check_options
 from .thread import BaseLoop
@@ -404,7 +405,7 @@ class BaseRobot():
         """The RobotManager of the robot."""
         return self.__manager
 
-    def start(self):
+    def start(self, syncs=True):
         """Starts the robot operation. It will:
 
         * call the :py:meth:`~BaseBus.open` method on all buses except the ones
@@ -414,22 +415,26 @@ class BaseRobot():
         * call the :py:meth:`~BaseSync.start` method on all syncs except the
           ones that have ``auto`` set to ``False``
 
+        Each step is performed concurrently for the different buses (see
+        :py:meth:`for_each_bus`).
+
+        Parameters
+        ----------
+        syncs: bool
+            If ``False`` the syncs are not started; this is used when they
+            are driven by other means (ex. :py:class:`AsyncRobot`).
+            Default ``True``.
         """
         logger.info('***** Starting robot *****************')
         # buses
         logger.info('Opening buses...')
-        for bus in self.buses.values():
-            if bus.auto_open:
-                logger.info(f'Opening bus: "{bus.name}"')
-                bus.open()
-            else:
-                logger.info(f'Opening bus: "{bus.name}" - skipped')
+        self.for_each_bus(self.__open_bus,
+                          [(bus, bus) for bus in self.buses.values()])
         # devices
         logger.info('Opening devices...')
-        for device in self.devices.values():
-            logger.info(f'Opening device: "{device.name}"')
-            # TODO: should there be an Auto attribute for devices?
-            device.open()
+        self.for_each_bus(self.__open_device,
+                          [(device.bus, device)
+                           for device in self.devices.values()])
         # joint manager; this will also start the joints
         logger.info('Starting joint manager...')
         self.manager.start()
@@ -437,41 +442,131 @@ class BaseRobot():
         # we start syncs latest to make sure that the joint manager
         # has properly initialized the joints before starting to replicate
         # the internal devices
-        logger.info('Starting syncs...')
-        for sync in self.syncs.values():
-            if sync.auto_start:
-                logger.info(f'Starting sync: "{sync.name}"')
-                sync.start()
-            else:
-                logger.info(f'Starting sync: "{sync.name}" - skipped')
+        if syncs:
+            logger.info('Starting syncs...')
+            self.for_each_bus(self.__start_sync,
+                              [(sync.bus, sync)
+                               for sync in self.syncs.values()])
         # finished
         logger.info('***** Robot started ******************')
 
-    def stop(self):
+    def stop(self, syncs=True):
         """Stops the robot operation. It will:
 
         * call the :py:meth:`~BaseSync.stop` method on all syncs
         * call the :py:meth:`~BaseDevice.close` method on all devices
         * call the :py:meth:`~BaseBus.close` method on all buses
 
+        Each step is performed concurrently for the different buses (see
+        :py:meth:`for_each_bus`).
+
+        Parameters
+        ----------
+        syncs: bool
+            If ``False`` the syncs are not stopped (see :py:meth:`start`).
+            Default ``True``.
         """
         logger.info('***** Stopping robot *****************')
         logger.info('Stopping joint manager...')
         self.manager.stop()
-        logger.info('Stopping syncs...')
-        for sync in self.syncs.values():
-            logger.info(f'Stopping sync: "{sync.name}"')
-            sync.stop()
+        if syncs:
+            logger.info('Stopping syncs...')
+            self.for_each_bus(self.__stop_sync,
+                              [(sync.bus, sync)
+                               for sync in self.syncs.values()])
         logger.info('Closing devices...')
-        for device in self.devices.values():
-            logger.info(f'Closing device: "{device.name}"')
-            device.close()
+        self.for_each_bus(self.__close_device,
+                          [(device.bus, device)
+                           for device in self.devices.values()])
         logger.info('Closing buses...')
-        for bus in self.buses.values():
-            logger.info(f'Closing bus: "{bus.name}"')
-            bus.close()
+        self.for_each_bus(self.__close_bus,
+                          [(bus, bus) for bus in self.buses.values()])
         logger.info('***** Robot stopped ******************')
 
+    def for_each_bus(self, function, items):
+        """Calls ``function`` for each item, grouping the items by bus. The
+        items of one bus are processed in order, while the groups of
+        different buses are processed concurrently: on the I/O worker of
+        the bus if it has one (see :py:class:`SharedBus`) or on a temporary
+        thread otherwise. A single group is processed in the caller's
+        thread.
+
+        Parameters
+        ----------
+        function: callable
+            The function to call with each item.
+
+        items: list of tuples
+            Tuples (bus, item) with the bus used by the item.
+
+        Raises
+        ------
+        Exception:
+            The first exception raised by ``function``, after all the
+            groups have finished.
+        """
+        groups = {}
+        for bus, item in items:
+            groups.setdefault(bus, []).append(item)
+
+        def process(group):
+            for item in group:
+                function(item)
+
+        if len(groups) < 2:
+            for group in groups.values():
+                process(group)
+            return
+        futures = []
+        others = [group for bus, group in groups.items()
+                  if not getattr(bus, 'worker', False)]
+        for bus, group in groups.items():
+            if getattr(bus, 'worker', False):
+                futures.append(bus.submit(process, group))
+        if others:
+            with ThreadPoolExecutor(max_workers=len(others)) as executor:
+                futures.extend([executor.submit(process, group)
+                                for group in others])
+        for future in futures:
+            future.result()
+
+    @staticmethod
+    def __open_bus(bus):
+        if bus.auto_open:
+            logger.info(f'Opening bus: "{bus.name}"')
+            bus.open()
+        else:
+            logger.info(f'Opening bus: "{bus.name}" - skipped')
+
+    @staticmethod
+    def __open_device(device):
+        logger.info(f'Opening device: "{device.name}"')
+        # TODO: should there be an Auto attribute for devices?
+        device.open()
+
+    @staticmethod
+    def __start_sync(sync):
+        if sync.auto_start:
+            logger.info(f'Starting sync: "{sync.name}"')
+            sync.start()
+        else:
+            logger.info(f'Starting sync: "{sync.name}" - skipped')
+
+    @staticmethod
+    def __stop_sync(sync):
+        logger.info(f'Stopping sync: "{sync.name}"')
+        sync.stop()
+
+    @staticmethod
+    def __close_device(device):
+        logger.info(f'Closing device: "{device.name}"')
+        device.close()
+
+    @staticmethod
+    def __close_bus(bus):
+        logger.info(f'Closing bus: "{bus.name}"')
+        bus.close()
+
 
 class JointManager(BaseLoop):
     """Implements the management of the joints by alowing multiple movement
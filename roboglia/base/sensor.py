@@ -73,13 +73,13 @@ class Sensor():
         check_type(device, BaseDevice, 'sensor', self.name, logger)
         self.__device = device
         check_not_empty(value_read, 'value_read', 'sensor', self.name, logger)
-        check_key(value_read, device.__dict__, 'sensor', self.name, logger,
+        check_key(value_read, device.registers, 'sensor', self.name, logger,
                   f'device {device.name} does not have a register '
                   f'{value_read}')
         self.__value_r = getattr(device, value_read)
         if activate:
-            check_key(activate, device.__dict__, 'sensor', self.__name, logger,
-                      f'device {device.name} does not have a register '
+            check_key(activate, device.registers, 'sensor', self.__name,
+                      logger, f'device {device.name} does not have a register '
                       f'{activate}')
             self.__activate = getattr(device, activate)
         else:
@@ -259,7 +259,7 @@ class SensorXYZ():
         self.__device = device
         # X - value
         check_not_empty(x_read, 'x_read', 'sensor', self.name, logger)
-        check_key(x_read, device.__dict__, 'sensor', self.name, logger,
+        check_key(x_read, device.registers, 'sensor', self.name, logger,
                   f'device {device.name} does not have a register '
                   f'{x_read}')
         self.__x_read = getattr(device, x_read)
@@ -269,7 +269,7 @@ class SensorXYZ():
         self.__x_offset = x_offset
         # Y - value
         check_not_empty(y_read, 'y_read', 'sensor', self.name, logger)
-        check_key(y_read, device.__dict__, 'sensor', self.name, logger,
+        check_key(y_read, device.registers, 'sensor', self.name, logger,
                   f'device {device.name} does not have a register '
                   f'{y_read}')
         self.__y_read = getattr(device, y_read)
@@ -279,7 +279,7 @@ class SensorXYZ():
         self.__y_offset = y_offset
         # Z - value
         check_not_empty(z_read, 'z_read', 'sensor', self.name, logger)
-        check_key(z_read, device.__dict__, 'sensor', self.name, logger,
+        check_key(z_read, device.registers, 'sensor', self.name, logger,
                   f'device {device.name} does not have a register '
                   f'{z_read}')
         self.__z_read = getattr(device, z_read)
@@ -289,8 +289,8 @@ class SensorXYZ():
         self.__z_offset = z_offset
         # activate
         if activate:
-            check_key(activate, device.__dict__, 'sensor', self.__name, logger,
-                      f'device {device.name} does not have a register '
+            check_key(activate, device.registers, 'sensor', self.__name,
+                      logger, f'device {device.name} does not have a register '
                       f'{activate}')
             self.__activate = getattr(device, activate)
         else:
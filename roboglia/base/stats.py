@@ -0,0 +1,241 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import bisect
+import threading
+import time
+from collections import deque
+
+DURATION_BINS = [0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005,
+                 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0]
+"""The upper limits in seconds of the bins used for the histogram of the
+execution durations. An additional bin counts the longer executions."""
+
+
+class LoopStats():
+    """Execution statistics of a loop.
+
+    Every :py:class:`BaseLoop` (and therefore every sync and the
+    ``JointManager``) keeps an instance of this class that is updated by
+    the loop's thread after each execution. The statistics can be read from
+    any other thread; the individual properties are cheap to access and
+    :py:meth:`snapshot` produces a consistent copy of all of them.
+
+    The statistics cover the time since the last :py:meth:`reset`, which
+    is performed automatically every time the loop is started. The segment
+    plan of a sync (see :py:meth:`record_plan`) is kept by the reset.
+
+    Parameters
+    ----------
+    samples: int
+        The number of recent executions used for the jitter percentiles.
+    """
+    def __init__(self, samples=1000):
+        self.__lock = threading.Lock()
+        self.__lateness = deque(maxlen=samples)
+        self.__plan = None
+        self.reset()
+
+    def reset(self):
+        """Clears all the statistics."""
+        with self.__lock:
+            self.__since = time.perf_counter()
+            self.__executions = 0
+            self.__histogram = [0] * (len(DURATION_BINS) + 1)
+            self.__total_duration = 0.0
+            self.__max_duration = 0.0
+            self.__overruns = 0
+            self.__skipped = 0
+            self.__lateness.clear()
+            self.__bus_waits = 0
+            self.__bus_wait = 0.0
+            self.__max_bus_wait = 0.0
+            self.__packets = 0
+            self.__bytes = 0
+
+    def record_execution(self, duration, lateness):
+        """Records one execution of the loop.
+
+        Parameters
+        ----------
+        duration: float
+            The time in seconds taken by the execution.
+
+        lateness: float
+            The time in seconds between the deadline of the execution and
+            its actual start.
+        """
+        with self.__lock:
+            self.__executions += 1
+            self.__histogram[bisect.bisect_left(DURATION_BINS,
+                                                duration)] += 1
+            self.__total_duration += duration
+            if duration > self.__max_duration:
+                self.__max_duration = duration
+            self.__lateness.append(lateness)
+
+    def record_overrun(self, skipped=0):
+        """Records an execution that ended after the start of the next
+        period and the number of executions that were dropped because of
+        it."""
+        with self.__lock:
+            self.__overruns += 1
+            self.__skipped += skipped
+
+    def record_bus_wait(self, wait):
+        """Records the time in seconds spent waiting to acquire the bus."""
+        with self.__lock:
+            self.__bus_waits += 1
+            self.__bus_wait += wait
+            if wait > self.__max_bus_wait:
+                self.__max_bus_wait = wait
+
+    def record_traffic(self, packets=0, data=0):
+        """Records the packets sent and the bytes of register data
+        transferred."""
+        with self.__lock:
+            self.__packets += packets
+            self.__bytes += data
+
+    def record_plan(self, segments):
+        """Records the segments ``(start, length)`` chosen by a sync for
+        its transfers (see :py:meth:`BaseSync.plan_segments`)."""
+        with self.__lock:
+            self.__plan = list(segments)
+
+    @property
+    def plan(self):
+        """The segments used by the sync or ``None`` if it does not use a
+        segment plan."""
+        return self.__plan
+
+    @property
+    def elapsed(self):
+        """The time in seconds since the statistics were reset."""
+        return time.perf_counter() - self.__since
+
+    @property
+    def executions(self):
+        """The number of executions."""
+        return self.__executions
+
+    @property
+    def frequency(self):
+        """The achieved frequency in [Hz]."""
+        return self.__executions / max(self.elapsed, 1e-9)
+
+    @property
+    def histogram(self):
+        """The histogram of the execution durations as a list of tuples
+        ``(limit, count)``, where ``limit`` is the upper limit of the bin in
+        seconds (``None`` for the last bin)."""
+        return list(zip(DURATION_BINS + [None], self.__histogram))
+
+    @property
+    def mean_duration(self):
+        """The average duration of an execution in seconds."""
+        return self.__total_duration / max(self.__executions, 1)
+
+    @property
+    def max_duration(self):
+        """The longest duration of an execution in seconds."""
+        return self.__max_duration
+
+    @property
+    def overruns(self):
+        """The number of executions that ended after the start of the next
+        period."""
+        return self.__overruns
+
+    @property
+    def skipped(self):
+        """The number of executions dropped by the ``skip`` policy."""
+        return self.__skipped
+
+    def jitter(self, percentiles=[50, 90, 99]):
+        """Calculates the percentiles of the lateness of the recent
+        executions.
+
+        Parameters
+        ----------
+        percentiles: list of numbers
+            The percentiles to calculate, in the range [0..100].
+
+        Returns
+        -------
+        dict:
+            A dictionary ``{percentile: lateness}`` with the lateness in
+            seconds; the dictionary is empty if there are no executions.
+        """
+        with self.__lock:
+            samples = sorted(self.__lateness)
+        if not samples:
+            return {}
+        last = len(samples) - 1
+        return {perc: samples[min(last, round(perc / 100 * last))]
+                for perc in percentiles}
+
+    @property
+    def bus_wait(self):
+        """The average time in seconds spent waiting for the bus."""
+        return self.__bus_wait / max(self.__bus_waits, 1)
+
+    @property
+    def max_bus_wait(self):
+        """The longest time in seconds spent waiting for the bus."""
+        return self.__max_bus_wait
+
+    @property
+    def packets_per_second(self):
+        """The rate of the packets sent on the bus."""
+        return self.__packets / max(self.elapsed, 1e-9)
+
+    @property
+    def bytes_per_second(self):
+        """The rate of register data (without the protocol overhead)
+        transferred on the bus."""
+        return self.__bytes / max(self.elapsed, 1e-9)
+
+    def snapshot(self):
+        """Produces a consistent copy of the statistics.
+
+        Returns
+        -------
+        dict:
+            A dictionary with the statistics, using the names of the
+            properties of the class as keys and ``jitter`` for the
+            default percentiles.
+        """
+        with self.__lock:
+            elapsed = max(self.elapsed, 1e-9)
+            result = {
+                'elapsed': elapsed,
+                'executions': self.__executions,
+                'frequency': self.__executions / elapsed,
+                'histogram': list(zip(DURATION_BINS + [None],
+                                      self.__histogram)),
+                'mean_duration': self.__total_duration /
+                max(self.__executions, 1),
+                'max_duration': self.__max_duration,
+                'overruns': self.__overruns,
+                'skipped': self.__skipped,
+                'bus_wait': self.__bus_wait / max(self.__bus_waits, 1),
+                'max_bus_wait': self.__max_bus_wait,
+                'packets_per_second': self.__packets / elapsed,
+                'bytes_per_second': self.__bytes / elapsed,
+                'plan': self.__plan
+            }
+        result['jitter'] = self.jitter()
+        return result
@@ -14,13 +14,87 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .thread import BaseLoop
 from .bus import SharedBus
+from .block import RegisterBlock
+from .device import LazyRegisters
 from ..utils import check_key, check_type, check_options, check_not_empty
+from ..utils import get_registered_class
 
 logger = logging.getLogger(__name__)
 
 
+class SyncSnapshot():
+    """An immutable copy of the values of the registers of a read sync,
+    taken at the end of one execution.
+
+    Read syncs publish a new snapshot at the end of every execution by
+    replacing the reference kept in :py:meth:`BaseSync.snapshot`. Since
+    the snapshot is never changed after it is created and the replacement
+    of the reference is atomic, any thread can get the latest snapshot
+    without a lock and will see the values of all the registers from the
+    same execution, while the registers themselves might already be
+    updated by the next one.
+
+    Parameters
+    ----------
+    epoch: int
+        The sequence number of the snapshot; it is increased with every
+        execution of the sync.
+
+    timestamp: float
+        The time (as produced by ``time.time()``) when the snapshot was
+        taken.
+
+    index: dict
+        A dictionary ``{register: position}`` with the position of each
+        register in ``values``.
+
+    values: tuple
+        The internal values of the registers.
+    """
+    def __init__(self, epoch, timestamp, index, values):
+        self.__epoch = epoch
+        self.__timestamp = timestamp
+        self.__index = index
+        self.__values = values
+
+    @property
+    def epoch(self):
+        """The sequence number of the snapshot."""
+        return self.__epoch
+
+    @property
+    def timestamp(self):
+        """The time when the snapshot was taken."""
+        return self.__timestamp
+
+    @property
+    def registers(self):
+        """The registers included in the snapshot."""
+        return list(self.__index.keys())
+
+    def __contains__(self, register):
+        return register in self.__index
+
+    def __getitem__(self, register):
+        """Returns the internal value of the register at the moment the
+        snapshot was taken."""
+        return self.__values[self.__index[register]]
+
+    def value(self, register):
+        """Returns the external value of the register (converted with the
+        register's ``value_to_external``) at the moment the snapshot was
+        taken."""
+        return register.value_to_external(self[register])
+
+    def __repr__(self):
+        return f'<SyncSnapshot epoch={self.__epoch} ' + \
+               f'registers={len(self.__values)}>'
+
+
 class BaseSync(BaseLoop):
     """Base processing for a sync loop.
 
@@ -58,13 +132,20 @@ class BaseSync(BaseLoop):
         calculated over a period of time specified by the parameter `review`.
 
     throttle: float
-        Is a float (< 1.0) that is used by the monitoring of
-        execution statistics to adjust the wait time in order to produce
-        the desired processing frequency.
+        Kept for compatibility; not used (see :py:class:`BaseLoop`).
 
     review: float
         The time in [s] to calculate the statistics for the frequency.
 
+    spin: float
+        The time in [s] before each deadline when the loop busy-waits
+        instead of sleeping (see :py:class:`BaseLoop`). Default 0.0.
+
+    overrun: str
+        The policy for executions that take longer than the period:
+        ``skip``, ``catchup`` or ``slip`` (see :py:class:`BaseLoop`).
+        Default ``skip``.
+
     group: set
         The set with the devices used by sync; normally the robot
         constructor replaces the name of the group from YAML file with the
@@ -77,20 +158,30 @@ class BaseSync(BaseLoop):
         If the sync loop should start automatically when the robot
         starts; defaults to ``True``
 
+    priority: int
+        The priority of the sync when requesting the bus; it is used only
+        if the bus was created with a scheduler (see
+        :py:class:`~roboglia.base.BusScheduler`), in which case the syncs
+        with higher priority will be served first. The deadline for each
+        request is the end of the current period. Default 0.
+
     Raises
     ------
         KeyError: if mandatory parameters are not found
     """
 
     def __init__(self, name='BASESYNC', patience=1.0, frequency=None,
-                 warning=0.90, throttle=0.1, review=1.0,
-                 group=None, registers=[], auto=True):
+                 warning=0.90, throttle=0.1, review=1.0, spin=0.0,
+                 overrun='skip', group=None, registers=[], auto=True,
+                 priority=0):
         super().__init__(name=name,
                          patience=patience,
                          frequency=frequency,
                          warning=warning,
                          throttle=throttle,
-                         review=review)
+                         review=review,
+                         spin=spin,
+                         overrun=overrun)
         check_not_empty(group, 'group', 'sync', self.name, logger)
         check_type(group, set, 'sync', self.name, logger)
         self.__devices = list(group)
@@ -101,8 +192,16 @@ class BaseSync(BaseLoop):
         self.__reg_names = registers
         check_options(auto, [True, False], 'sync', self.name, logger)
         self.__auto_start = auto
+        check_type(priority, int, 'sync', self.name, logger)
+        self.__priority = priority
         self.__all_registers = []
+        self.__device_registers = []
+        self.__plan = None
         self.process_registers()
+        self.__snapshot_index = {reg: pos for pos, reg
+                                 in enumerate(self.__all_registers)}
+        self.__snapshot = None
+        self.__epoch = 0
 
     @property
     def auto_start(self):
@@ -116,6 +215,55 @@ class BaseSync(BaseLoop):
         """The bus this sync works with."""
         return self.__bus
 
+    @property
+    def buses(self):
+        """The list of buses used by the sync; for ``BaseSync`` only
+        :py:meth:`bus`."""
+        return [self.__bus]
+
+    @property
+    def priority(self):
+        """The priority of the sync when requesting the bus."""
+        return self.__priority
+
+    def acquire_bus(self):
+        """Requests the exclusive use of the bus with the priority of the
+        sync and a deadline at the end of the current period. Subclasses
+        should use this instead of calling directly the bus' ``can_use``.
+        The time spent waiting is recorded in the :py:meth:`stats`.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the bus was acquired. The caller must release it
+            with ``stop_using`` as soon as possible.
+        """
+        start_time = time.perf_counter()
+        acquired = self.__bus.can_use(priority=self.__priority,
+                                      deadline=start_time + self.period)
+        self.stats.record_bus_wait(time.perf_counter() - start_time)
+        return acquired
+
+    @property
+    def snapshot(self):
+        """The latest :py:class:`SyncSnapshot` published by the sync or
+        ``None`` if the sync did not publish any. It can be used from any
+        thread without a lock to obtain consistent values of all the
+        registers of the sync."""
+        return self.__snapshot
+
+    def publish_snapshot(self):
+        """Takes a :py:class:`SyncSnapshot` of the registers of the sync and
+        makes it available in :py:meth:`snapshot`. Read syncs call this at
+        the end of each execution that refreshed all their registers, from
+        the sync's thread, which is the only one that updates the
+        registers; a partial read does not publish a snapshot."""
+        self.__epoch += 1
+        values = tuple(reg.int_value for reg in self.__all_registers)
+        # replacing the reference is atomic; readers do not need a lock
+        self.__snapshot = SyncSnapshot(self.__epoch, time.time(),
+                                       self.__snapshot_index, values)
+
     @property
     def devices(self):
         """The devices used by the sync."""
@@ -144,7 +292,8 @@ class BaseSync(BaseLoop):
         buses = set([device.bus for device in self.__devices])
         if len(buses) > 1:
             mess = f'Devices used for sync {self.name} should be ' + \
-                   'connected to a single bus.'
+                   'connected to a single bus; use a GroupSync for ' + \
+                   'groups that span several buses.'
             logger.critical(mess)
             raise ValueError(mess)
         elif len(buses) == 0:
@@ -155,10 +304,25 @@ class BaseSync(BaseLoop):
         one_bus = buses.pop()
         return one_bus
 
+    @property
+    def plan(self):
+        """The segments ``(start, length)`` chosen by the last call to
+        :py:meth:`plan_segments` or ``None`` if the sync does not use a
+        segment plan. The plan is also reported by the statistics of the
+        sync (see :py:meth:`LoopStats.snapshot`)."""
+        return self.__plan
+
+    @property
+    def device_registers(self):
+        """A list of tuples ``(device, registers)`` with the register objects
+        used by the sync for each device, ordered by address."""
+        return self.__device_registers
+
     def process_registers(self):
         """Checks that the supplied registers are available in all
         devices."""
         for device in self.__devices:
+            dev_regs = []
             for reg_name in self.register_names:
                 check_key(reg_name, device.registers, 'sync',
                           self.name, logger,
@@ -170,6 +334,203 @@ class BaseSync(BaseLoop):
                 # to loop over devices and registers and use getattr()
                 # during the atomic() processing
                 self.__all_registers.append(reg_obj)
+                dev_regs.append(reg_obj)
+            dev_regs.sort(key=lambda reg: reg.address)
+            self.__device_registers.append((device, dev_regs))
+
+    def plan_segments(self, packet_cost, byte_cost=1.0, writable=False):
+        """Splits the registers of the sync in the cheapest set of
+        contiguous segments (address ranges), each of them being transferred
+        in a separate packet.
+
+        Every gap between two consecutive registers can either be carried
+        in the packet (costing ``byte_cost`` for each gap byte) or produce
+        an additional segment (costing ``packet_cost``). Because the costs
+        are additive each gap can be decided independently and the cheapest
+        option for each gap produces the optimal plan. The costs are
+        unitless (normally expressed in bytes or seconds on the bus) and
+        are provided by the subclasses based on the protocol used.
+
+        Like :py:meth:`get_register_range` the plan uses the registers of
+        the first device.
+
+        Parameters
+        ----------
+        packet_cost: float
+            The cost of an additional packet (header overhead).
+
+        byte_cost: float
+            The cost of carrying one gap byte. For syncs that carry the same
+            range for several devices this should include the number of
+            devices. Default 1.0.
+
+        writable: bool
+            If ``True`` the gaps can only be carried if, on all devices,
+            they are covered completely by ``RW`` registers that will be
+            written with their current ``int_value`` (see
+            :py:meth:`register_blocks`). These registers must be owned by
+            another (running) sync that keeps them current, otherwise a
+            change made by the device or another client would be reverted
+            by every write. Use this for write syncs. Default ``False``.
+
+        Returns
+        -------
+        list of tuples:
+            A list of ``(start, length)`` for each segment, ordered by
+            address.
+        """
+        device = self.devices[0]
+        registers = sorted([getattr(device, reg_name)
+                            for reg_name in self.register_names],
+                           key=lambda reg: reg.address)
+        segments = []
+        start = end = None
+        for reg in registers:
+            if start is None:
+                start = reg.address
+            elif reg.address > end:
+                gap = reg.address - end
+                bridge = gap * byte_cost <= packet_cost
+                if bridge and writable:
+                    bridge = all(self.__gap_fillers(dev, end, reg.address)
+                                 is not None for dev in self.devices)
+                if not bridge:
+                    segments.append((start, end - start))
+                    start = reg.address
+            end = max(end or 0, reg.address + reg.size)
+        segments.append((start, end - start))
+        self.__plan = segments
+        self.stats.record_plan(segments)
+        logger.info(f'sync {self.name} uses segments: ' +
+                    ', '.join(f'[{seg_start}:{seg_start + seg_len}]'
+                              for seg_start, seg_len in segments))
+        return segments
+
+    def __gap_fillers(self, device, start, end):
+        """Returns the list of ``RW`` registers of the device, kept current
+        by other syncs, that cover completely the range [start, end) or
+        ``None`` if this is not possible."""
+        fillers = []
+        address = start
+        while address < end:
+            reg = device.register_by_address(address)
+            if reg is None or reg.access != 'RW' or \
+                    address + reg.size > end or \
+                    not self.__synced_elsewhere(device, address):
+                return None
+            fillers.append(reg)
+            address += reg.size
+        return fillers
+
+    def __synced_elsewhere(self, device, address):
+        """Returns ``True`` if a register of the device at ``address`` (the
+        register itself or one of its clones) is owned by another sync."""
+        registers = device.registers
+        if isinstance(registers, LazyRegisters):
+            # the registers not created yet cannot be owned
+            registers = registers.created
+        return any(reg.owner is not None and reg.owner is not self
+                   for reg in registers.values() if reg.address == address)
+
+    def register_blocks(self, start=None, length=None, fill=False):
+        """Compiles a :py:class:`RegisterBlock` for each device with the
+        registers used by the sync. Subclasses should call this in their
+        ``setup`` so that the layout of the data is determined only once.
+
+        Parameters
+        ----------
+        start: int or None
+            The start address of the blocks; ``None`` uses the lowest address
+            of the registers of each device. If provided only the registers
+            in the range are included.
+
+        length: int or None
+            The length of the blocks; ``None`` extends the block to the end
+            of the last register of each device.
+
+        fill: bool
+            If ``True`` the gaps between the registers are filled with the
+            ``RW`` registers of the device that cover them, so that a write
+            of the block will send back their current ``int_value``. These
+            registers must be kept current by other syncs. Use this with
+            the segments produced by :py:meth:`plan_segments` for write
+            syncs. Default ``False``.
+
+        Returns
+        -------
+        list of RegisterBlock:
+            One block for each device, in the order of :py:meth:`devices`.
+        """
+        blocks = []
+        for device, registers in self.__device_registers:
+            if start is not None:
+                end = start + length if length is not None else 65536
+                registers = [reg for reg in registers
+                             if reg.address >= start and
+                             reg.address + reg.size <= end]
+            if fill:
+                fillers = []
+                for prev, reg in zip(registers[:-1], registers[1:]):
+                    gap_start = prev.address + prev.size
+                    if reg.address > gap_start:
+                        gap = self.__gap_fillers(device, gap_start,
+                                                 reg.address)
+                        if gap is None:
+                            mess = f'sync {self.name}: cannot fill ' + \
+                                   f'gap [{gap_start}:{reg.address}] ' + \
+                                   f'for device {device.name}'
+                            logger.critical(mess)
+                            raise ValueError(mess)
+                        fillers.extend(gap)
+                registers = registers + fillers
+            blocks.append(RegisterBlock(registers, start, length))
+        return blocks
+
+    def dirty_devices(self, trim=False):
+        """Determines the devices that have at least one ``dirty`` register
+        that needs to be sent by a write sync.
+
+        Parameters
+        ----------
+        trim: bool
+            If ``True`` the list of registers for each device is restricted
+            to those between the first and the last ``dirty`` register
+            (inclusive). This is useful for the syncs that can send a
+            different range of data for each device. Default ``False``.
+
+        Returns
+        -------
+        list of tuples:
+            A list of ``(device, registers)`` (see
+            :py:meth:`device_registers`) only for the devices that have
+            registers changed since the last transmission. If nothing
+            changed the list is empty.
+        """
+        result = []
+        for device, registers in self.__device_registers:
+            flags = [register.dirty for register in registers]
+            if not any(flags):
+                continue
+            if trim:
+                first = flags.index(True)
+                last = len(flags) - flags[::-1].index(True)
+                registers = registers[first:last]
+            result.append((device, registers))
+        return result
+
+    def mark_dirty(self, dev_regs):
+        """Flags again as ``dirty`` the registers of a write sync that
+        failed to be transmitted so that they are retried on the next run.
+
+        Parameters
+        ----------
+        dev_regs: list of tuples
+            A list of ``(device, registers)`` like the one produced by
+            :py:meth:`dirty_devices`.
+        """
+        for _, registers in dev_regs:
+            for register in registers:
+                register.dirty = True
 
     def get_register_range(self):
         """Determines the start address of the range of registers and the
@@ -205,32 +566,43 @@ class BaseSync(BaseLoop):
         length = end_address + last_length - start_address
         return start_address, length, reg_length == length
 
+    def claim_registers(self):
+        """Refreshes the registers of the sync that are not owned by another
+        sync and claims them (see :py:meth:`BaseRegister.claim`). Registers
+        already claimed by other syncs are reported."""
+        for reg in self.all_registers:
+            if reg.owner is None:
+                # refresh the register before claiming it
+                reg.read()
+            if reg.claim(self):
+                logger.debug(f'Register "{reg.name}" of device '
+                             f'"{reg.device.name}" claimed by sync '
+                             f'"{self.name}"')
+
+    def release_registers(self):
+        """Releases the registers claimed by the sync."""
+        for reg in self.all_registers:
+            reg.release(self)
+
     def start(self):
-        """Checks that the bus is open, then refreshes the register, sets the
-        ``sync`` flag before calling the inherited :py:meth:BaseLoop.`start.
+        """Checks that the bus is open, then refreshes and claims the
+        registers (see :py:meth:`claim_registers`) before calling the
+        inherited :py:meth:BaseLoop.`start.
         """
         if not self.bus.is_open:
             logger.error(f'sync {self.name}: attempt to start with a bus '
                          f'not open')
         else:
-            for reg in self.all_registers:
-                if reg.sync:
-                    logger.warning(f'Register "{reg.name}" of device '
-                                   f'"{reg.device.name}" is already marked '
-                                   'for "sync" - it should not happen')
-                else:
-                    # refresh the register before setting it for sync
-                    reg.read()
-                    reg.sync = True
-                    logger.debug(f'Setting register "{reg.name}" of device '
-                                 f'"{reg.device.name}" sync=True')
+            if self.running:
+                # restart: release the registers before claiming them again
+                self.stop()
+            self.claim_registers()
             super().start()
 
     def stop(self):
-        """Before calling the inherited method it un-flags the registers
-        for syncing."""
-        for reg in self.all_registers:
-            reg.sync = False
+        """Before calling the inherited method it releases the registers
+        claimed by the sync."""
+        self.release_registers()
         super().stop()
 
 
@@ -240,6 +612,8 @@ class BaseReadSync(BaseSync):
 
     It wraps the processing between buses' ``can_use()`` and ``stop_using()``
     methods and uses ``naked_read`` instead of the ``read`` method.
+    At the end of each execution it publishes a :py:class:`SyncSnapshot`
+    with the values read.
     """
     def atomic(self):
         """Implements the read of the registers.
@@ -247,18 +621,26 @@ class BaseReadSync(BaseSync):
         This is a naive implementation that will simply loop over all
         devices and registers and ask them to refresh.
         """
-        if self.bus.can_use():
+        if self.acquire_bus():
+            success = True
             for reg in self.all_registers:
                 value = self.bus.naked_read(reg)
                 logger.debug(f'Read {value} for device "{reg.device.name}" '
                              f'register "{reg.name}"')
                 if value is not None:
-                    reg.int_value = value
+                    reg.refresh(value)
                 else:
                     logger.warning(f'Sync "{self.name}": failed to read '
                                    f'register "{reg.name}" '
                                    f'of device "{reg.device.name}"')
+                    success = False
             self.bus.stop_using()
+            self.stats.record_traffic(len(self.all_registers),
+                                      sum(reg.size
+                                          for reg in self.all_registers))
+            # a partial read must not publish the stale values
+            if success:
+                self.publish_snapshot()
         else:
             logger.error(f'Failed to acquire bus "{self.bus.name}"')
 
@@ -269,6 +651,9 @@ class BaseWriteSync(BaseSync):
 
     It wraps the processing between buses' ``can_use()`` and ``stop_using()``
     methods and uses ``naked_write`` instead of the ``write`` method.
+    Only the registers that are ``dirty`` are written; if nothing changed
+    the bus is not used at all. The registers that fail to be written stay
+    ``dirty`` and are sent again at the next execution.
     """
     def atomic(self):
         """Implements the writing of the registers.
@@ -276,11 +661,237 @@ class BaseWriteSync(BaseSync):
         This is a naive implementation that will simply loop over all
         devices and registers and ask them to refresh.
         """
-        if self.bus.can_use():
-            for reg in self.all_registers:
-                self.bus.naked_write(reg, reg.int_value)
+        dirty = [reg for reg in self.all_registers if reg.dirty]
+        if not dirty:
+            return
+        if self.acquire_bus():
+            for reg in dirty:
+                reg.dirty = False
+                if not self.bus.naked_write(reg, reg.int_value):
+                    # send it again next time
+                    reg.dirty = True
+                    continue
                 logger.debug(f'Wrote {reg.int_value} for device '
                              f'"{reg.device.name}" register "{reg.name}"')
             self.bus.stop_using()
+            self.stats.record_traffic(len(dirty),
+                                      sum(reg.size for reg in dirty))
         else:
             logger.error(f'Failed to acquire bus "{self.bus.name}"')
+
+
+class GroupSync(BaseLoop):
+    """A sync for a group of devices connected to several buses.
+
+    The group is split by bus and for each bus a sync of class
+    ``sync_class`` is created with the devices on that bus. These
+    sub-syncs do not run their own threads: at each execution the
+    ``GroupSync`` runs them concurrently, one per bus (on the I/O worker
+    of the bus if it has one, see :py:class:`SharedBus`) and the
+    execution completes only when all the buses have finished. The time
+    of a cycle is therefore the one of the slowest bus instead of the sum
+    of all of them, and the buses stay in phase.
+
+    At the end of each execution, if the sub-syncs are read syncs, the
+    ``GroupSync`` publishes one :py:class:`SyncSnapshot` with the values
+    of all the registers and a single timestamp.
+
+    ``GroupSync`` inherits the parameters from :py:class:`BaseLoop`. In
+    addition it includes the following parameters.
+
+    Parameters
+    ----------
+    sync_class: str
+        The name of the registered sync class used for the sub-syncs
+        (ex. ``BaseReadSync`` or ``DynamixelSyncReadLoop``).
+
+    group: set
+        The set with the devices used by sync; they can be connected to
+        different buses.
+
+    registers: list of str
+        A list of register names (as strings) used by the sync
+
+    auto: bool
+        If the sync loop should start automatically when the robot
+        starts; defaults to ``True``
+
+    priority: int
+        The priority of the sub-syncs when requesting the buses (see
+        :py:class:`BaseSync`). Default 0.
+
+    **kwargs:
+        Other parameters that are passed to the sub-syncs.
+
+    Raises
+    ------
+        KeyError: if ``sync_class`` is not a registered class
+    """
+    def __init__(self, name='GROUPSYNC', patience=1.0, frequency=None,
+                 warning=0.90, throttle=0.1, review=1.0, spin=0.0,
+                 overrun='skip', sync_class=None, group=None, registers=[],
+                 auto=True, priority=0, **kwargs):
+        super().__init__(name=name,
+                         patience=patience,
+                         frequency=frequency,
+                         warning=warning,
+                         throttle=throttle,
+                         review=review,
+                         spin=spin,
+                         overrun=overrun)
+        check_not_empty(sync_class, 'sync_class', 'sync', self.name, logger)
+        SyncClass = get_registered_class(sync_class)
+        check_not_empty(group, 'group', 'sync', self.name, logger)
+        check_type(group, set, 'sync', self.name, logger)
+        check_options(auto, [True, False], 'sync', self.name, logger)
+        self.__auto_start = auto
+        by_bus = {}
+        for device in group:
+            by_bus.setdefault(device.bus, set()).add(device)
+        self.__syncs = []
+        for bus, devices in by_bus.items():
+            self.__syncs.append(SyncClass(name=f'{self.name}.{bus.name}',
+                                          patience=patience,
+                                          frequency=frequency,
+                                          group=devices,
+                                          registers=registers,
+                                          auto=False,
+                                          priority=priority,
+                                          **kwargs))
+        self.__all_registers = [reg for sync in self.__syncs
+                                for reg in sync.all_registers]
+        self.__snapshot_index = {reg: pos for pos, reg
+                                 in enumerate(self.__all_registers)}
+        self.__snapshot = None
+        self.__epoch = 0
+        self.__executor = None
+
+    @property
+    def auto_start(self):
+        """Shows if the sync should be started automatically when the
+        robot starts.
+        """
+        return self.__auto_start
+
+    @property
+    def syncs(self):
+        """The sub-syncs, one for each bus."""
+        return self.__syncs
+
+    @property
+    def bus(self):
+        """``None``; the sync uses several buses (see :py:meth:`buses`)."""
+        return None
+
+    @property
+    def buses(self):
+        """The buses used by the sync."""
+        return [sync.bus for sync in self.__syncs]
+
+    @property
+    def devices(self):
+        """The devices used by the sync."""
+        return [device for sync in self.__syncs for device in sync.devices]
+
+    @property
+    def all_registers(self):
+        return self.__all_registers
+
+    @property
+    def snapshot(self):
+        """The latest :py:class:`SyncSnapshot` with the registers from all
+        the buses or ``None`` if the sync did not publish any."""
+        return self.__snapshot
+
+    def setup(self):
+        """Prepares the sub-syncs and the threads used for the buses that
+        do not have an I/O worker."""
+        for sync in self.__syncs:
+            sync.setup()
+        others = len([sync for sync in self.__syncs[1:]
+                      if not getattr(sync.bus, 'worker', False)])
+        if others:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=others, thread_name_prefix=f'{self.name}-bus')
+
+    def teardown(self):
+        """Releases the threads and cleans up the sub-syncs."""
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+        for sync in self.__syncs:
+            sync.teardown()
+
+    @staticmethod
+    def __epoch_of(sync):
+        """The epoch of the last snapshot of a sub-sync (0 if none)."""
+        snapshot = sync.snapshot
+        return snapshot.epoch if snapshot is not None else 0
+
+    def atomic(self):
+        """Runs the sub-syncs concurrently and waits for all of them, even
+        if one of them fails. The first one is executed in the sync's own
+        thread. The first exception raised by a sub-sync is raised again
+        and the others are logged. A snapshot is published only if all the
+        sub-syncs published a new one in this execution."""
+        epochs = [self.__epoch_of(sync) for sync in self.__syncs]
+        futures = []
+        for sync in self.__syncs[1:]:
+            if getattr(sync.bus, 'worker', False):
+                futures.append(sync.bus.submit(sync.atomic))
+            else:
+                futures.append(self.__executor.submit(sync.atomic))
+        error = None
+        try:
+            self.__syncs[0].atomic()
+        finally:
+            # the next cycle must not overlap with the sub-syncs
+            for sync, future in zip(self.__syncs[1:], futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f'sync {self.name}: sub-sync {sync.name} '
+                                 f'failed: {e}')
+                    if error is None:
+                        error = e
+        if error is not None:
+            raise error
+        if all(self.__epoch_of(sync) > epoch
+               for sync, epoch in zip(self.__syncs, epochs)):
+            self.__epoch += 1
+            values = tuple(reg.int_value for reg in self.__all_registers)
+            self.__snapshot = SyncSnapshot(self.__epoch, time.time(),
+                                           self.__snapshot_index, values)
+
+    def start(self):
+        """Checks that the buses are open, then refreshes and claims the
+        registers of the sub-syncs before calling the inherited
+        :py:meth:BaseLoop.`start.
+        """
+        closed = [bus.name for bus in self.buses if not bus.is_open]
+        if closed:
+            logger.error(f'sync {self.name}: attempt to start with buses '
+                         f'not open: {closed}')
+        else:
+            if self.running:
+                # restart: release the registers before claiming them again
+                self.stop()
+            self.claim_registers()
+            super().start()
+
+    def stop(self):
+        """Before calling the inherited method it releases the registers
+        claimed by the sub-syncs."""
+        self.release_registers()
+        super().stop()
+
+    def claim_registers(self):
+        """Refreshes and claims the registers of all the sub-syncs (see
+        :py:meth:`BaseSync.claim_registers`)."""
+        for sync in self.__syncs:
+            sync.claim_registers()
+
+    def release_registers(self):
+        """Releases the registers claimed by the sub-syncs."""
+        for sync in self.__syncs:
+            sync.release_registers()
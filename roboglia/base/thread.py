@@ -17,7 +17,8 @@ import threading
 import time
 import logging
 
-from ..utils import check_type, check_not_empty
+from .stats import LoopStats
+from ..utils import check_type, check_not_empty, check_options
 
 logger = logging.getLogger(__name__)
 
@@ -211,20 +212,39 @@ class BaseLoop(BaseThread):
         calculated over a period of time specified by the parameter `review`.
 
     throttle: float
-        Is a float (< 1.0) that is used by the monitoring of
-        execution statistics to adjust the wait time in order to produce
-        the desired processing frequency.
+        Kept for compatibility with older robot definitions. The loop
+        schedules the executions on absolute deadlines and does not need
+        to adjust the wait time any more, so the value is not used.
 
     review: float
         The time in [s] to calculate the statistics for the frequency.
 
+    spin: float
+        The time in [s] before a deadline when the loop stops sleeping and
+        busy-waits for the deadline. The operating system's sleep can wake
+        up later than requested (typically tens to hundreds of
+        microseconds) and spinning for the last part of the wait improves
+        the precision at the cost of CPU usage. Default 0.0 (no spinning).
+
+    overrun: str
+        What the loop does when an execution finishes after the start of
+        the next period. ``skip`` (default) drops the missed executions and
+        continues on the original schedule, keeping the phase of the loop;
+        ``catchup`` runs the missed executions back-to-back until the loop
+        is again on schedule; ``slip`` starts the next execution
+        immediately and shifts the schedule from there.
+
     Raises
     ------
         KeyError and ValueError if provided data in the initialization
         dictionary are incorrect or missing.
     """
+    JITTER_SAMPLES = 1000
+    """The number of recent executions used for the jitter statistics."""
+
     def __init__(self, name='BASELOOP', patience=1.0, frequency=None,
-                 warning=0.90, throttle=0.1, review=1.0):
+                 warning=0.90, throttle=0.1, review=1.0, spin=0.0,
+                 overrun='skip'):
         super().__init__(name=name, patience=patience)
         check_not_empty(frequency, 'frequency', 'loop', self.name, logger)
         check_type(frequency, float, 'loop', self.name, logger)
@@ -239,9 +259,13 @@ class BaseLoop(BaseThread):
         check_not_empty(review, 'review', 'loop', self.name, logger)
         check_type(review, float, 'loop', self.name, logger)
         self.__review = review
+        check_type(spin, float, 'loop', self.name, logger)
+        self.__spin = spin
+        check_options(overrun, ['skip', 'catchup', 'slip'], 'loop',
+                      self.name, logger)
+        self.__overrun = overrun
         # to keep statistics
-        self.__exec_counts = 0
-        self.__last_count_reset = None
+        self.__stats = LoopStats(samples=self.JITTER_SAMPLES)
 
     @property
     def frequency(self):
@@ -276,51 +300,100 @@ class BaseLoop(BaseThread):
         elif value <= 110:
             self.__warning = value / 100.0
 
+    @property
+    def spin(self):
+        """The time before a deadline when the loop starts busy-waiting."""
+        return self.__spin
+
+    @property
+    def overrun(self):
+        """The policy applied when an execution takes longer than the
+        period: ``skip``, ``catchup`` or ``slip``."""
+        return self.__overrun
+
+    @property
+    def stats(self):
+        """The execution statistics of the loop (see
+        :py:class:`LoopStats`). They are reset every time the loop is
+        started."""
+        return self.__stats
+
+    @property
+    def overruns(self):
+        """The number of executions that ended after the start of the next
+        period."""
+        return self.__stats.overruns
+
+    @property
+    def skipped(self):
+        """The number of executions dropped by the ``skip`` policy."""
+        return self.__stats.skipped
+
+    def jitter(self, percentiles=[50, 90, 99]):
+        """Calculates the percentiles of the lateness of the recent executions
+        (the difference between the moment an execution started and its
+        deadline). See :py:meth:`LoopStats.jitter`."""
+        return self.__stats.jitter(percentiles)
+
+    def __wait(self, deadline):
+        """Waits until the ``deadline`` (a ``time.perf_counter()`` value)
+        sleeping and, if ``spin`` is used, busy-waiting for the last part."""
+        remaining = deadline - time.perf_counter()
+        if remaining - self.__spin > 0:
+            time.sleep(remaining - self.__spin)
+        if self.__spin > 0:
+            while time.perf_counter() < deadline:
+                pass
+
     def run(self):
+        period = self.__period
+        stats = self.__stats
+        stats.reset()
         exec_counts = 0
-        last_count_reset = time.time()
-        adjust = 0.0            # fine adjust the rate
+        last_count_reset = deadline = time.perf_counter()
         while not self.stopped:
             if self.paused:
-                # paused; reset the statistics
+                # paused; reset the statistics and the schedule
+                exec_counts = 0
+                time.sleep(period)
+                last_count_reset = deadline = time.perf_counter()
+                continue
+            start_time = time.perf_counter()
+            self.atomic()
+            now = time.perf_counter()
+            stats.record_execution(now - start_time, start_time - deadline)
+            # the deadlines are absolute so that the errors do not add up
+            deadline += period
+            if now > deadline:
+                if self.__overrun == 'skip':
+                    missed = int((now - deadline) / period) + 1
+                    stats.record_overrun(missed)
+                    deadline += missed * period
+                else:
+                    stats.record_overrun()
+                    if self.__overrun == 'slip':
+                        deadline = now
+                # catchup: keep the deadline and run immediately
+            self.__wait(deadline)
+            # statistics:
+            exec_counts += 1
+            if exec_counts >= self.__frequency * self.__review:
+                exec_time = time.perf_counter() - last_count_reset
+                actual_freq = exec_counts / exec_time
+                rate = actual_freq / self.__frequency
+                if actual_freq < (self.__frequency * self.__warning):
+                    logger.warning(
+                        f'Loop "{self.name}" running under '
+                        f'warning threshold at {actual_freq:.2f}[Hz] '
+                        f'({rate*100:.0f}%)')
+                else:
+                    logger.debug(
+                        f'Loop "{self.name}" running at '
+                        f'{actual_freq:.2f}[Hz] '
+                        f'({rate*100:.0f}%)')
+                # reset counters
                 exec_counts = 0
-                last_count_reset = time.time()
-                time.sleep(self.period)
-            else:
-                start_time = time.time()
-                self.atomic()
-                end_time = time.time()
-                wait_time = self.__period - (end_time - start_time) + adjust
-                if wait_time > 0:
-                    time.sleep(wait_time)
-                # else:
-                #     logger.debug(f'Loop "{self.name}" took longer to run '
-                #                  f'{end_time - start_time:.5f} than '
-                #                  f'loop period {self.period:.5f}; check')
-                # statistics:
-                exec_counts += 1
-                if exec_counts >= self.__frequency * self.__review:
-                    exec_time = time.time() - last_count_reset
-                    actual_freq = exec_counts / exec_time
-                    rate = actual_freq / self.__frequency
-                    diff = self.__period - exec_time / exec_counts
-                    # fine tune the frequency
-                    adjust += diff * self.__throttle
-                    if adjust < - self.__period:
-                        adjust = - self.__period
-                    if actual_freq < (self.__frequency * self.__warning):
-                        logger.warning(
-                            f'Loop "{self.name}" running under '
-                            f'warning threshold at {actual_freq:.2f}[Hz] '
-                            f'({rate*100:.0f}%)')
-                    else:
-                        logger.debug(
-                            f'Loop "{self.name}" running at '
-                            f'{actual_freq:.2f}[Hz] '
-                            f'({rate*100:.0f}%)')
-                    # reset counters
-                    exec_counts = 0
-                    last_count_reset = time.time()
+                last_count_reset = time.perf_counter()
 
     def atomic(self):
         """This method implements the periodic task that needs to be
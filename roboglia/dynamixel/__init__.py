@@ -3,9 +3,12 @@ from ..utils import register_class
 from .device import DynamixelDevice
 
 from .bus import DynamixelBus
+from .bus import DynamixelPortHandler                   # noqa F401
 from .bus import SharedDynamixelBus
 from .bus import MockPacketHandler                      # noqa F401
+from .coalesce import DynamixelCoalescer                 # noqa F401
 
+from .sync import DynamixelSync                          # noqa F401
 from .sync import DynamixelSyncReadLoop
 from .sync import DynamixelSyncWriteLoop
 from .sync import DynamixelBulkReadLoop
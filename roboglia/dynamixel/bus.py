@@ -15,16 +15,58 @@
 
 import logging
 import random
+import time
 
 from dynamixel_sdk import PacketHandler, PortHandler
+from dynamixel_sdk.port_handler import LATENCY_TIMER
+from dynamixel_sdk import GroupSyncWrite, GroupBulkWrite
 from serial import rs485
 
-from ..base import BaseBus, SharedBus
+from ..base import BaseBus, SharedBus, RegisterBlock
 from ..utils import check_type, check_options, check_not_empty
+from .coalesce import DynamixelCoalescer
 
 logger = logging.getLogger(__name__)
 
 
+class DynamixelPortHandler(PortHandler):
+    """A ``PortHandler`` with an adjustable timeout for status packets.
+
+    The SDK's ``PortHandler`` allows for the latency of the USB adapter
+    a fixed ``LATENCY_TIMER`` of 16 ms, counted twice, when calculating
+    how long to wait for a status packet. This class uses its own
+    ``latency`` instead and, while ``fixed_timeout`` is set, waits
+    exactly that long regardless of the packet. The attributes follow the
+    SDK conventions and are expressed in milliseconds.
+
+    Parameters
+    ----------
+    port_name: str
+        The serial port used
+
+    latency: float
+        The latency of the USB adapter in ms. Default is the SDK's
+        ``LATENCY_TIMER``.
+    """
+    def __init__(self, port_name, latency=LATENCY_TIMER):
+        super().__init__(port_name)
+        self.latency = latency
+        self.fixed_timeout = None
+
+    def setPacketTimeout(self, packet_length):
+        if self.fixed_timeout is not None:
+            self.setPacketTimeoutMillis(self.fixed_timeout)
+        else:
+            self.packet_start_time = self.getCurrentTime()
+            self.packet_timeout = self.tx_time_per_byte * packet_length + \
+                self.latency * 2.0 + 2.0
+
+    def setPacketTimeoutMillis(self, msec):
+        if self.fixed_timeout is not None:
+            msec = self.fixed_timeout
+        super().setPacketTimeoutMillis(msec)
+
+
 class DynamixelBus(BaseBus):
     """A communication bus that supports Dynamixel protocol.
 
@@ -75,6 +117,15 @@ class DynamixelBus(BaseBus):
         of the :py:class:`MockPacketHandler` to simulate the communication
         on a Dynamixel bus and allow to test the software in CI testing.
 
+    tune: bool
+        If ``True`` the link is tuned for low latency when the bus is opened
+        (see :py:meth:`tune`). Default ``False``.
+
+    return_delay: int
+        The value (as in the control table) written to the
+        ``return_delay_time`` register of the devices when the bus is
+        tuned. Default 0 (the devices respond without delay).
+
     Raises
     ------
         KeyError: if any of the required keys are missing
@@ -82,7 +133,7 @@ class DynamixelBus(BaseBus):
     """
     def __init__(self, name='DYNAMIXEL', robot=None, port='', auto=True,
                  baudrate=1000000, protocol=2.0, rs485=False,
-                 mock=False):
+                 mock=False, tune=False, return_delay=0):
         super().__init__(name=name, robot=robot, port=port, auto=auto)
         check_type(baudrate, int, 'bus', self.name, logger)
         check_not_empty(baudrate, 'baudrate', 'bus', self.name, logger)
@@ -95,6 +146,11 @@ class DynamixelBus(BaseBus):
         self.__packet_handler = None
         check_options(mock, [True, False], 'bus', self.name, logger)
         self.__mock = mock
+        check_options(tune, [True, False], 'bus', self.name, logger)
+        self.__tune = tune
+        check_type(return_delay, int, 'bus', self.name, logger)
+        self.__return_delay = return_delay
+        self.__round_trip = None
 
     @property
     def port_handler(self):
@@ -121,6 +177,24 @@ class DynamixelBus(BaseBus):
         """If the bus uses rs485."""
         return self.__rs485
 
+    @property
+    def byte_time(self):
+        """The time in seconds needed to transmit one byte on the bus (with
+        a start and a stop bit)."""
+        return 10.0 / self.__baudrate
+
+    @property
+    def instruction_overhead(self):
+        """The number of bytes in an instruction packet besides the
+        parameters (header, id, length, instruction and checksum)."""
+        return 10 if self.__protocol == 2.0 else 6
+
+    @property
+    def status_overhead(self):
+        """The number of bytes in a status packet besides the data (header,
+        id, length, error and checksum)."""
+        return 11 if self.__protocol == 2.0 else 6
+
     def open(self):
         """Allocates the port_handler and the packet_handler. If the
         attribute ``mock`` was ``True`` when setting up the bus, then
@@ -132,7 +206,7 @@ class DynamixelBus(BaseBus):
             self.__packet_handler = MockPacketHandler(self.protocol,
                                                       self.robot)
         else:               # pragma: no cover
-            self.__port_handler = PortHandler(self.port)
+            self.__port_handler = DynamixelPortHandler(self.port)
             self.__port_handler.openPort()
             self.__port_handler.setBaudRate(self.baudrate)
             if self.rs485:
@@ -140,6 +214,8 @@ class DynamixelBus(BaseBus):
                 logger.info(f'Bus "{self.name}" set in rs485 mode')
             self.__packet_handler = PacketHandler(self.__protocol)
         logger.info(f'Bus "{self.name}" opened')
+        if self.__tune:
+            self.tune()
 
     def close(self):
         """Closes the actual physical bus. Calls the ``super().close()`` to
@@ -159,6 +235,99 @@ class DynamixelBus(BaseBus):
         """
         return self.__port_handler is not None
 
+    @property
+    def round_trip(self):
+        """The longest round trip time (in seconds) of a one byte read
+        measured by the last :py:meth:`tune` or ``None`` if the bus was
+        not tuned."""
+        return self.__round_trip
+
+    def tune(self):
+        """Tunes the link for low latency. It will:
+
+        * set the serial port in low latency mode (on Linux this reduces
+          the latency timer of the USB adapter to 1 ms)
+        * write ``return_delay`` in the ``return_delay_time`` register of
+          the robot's devices on this bus, if it has a different value (the
+          register is in EEPROM); the register is updated with the value
+          read back from the device
+        * measure the round trip time of a one byte read for these devices
+        * set the latency of the port handler to the measured overhead, so
+          that the timeouts of the packets are calculated from their length
+          and the baudrate plus this overhead instead of the SDK's default
+          of 16 ms per direction
+
+        Returns
+        -------
+        float or None:
+            The round trip time achieved in seconds (also available in
+            :py:meth:`round_trip`) or ``None`` if no device could be
+            measured.
+        """
+        if not self.is_open:
+            logger.error('Tune invoked with a bus not opened')
+            return None
+        port = self.__port_handler
+        if isinstance(port, DynamixelPortHandler):      # pragma: no cover
+            try:
+                port.ser.set_low_latency_mode(True)
+                logger.info(f'Bus "{self.name}" set in low latency mode')
+            except (AttributeError, ValueError, OSError,
+                    NotImplementedError) as e:
+                logger.warning(f'Bus "{self.name}": low latency mode not '
+                               f'available ({e})')
+        samples = []
+        for device in self.__robot_devices():
+            if 'return_delay_time' not in device.registers:
+                continue
+            reg = device.registers['return_delay_time']
+            delay, cerr, _ = self.__packet_handler.read1ByteTxRx(
+                port, device.dev_id, reg.address)
+            if cerr != 0:
+                logger.warning(f'Bus "{self.name}": failed to read the return '
+                               f'delay of device "{device.name}"')
+                continue
+            if delay != self.__return_delay:
+                # the register is in EEPROM; write it only if needed
+                cerr, derr = self.__packet_handler.write1ByteTxRx(
+                    port, device.dev_id, reg.address, self.__return_delay)
+                if cerr != 0 or derr != 0:
+                    logger.warning(f'Bus "{self.name}": failed to set the '
+                                   f'return delay of device "{device.name}" '
+                                   f'(cerr={cerr}, derr={derr})')
+            # the reads measure the round trip and confirm the value
+            for _ in range(3):
+                start = time.perf_counter()
+                value, cerr, _ = self.__packet_handler.read1ByteTxRx(
+                    port, device.dev_id, reg.address)
+                if cerr == 0:
+                    samples.append(time.perf_counter() - start)
+                    delay = value
+            reg.refresh(delay)
+        if not samples:
+            logger.warning(f'Bus "{self.name}": no device responded while '
+                           'tuning')
+            return None
+        self.__round_trip = max(samples)
+        if isinstance(port, DynamixelPortHandler):      # pragma: no cover
+            # the bytes of the read instruction and of its status packet
+            params = 4 if self.__protocol == 2.0 else 2
+            packets = self.instruction_overhead + params + \
+                self.status_overhead + 1
+            overhead = self.__round_trip - packets * self.byte_time
+            port.latency = max(overhead * 1000.0, 0.0)
+        logger.info(f'Bus "{self.name}" tuned: round trip '
+                    f'{self.__round_trip * 1000:.3f} ms')
+        return self.__round_trip
+
+    def __robot_devices(self):
+        """The devices of the robot that use this bus."""
+        if not self.robot:
+            return []
+        # compare by name: the devices might use the SharedBus wrapper
+        return [device for device in self.robot.devices.values()
+                if device.bus.name == self.name]
+
     def ping(self, dxl_id):
         """Performs a Dynamixel ``ping`` of a device.
 
@@ -200,6 +369,126 @@ class DynamixelBus(BaseBus):
         else:
             return [dxl_id for dxl_id in range if self.ping(dxl_id)]
 
+    def discover(self, ids=range(253), baudrates=None, timeout=None):
+        """Finds the devices that respond on the bus, faster than
+        :py:meth:`scan`.
+
+        With protocol 2.0 a single broadcast ``ping`` is used and all the
+        devices respond in the same transaction. The time waited for the
+        responses is limited to the highest ID in ``ids``. With protocol
+        1.0 the IDs are pinged one by one but with a short timeout, that
+        adapts to the response times observed from the devices found.
+
+        The discovery changes the baudrate of the port when more than one
+        is requested and should only be used when no syncs are running on
+        the bus. The original baudrate is restored at the end.
+
+        Parameters
+        ----------
+        ids: iterable of int
+            The IDs of interest. Devices with other IDs that answer a
+            broadcast ``ping`` are ignored. Default is [0, 252].
+
+        baudrates: list of int or None
+            The baudrates to scan. If ``None`` only the :py:attr:`baudrate`
+            of the bus is used.
+
+        timeout: float or None
+            The time in seconds to wait for the response of a device with
+            protocol 1.0 until at least one device has responded. If
+            ``None`` the timeout is the transmission time of the ``ping``
+            and of its status packet at the baudrate scanned, plus the
+            longest return delay of a device and the latency of the
+            port.
+
+        Returns
+        -------
+        dict
+            For each baudrate requested a dictionary with the IDs found and
+            their model numbers. If the bus is not open the result is an
+            empty dictionary.
+        """
+        if not self.is_open:
+            logger.error('Discover invoked with a bus not opened')
+            return {}
+        if baudrates is None:
+            baudrates = [self.baudrate]
+        ids = sorted(ids)
+        port = self.__port_handler
+        real_port = isinstance(port, PortHandler)
+        result = {}
+        try:
+            for baudrate in baudrates:
+                if real_port and port.getBaudRate() != baudrate:
+                    if not port.setBaudRate(baudrate):
+                        logger.error(f'Bus {self.name}: baudrate {baudrate} '
+                                     'cannot be used for discovery')
+                        result[baudrate] = {}
+                        continue
+                if self.__protocol == 2.0:
+                    result[baudrate] = self.__broadcast_discover(ids)
+                else:
+                    result[baudrate] = self.__ping_discover(ids, timeout,
+                                                            baudrate)
+        finally:
+            if real_port and port.getBaudRate() != self.baudrate:
+                port.setBaudRate(self.baudrate)
+        return result
+
+    def __broadcast_discover(self, ids):
+        """Uses a broadcast ``ping`` to find the devices with ``ids``."""
+        port = self.__port_handler
+        timed = isinstance(port, DynamixelPortHandler) and ids
+        if timed:
+            # status packets (14 bytes) are returned in ID order, each
+            # device waiting 3 ms for the ones before it
+            slots = max(ids) + 1
+            byte_time = 10000.0 / self.baudrate
+            port.fixed_timeout = slots * (14 * byte_time + 3.0) + \
+                port.latency * 2.0 + 2.0
+        try:
+            data, result = self.__packet_handler.broadcastPing(port)
+        finally:
+            if timed:
+                port.fixed_timeout = None
+        if not data:
+            logger.debug(f'Bus {self.name}: broadcast ping returned '
+                         f'{result} and no devices')
+            return {}
+        return {dxl_id: data[dxl_id][0] for dxl_id in ids if dxl_id in data}
+
+    def __ping_discover(self, ids, timeout, baudrate):
+        """Pings the ``ids`` one by one with a short timeout that follows
+        the response time of the devices found."""
+        port = self.__port_handler
+        timed = isinstance(port, DynamixelPortHandler)
+        if timed:
+            if timeout is None:
+                # ping and status packets have no parameters; the return
+                # delay is at most 254 * 2 us and the USB adapter delays
+                # only the response
+                packets = self.instruction_overhead + self.status_overhead
+                timeout = packets * 10.0 / baudrate + 0.000508 + \
+                    port.latency / 1000.0 + 0.001
+            port.fixed_timeout = timeout * 1000.0
+        found = {}
+        slowest = 0.0
+        try:
+            for dxl_id in ids:
+                start = time.perf_counter()
+                model, cerr, _ = self.__packet_handler.ping(port, dxl_id)
+                if cerr != 0:
+                    continue
+                found[dxl_id] = model
+                if timed:
+                    # allow twice the slowest response seen so far
+                    slowest = max(slowest, time.perf_counter() - start)
+                    port.fixed_timeout = slowest * 2000.0 + 1.0
+        finally:
+            if timed:
+                port.fixed_timeout = None
+        return found
+
     def read(self, reg):
         """Depending on the size of the register calls the corresponding
         TxRx function from the packet handler.
@@ -279,9 +568,17 @@ class DynamixelBus(BaseBus):
             in the internal format of the register and it is the
             responsibility of the register class to provide conversion
             between the internal and external format if they are different.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the device received the value. Device errors (ex.
+            overheating) are only logged, as the device still processes
+            the instruction.
         """
         if not self.is_open:
             logger.error(f'Attempt to use closed bus "{self.name}"')
+            return False
         else:
             dev = reg.device
             # select function by register size
@@ -303,7 +600,7 @@ class DynamixelBus(BaseBus):
                              f'"{self.name}" device "{dev.name}" register '
                              f'"{reg.name}"')
                 logger.error(str(e))
-                return None
+                return False
 
             # success call - log DEBUG
             logger.debug(f'[writeXByteTxRx] dev={dev.dev_id} '
@@ -315,12 +612,103 @@ class DynamixelBus(BaseBus):
                 err_desc = self.__packet_handler.getTxRxResult(cerr)
                 logger.error(f'[Bus "{self.name}"] device "{dev.name}", '
                              f'register "{reg.name}": {err_desc}')
-            else:
-                if derr != 0:
-                    # device error
-                    err_desc = self.__packet_handler.getRxPacketError(derr)
-                    logger.warning(f'Device "{dev.name}" responded with a '
-                                   f'return error: {err_desc}')
+                return False
+            if derr != 0:
+                # device error
+                err_desc = self.__packet_handler.getRxPacketError(derr)
+                logger.warning(f'Device "{dev.name}" responded with a '
+                               f'return error: {err_desc}')
+            return True
+
+    def read_block(self, device, start_address, length):
+        """Reads a range of registers of a device with one Read
+        instruction.
+
+        Parameters
+        ----------
+        device: DynamixelDevice or subclass
+            The device to read from.
+
+        start_address: int
+            The address of the first byte to read.
+
+        length: int
+            The number of bytes to read.
+
+        Returns
+        -------
+        list of int:
+            The bytes read or ``None`` if the communication failed (the
+            errors are logged).
+        """
+        if not self.is_open:
+            logger.error(f'Attempt to use closed bus "{self.name}"')
+            return None
+        try:
+            data, cerr, derr = self.__packet_handler.readTxRx(
+                self.__port_handler, device.dev_id, start_address, length)
+        except Exception as e:
+            logger.error(f'Exception raised while reading bus '
+                         f'"{self.name}" device "{device.name}" '
+                         f'[{start_address}:{start_address + length}]')
+            logger.error(str(e))
+            return None
+        if cerr != 0:
+            err_desc = self.__packet_handler.getTxRxResult(cerr)
+            logger.error(f'[bus "{self.name}"] device "{device.name}", '
+                         f'read [{start_address}:{start_address + length}]: '
+                         f'{err_desc}')
+            return None
+        if derr != 0:
+            err_desc = self.__packet_handler.getRxPacketError(derr)
+            logger.warning(f'device "{device.name}" responded with a '
+                           f'return error: {err_desc}')
+        return data
+
+    def write_block(self, device, start_address, data):
+        """Writes a range of registers of a device with one Write
+        instruction.
+
+        Parameters
+        ----------
+        device: DynamixelDevice or subclass
+            The device to write to.
+
+        start_address: int
+            The address of the first byte to write.
+
+        data: list of int
+            The bytes to write.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the data was sent successfully (the errors are
+            logged).
+        """
+        if not self.is_open:
+            logger.error(f'Attempt to use closed bus "{self.name}"')
+            return False
+        try:
+            cerr, derr = self.__packet_handler.writeTxRx(
+                self.__port_handler, device.dev_id, start_address,
+                len(data), list(data))
+        except Exception as e:          # pragma: no cover
+            logger.error(f'Exception raised while writing bus '
+                         f'"{self.name}" device "{device.name}" '
+                         f'at {start_address}')
+            logger.error(str(e))
+            return False
+        if cerr != 0:
+            err_desc = self.__packet_handler.getTxRxResult(cerr)
+            logger.error(f'[bus "{self.name}"] device "{device.name}", '
+                         f'write at {start_address}: {err_desc}')
+            return False
+        if derr != 0:
+            err_desc = self.__packet_handler.getRxPacketError(derr)
+            logger.warning(f'device "{device.name}" responded with a '
+                           f'return error: {err_desc}')
+        return True
 
     def __repr__(self):
         ans = super().__repr__()[:-1]
@@ -351,9 +739,97 @@ class SharedDynamixelBus(SharedBus):
         you **must** ensure that you wrap them in :py:meth:`~can_use` and
         :py:meth:`~stop_using` in the calling code.
 
+    The bus also provides a :py:class:`DynamixelCoalescer` that is used by
+    the syncs created with ``coalesce: True`` to merge their packets.
+
+    With ``write_behind`` (see :py:class:`SharedBus`) the delayed writes
+    are merged in ranges of adjacent registers for each device and the
+    ranges of several devices are sent together (see :py:meth:`naked_flush`).
+
+    Parameters
+    ----------
+    coalesce_window: float
+        The time in seconds the coalescer waits for other syncs to join a
+        batch (see :py:class:`DynamixelCoalescer`). Default 0.0.
     """
-    def __init__(self, **kwargs):
+    def __init__(self, coalesce_window=0.0, **kwargs):
         super().__init__(DynamixelBus, **kwargs)
+        check_type(coalesce_window, float, 'bus', self.name, logger)
+        self.__coalescer = DynamixelCoalescer(self, window=coalesce_window)
+
+    @property
+    def coalescer(self):
+        """The :py:class:`DynamixelCoalescer` of the bus."""
+        return self.__coalescer
+
+    def naked_flush(self, registers):
+        """Writes the registers in as few packets as possible, without
+        invoking the lock.
+
+        The adjacent registers of a device are merged in one range. The
+        ranges of different devices are sent together with a BulkWrite
+        (Protocol 2) or, if they have the same address and length, with a
+        SyncWrite (Protocol 1). A range that cannot be grouped with others
+        is sent with a Write instruction, so that the status of the device
+        is checked.
+
+        Parameters
+        ----------
+        registers: list of BaseRegister or subclass
+            The registers to write.
+
+        Returns
+        -------
+        list of BaseRegister or subclass:
+            The registers that could not be written.
+        """
+        blocks = RegisterBlock.adjacent(registers)
+        # a packet can address a device only once; for SyncWrite all the
+        # ranges must have the same address and length
+        packets = []
+        for block in blocks:
+            key = None if self.protocol == 2.0 \
+                else (block.start, block.length)
+            for packet_key, packet in packets:
+                if packet_key == key and block.device not in packet:
+                    packet[block.device] = block
+                    break
+            else:
+                packets.append((key, {block.device: block}))
+        failed = []
+        for _, packet in packets:
+            if len(packet) == 1:
+                block, = packet.values()
+                if not self.naked_write_block(block.device, block.start,
+                                              list(block.pack())):
+                    failed.extend(block.registers)
+            elif not self.__write_group(packet.values()):
+                for block in packet.values():
+                    failed.extend(block.registers)
+        return failed
+
+    def __write_group(self, blocks):
+        """Writes ranges of several devices in one packet. Returns ``True``
+        if the packet was sent."""
+        ph = self.packet_handler
+        if self.protocol == 2.0:
+            gw = GroupBulkWrite(self.port_handler, ph)
+            for block in blocks:
+                gw.addParam(block.device.dev_id, block.start, block.length,
+                            list(block.pack()))
+        else:
+            first = next(iter(blocks))
+            gw = GroupSyncWrite(self.port_handler, ph, first.start,
+                                first.length)
+            for block in blocks:
+                gw.addParam(block.device.dev_id, list(block.pack()))
+        result = gw.txPacket()
+        if result != 0:
+            names = [block.device.name for block in blocks]
+            logger.error(f'[bus "{self.name}"] failed to flush the writes '
+                         f'for devices {names}: {ph.getTxRxResult(result)}')
+            return False
+        return True
 
 
 class MockPacketHandler():
@@ -456,6 +932,11 @@ class MockPacketHandler():
         """Same as :py:meth:`write1ByteTxRx` but for 4 Bytes registers."""
         return self.__common_writeTxRx(ph, dev_id, address, value)
 
+    def writeTxRx(self, ph, dev_id, address, length, data):
+        """Same as :py:meth:`write1ByteTxRx` but for writing a range of
+        ``length`` bytes."""
+        return self.__common_writeTxRx(ph, dev_id, address, data)
+
     def __common_readTxRx(self, ph, dev_id, address):
         if random.random() < self.__err:
             logger.error('** Random error generated by MockPacketHandler **')
@@ -618,5 +1099,16 @@ class MockPacketHandler():
         """Simulates a ``ping`` on the Dynamixel bus."""
         for device in self.__robot.devices.values():
             if device.dev_id == dxl_id:
-                return device.model_number, 0, 0
+                return device.model_number.int_value, 0, 0
         return 0, -3001, 0
+
+    def broadcastPing(self, ph):
+        """Simulates a broadcast ``ping`` on the Dynamixel bus. Not
+        available for protocol 1.0."""
+        if self.__protocol == 1.0:
+            return None, -9000
+        data = {}
+        for device in self.__robot.devices.values():
+            data[device.dev_id] = [device.model_number.int_value,
+                                   device.firmware.int_value]
+        return data, 0
@@ -0,0 +1,295 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+from dynamixel_sdk import GroupBulkRead, GroupBulkWrite
+
+logger = logging.getLogger(__name__)
+
+
+class DynamixelCoalescer():
+    """Merges the transactions of several syncs that use the same bus and
+    are due at the same time in as few BulkRead / BulkWrite packets as
+    possible.
+
+    Every :py:class:`SharedDynamixelBus` has one coalescer. The syncs
+    that were created with ``coalesce: True`` submit their blocks to the
+    coalescer instead of sending their own packets. The first sync that
+    submits a request in a cycle becomes the *leader*: it waits for the
+    ``window`` (if any) and for the bus, and meanwhile any other sync that
+    becomes due joins the same batch and waits for the leader to finish.
+    The leader then sends all the requests of the batch together and
+    distributes the results in the registers of each sync. The packets
+    are accounted in the statistics of the leader, while every sync
+    accounts its own data.
+
+    The blocks of the same device are merged when their ranges overlap or
+    are separated by a gap smaller than the cost of addressing the device
+    again (for writes only when they touch); otherwise they are placed in
+    additional packets, as one packet can address a device only once.
+
+    Parameters
+    ----------
+    bus: SharedDynamixelBus
+        The bus the coalescer works for.
+
+    window: float
+        A time in seconds the leader of a batch waits for other syncs to
+        join before sending the packets. With the default 0 the batches
+        include only the syncs that became due while the leader was waiting
+        for the bus.
+    """
+    def __init__(self, bus, window=0.0):
+        self.__bus = bus
+        self.__window = window
+        self.__cond = threading.Condition()
+        self.__open = {'read': None, 'write': None}
+        self.__readers = {}
+        self.__writers = []
+        self.__requests = 0
+        self.__packets = 0
+
+    @property
+    def bus(self):
+        """The bus used by the coalescer."""
+        return self.__bus
+
+    @property
+    def window(self):
+        """The time the leader of a batch waits for other syncs."""
+        return self.__window
+
+    @property
+    def requests(self):
+        """The number of requests submitted by syncs."""
+        return self.__requests
+
+    @property
+    def packets(self):
+        """The number of packets sent for the requests submitted."""
+        return self.__packets
+
+    def read(self, sync, blocks):
+        """Reads the blocks of a sync together with the ones of the other
+        syncs that are due in the same time.
+
+        Parameters
+        ----------
+        sync: BaseSync or subclass
+            The sync that submits the request. It is used for acquiring the
+            bus (with its priority) if it becomes the leader of the batch.
+
+        blocks: list of RegisterBlock
+            The blocks to be read; they are updated with the data received.
+
+        Returns
+        -------
+        bool:
+            ``True`` if all the blocks of the sync were read successfully.
+        """
+        return self.__submit('read', sync, blocks)
+
+    def write(self, sync, chunks):
+        """Writes data for a sync together with the data of the other syncs
+        that are due in the same time. If the transmission fails the blocks
+        are flagged again as ``dirty``.
+
+        Parameters
+        ----------
+        sync: BaseSync or subclass
+            The sync that submits the request. It is used for acquiring the
+            bus (with its priority) if it becomes the leader of the batch.
+
+        chunks: list of tuples
+            A list of ``(block, address, data)`` with the data to be written
+            for each block, starting at ``address``.
+
+        Returns
+        -------
+        bool:
+            ``True`` if all the packets of the batch were successful.
+        """
+        return self.__submit('write', sync, chunks)
+
+    def __submit(self, kind, sync, items):
+        """Adds the request to the open batch or opens a new one and, in
+        this case, executes it."""
+        with self.__cond:
+            batch = self.__open[kind]
+            if batch is not None:
+                # follower: wait for the leader to process the batch
+                batch['items'].append((sync, items))
+                self.__requests += 1
+                while not batch['done']:
+                    self.__cond.wait()
+                return self.__result(batch, sync)
+            batch = {'items': [(sync, items)], 'done': False,
+                     'result': False, 'failed': None}
+            self.__open[kind] = batch
+            self.__requests += 1
+        # leader
+        try:
+            if self.__window > 0:
+                time.sleep(self.__window)
+            acquired = sync.acquire_bus()
+            with self.__cond:
+                # no more requests can join
+                self.__open[kind] = None
+            if not acquired:
+                logger.error(f'sync {sync.name} failed to acquire bus '
+                             f'{self.__bus.name} for coalesced {kind}')
+                if kind == 'write':
+                    for _, chunks in batch['items']:
+                        for block, _, _ in chunks:
+                            block.mark_dirty()
+            else:
+                if kind == 'read':
+                    batch['failed'], packets = self.__read(batch['items'])
+                    batch['result'] = not batch['failed']
+                else:
+                    batch['result'], packets = self.__write(batch['items'])
+                # the packets are accounted to the leader
+                sync.stats.record_traffic(packets=packets)
+        finally:
+            with self.__cond:
+                if self.__open[kind] is batch:
+                    self.__open[kind] = None
+                batch['done'] = True
+                self.__cond.notify_all()
+        return self.__result(batch, sync)
+
+    @staticmethod
+    def __result(batch, sync):
+        """The result of a batch for one of its syncs: the reads succeed
+        for the syncs whose blocks were all decoded, the writes only if all
+        the packets were sent."""
+        if batch['failed'] is not None:
+            return sync not in batch['failed']
+        return batch['result']
+
+    @staticmethod
+    def __group(ranges, max_gap, overlap):
+        """Distributes the ranges ``(dev_id, start, end, payload)`` in
+        packets, as dictionaries ``{dev_id: [start, end, payloads]}``.
+        Ranges of the same device are merged if they are separated by at
+        most ``max_gap`` bytes and, if ``overlap`` is ``False``, they do
+        not overlap."""
+        packets = []
+        for dev_id, start, end, payload in \
+                sorted(ranges, key=lambda item: (item[0], item[1])):
+            for packet in packets:
+                entry = packet.get(dev_id)
+                if entry is None:
+                    packet[dev_id] = [start, end, [payload]]
+                    break
+                if start <= entry[1] + max_gap and \
+                        (overlap or start >= entry[1]):
+                    entry[1] = max(entry[1], end)
+                    entry[2].append(payload)
+                    break
+            else:
+                packets.append({dev_id: [start, end, [payload]]})
+        return packets
+
+    def __reader(self, packet):
+        """Returns a ``GroupBulkRead`` for the layout of the packet, reusing
+        the one produced for a previous batch with the same layout."""
+        bus = self.__bus
+        layout = tuple(sorted((dev_id, entry[0], entry[1] - entry[0])
+                              for dev_id, entry in packet.items()))
+        gbr = self.__readers.get(layout)
+        if gbr is None or gbr.ph is not bus.packet_handler:
+            gbr = GroupBulkRead(bus.port_handler, bus.packet_handler)
+            for dev_id, start, length in layout:
+                gbr.addParam(dev_id, start, length)
+            self.__readers[layout] = gbr
+        return gbr
+
+    def __read(self, items):
+        """Executes the reads of a batch; the bus must be acquired and it
+        is released as soon as the packets were exchanged. Returns the
+        set of syncs with blocks not read and the number of packets."""
+        ranges = [(block.device.dev_id, block.start,
+                   block.start + block.length, (sync, block))
+                  for sync, blocks in items for block in blocks]
+        # a gap is cheaper than addressing the device again in another
+        # packet: parameters in the instruction and a status packet
+        bus = self.__bus
+        params = 5 if bus.protocol == 2.0 else 3
+        packets = self.__group(ranges, bus.status_overhead + params,
+                               overlap=True)
+        readers = [self.__reader(packet) for packet in packets]
+        results = [gbr.txRxPacket() for gbr in readers]
+        self.__bus.stop_using()         # !! as soon as possible
+        self.__packets += len(packets)
+        failed = set()
+        for packet, gbr, result in zip(packets, readers, results):
+            if result != 0:
+                error = gbr.ph.getTxRxResult(result)
+                syncs = set(sync for entry in packet.values()
+                            for sync, _ in entry[2])
+                names = sorted(sync.name for sync in syncs)
+                logger.error(f'coalesced BulkRead for syncs {names}, '
+                             f'cerr={error}')
+                failed.update(syncs)
+                continue
+            for dev_id, (start, _, payloads) in packet.items():
+                data = gbr.data_dict[dev_id][0]
+                for sync, block in payloads:
+                    if not block.unpack(data, block.start - start):
+                        logger.error(f'Failed to retrieve data in '
+                                     f'coalesced BulkRead {sync.name} for '
+                                     f'device {block.device.name}')
+                        failed.add(sync)
+        return failed, len(packets)
+
+    def __write(self, items):
+        """Executes the writes of a batch; the bus must be acquired and it
+        is released as soon as the packets were sent. Returns the success
+        and the number of packets."""
+        bus = self.__bus
+        ranges = [(block.device.dev_id, address, address + len(data),
+                   (block, data))
+                  for _, chunks in items for block, address, data in chunks]
+        packets = self.__group(ranges, 0, overlap=False)
+        while len(self.__writers) < len(packets):
+            self.__writers.append(None)
+        writers = []
+        for index, packet in enumerate(packets):
+            gbw = self.__writers[index]
+            if gbw is None or gbw.ph is not bus.packet_handler:
+                gbw = GroupBulkWrite(bus.port_handler, bus.packet_handler)
+                self.__writers[index] = gbw
+            for dev_id, (start, end, payloads) in packet.items():
+                data = b''.join(bytes(chunk) for _, chunk in payloads)
+                gbw.addParam(dev_id, start, end - start, data)
+            writers.append(gbw)
+        results = [gbw.txPacket() for gbw in writers]
+        bus.stop_using()                # !! as soon as possible
+        self.__packets += len(packets)
+        success = True
+        for packet, gbw, result in zip(packets, writers, results):
+            gbw.clearParam()
+            if result != 0:
+                error = gbw.ph.getTxRxResult(result)
+                logger.error(f'coalesced BulkWrite on bus {bus.name} '
+                             f'failed: cerr={error}')
+                success = False
+                for entry in packet.values():
+                    for block, _ in entry[2]:
+                        block.mark_dirty()
+        return success, len(packets)
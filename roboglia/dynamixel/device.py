@@ -48,6 +48,19 @@ class DynamixelDevice(BaseDevice):
         # return os.path.join(os.path.dirname(__file__), 'devices')
         return Path(__file__).parent / 'devices/'
 
+    @property
+    def return_delay(self):
+        """The time in seconds the device waits before sending a status
+        packet, as per the last known value of the ``return_delay_time``
+        register (no communication with the device is performed). Returns 0
+        if the model does not have such a register.
+        """
+        register = self.registers.get('return_delay_time', None)
+        if register is None:
+            return 0.0
+        # the external value is in microseconds
+        return register.value_to_external(register.int_value) / 1000000.0
+
     def register_low_endian(self, value, size):
         """Converts a value into a list of bytes in little endian order.
 
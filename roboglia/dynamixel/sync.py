@@ -18,19 +18,68 @@ from dynamixel_sdk import GroupSyncWrite, GroupSyncRead
 from dynamixel_sdk import GroupBulkWrite, GroupBulkRead
 
 from ..base import BaseSync
+from ..utils import check_options
 
 logger = logging.getLogger(__name__)
 
 
-class DynamixelSyncWriteLoop(BaseSync):
+class DynamixelSync(BaseSync):
+    """Base class for the Dynamixel syncs that can be coalesced with other
+    syncs on the same bus.
+
+    ``DynamixelSync`` inherits the parameters from
+    :py:class:`~roboglia.base.BaseSync`. In addition it includes the
+    following parameter.
+
+    Parameters
+    ----------
+    coalesce: bool
+        If ``True`` the sync does not send its own packets but submits the
+        data to the :py:class:`DynamixelCoalescer` of the bus that merges
+        it with the data of the other coalesced syncs that are due at the
+        same time in BulkRead / BulkWrite packets. Default ``False``.
+    """
+    def __init__(self, coalesce=False, **kwargs):
+        super().__init__(**kwargs)
+        check_options(coalesce, [True, False], 'sync', self.name, logger)
+        self.__coalesce = coalesce
+
+    @property
+    def coalesce(self):
+        """``True`` if the sync is coalesced with the other syncs on the
+        bus."""
+        return self.__coalesce
+
+
+class DynamixelSyncWriteLoop(DynamixelSync):
     """Implements SyncWrite as specified in the frequency parameter.
 
     The devices are provided in the `group` parameter and the registers
     in the `registers` as a list of register names.
     It will update from `int_value` of each register for every device.
+    Only the devices that have at least one ``dirty`` register are included
+    in the SyncWrite and if no register changed no packet is sent.
+
+    The registers do not need to be contiguous: they are split in segments
+    (see :py:meth:`~roboglia.base.BaseSync.plan_segments`) and a SyncWrite
+    packet is sent for each segment, all within one use of the bus. Small
+    gaps covered by ``RW`` registers that are kept current by other syncs
+    are carried in the packet with the values of those registers when this
+    is cheaper than an additional packet.
     Will raise exceptions if the SyncWrite cannot be setup or fails to
     execute.
+    If ``coalesce`` is ``True`` the data is sent in BulkWrite packets
+    together with the other coalesced syncs on the bus; this is only
+    possible with Protocol 2.0.
     """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.coalesce and self.bus.protocol != 2.0:
+            mess = f'sync {self.name}: coalesced SyncWrite only ' + \
+                   'supported for Dynamixel Protocol 2.0.'
+            logger.critical(mess)
+            raise ValueError(mess)
+
     def setup(self):
         """This allocates the ``GroupSyncWrite``. It needs to be here and
         not in the constructor as this is part of the wrapped execution
@@ -38,55 +87,93 @@ class DynamixelSyncWriteLoop(BaseSync):
         """
         # determines the addresses and lengths for each SyncWrite
         # allocates the GroupSyncWrite objects for each one
-        self.__start_address, self.__length, cont = self.get_register_range()
-        if not cont:
-            mess = f'SyncWrite {self.name} requires registers to be contiguous'
-            logger.error(mess)
-            raise RuntimeError(mess)
-        self.gsw = GroupSyncWrite(self.bus.port_handler,
-                                  self.bus.packet_handler,
-                                  self.__start_address, self.__length)
+        devs = len(self.devices)
+        # header, start address, data length and the id of each device
+        addressing = 4 if self.bus.protocol == 2.0 else 2
+        packet_cost = self.bus.instruction_overhead + addressing + devs
+        self.__segments = []
+        for start, length in self.plan_segments(packet_cost=packet_cost,
+                                                byte_cost=devs,
+                                                writable=True):
+            gsw = GroupSyncWrite(self.bus.port_handler,
+                                 self.bus.packet_handler,
+                                 start, length)
+            # the packing plan for each device
+            blocks = self.register_blocks(start, length, fill=True)
+            self.__segments.append((gsw, blocks))
+        logger.debug(f'SyncWrite {self.name} uses {len(self.__segments)} '
+                     f'segment(s)')
+
+    @property
+    def segments(self):
+        """The segments used by the SyncWrite as a list of tuples
+        ``(GroupSyncWrite, blocks)``."""
+        return self.__segments
 
     def atomic(self):
-        """Executes a SyncWrite."""
-        # add params to sync write
-        for device in self.devices:
-            data = [0] * self.__length
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                pos = register.address - self.__start_address
-                data[pos: pos + register.size] = device.register_low_endian(
-                    register.int_value, register.size)
-            # addParam
-            result = self.gsw.addParam(device.dev_id, data)
-            if not result:      # pragma: no cover
-                logger.error(f'failed to setup SyncWrite for loop '
-                             f'{self.name} for device {device.name}')
+        """Executes a SyncWrite for each segment with changes."""
+        if self.coalesce:
+            chunks = [(block, block.start, block.pack())
+                      for _, blocks in self.__segments
+                      for block in blocks if block.dirty]
+            if chunks:
+                self.stats.record_traffic(0, sum(block.length
+                                                 for block, _, _ in chunks))
+                self.bus.coalescer.write(self, chunks)
+            return
+        packets = []
+        for gsw, blocks in self.__segments:
+            dirty = [block for block in blocks if block.dirty]
+            if dirty:
+                # add params to sync write
+                for block in dirty:
+                    result = gsw.addParam(block.device.dev_id, block.pack())
+                    if not result:      # pragma: no cover
+                        logger.error(f'failed to setup SyncWrite for loop '
+                                     f'{self.name} for device '
+                                     f'{block.device.name}')
+                packets.append((gsw, dirty))
+        if not packets:
+            return
         # execute write
-        if self.bus.can_use():
-            result = self.gsw.txPacket()
+        if self.acquire_bus():
+            results = [gsw.txPacket() for gsw, _ in packets]
             self.bus.stop_using()       # !! as soon as possible
-            error = self.gsw.ph.getTxRxResult(result)
-            logger.debug(f'[sync write {self.name}], result: {error}')
-            if result != 0:
-                logger.error(f'failed to execute SyncWrite {self.name}: '
-                             f'cerr={error}')
+            self.stats.record_traffic(len(packets),
+                                      sum(block.length
+                                          for _, dirty in packets
+                                          for block in dirty))
+            for (gsw, dirty), result in zip(packets, results):
+                error = gsw.ph.getTxRxResult(result)
+                logger.debug(f'[sync write {self.name}], result: {error}')
+                if result != 0:
+                    logger.error(f'failed to execute SyncWrite {self.name}: '
+                                 f'cerr={error}')
+                    for block in dirty:
+                        block.mark_dirty()
         else:
             logger.error(f'sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
+            for _, dirty in packets:
+                for block in dirty:
+                    block.mark_dirty()
         # cleanup
-        self.gsw.clearParam()
+        for gsw, _ in packets:
+            gsw.clearParam()
 
 
-class DynamixelSyncReadLoop(BaseSync):
+class DynamixelSyncReadLoop(DynamixelSync):
     """Implements SyncRead as specified in the frequency parameter.
 
     The devices are provided in the `group` parameter and the registers
     in the `registers` as a list of register names.
     It will update the `int_value` of each register in every device with
-    the result of the call.
+    the result of the call and publish a
+    :py:class:`~roboglia.base.SyncSnapshot` of the values.
     Will raise exceptions if the SyncRead cannot be setup or fails to
     execute.
+    If ``coalesce`` is ``True`` the registers are read with BulkRead
+    packets together with the other coalesced syncs on the bus.
     Only works with Protocol 2.0.
     """
     def __init__(self, **kwargs):
@@ -108,44 +195,58 @@ class DynamixelSyncReadLoop(BaseSync):
             if result is not True:          # pragma: no cover
                 logger.error(f'Failed to setup SyncRead for loop '
                              f'{self.name} for device {device.name}')
+        # the decoding plan for each device
+        self.__blocks = self.register_blocks(self.__start_address,
+                                             self.__length)
+        self.__data_length = self.__length * len(self.__blocks)
 
     def atomic(self):
         """Executes a SyncRead."""
+        if self.coalesce:
+            self.stats.record_traffic(0, self.__data_length)
+            # a failed batch must not publish the stale values
+            if self.bus.coalescer.read(self, self.__blocks):
+                self.publish_snapshot()
+            return
         # acquire the bus
-        if not self.bus.can_use():
+        if not self.acquire_bus():
             logger.error(f'Sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
             return
         # execute read
         result = self.gsr.txRxPacket()
         self.bus.stop_using()       # !! as soon as possible
+        self.stats.record_traffic(1, self.__data_length)
         if result != 0:
             error = self.bus.packet_handler.getTxRxResult(result)
             logger.error(f'SyncRead {self.name}, cerr={error}')
             return
-        # retrieve data
-        for device in self.devices:
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                if not self.gsr.isAvailable(device.dev_id, register.address,
-                                            register.size):
-                    logger.error(f'Failed to retrieve data in SyncRead '
-                                 f'{self.name} for device {device.name} '
-                                 f'and register {register.name}')
-                else:
-                    register.int_value = self.gsr.getData(
-                        device.dev_id, register.address, register.size)
-
-
-class DynamixelBulkWriteLoop(BaseSync):
+        # retrieve data; the response of each device is decoded in one go
+        success = True
+        for block in self.__blocks:
+            data = self.gsr.data_dict.get(block.device.dev_id)
+            if not data or not block.unpack(data):
+                logger.error(f'Failed to retrieve data in SyncRead '
+                             f'{self.name} for device {block.device.name}')
+                success = False
+        # a partial read must not publish the stale values
+        if success:
+            self.publish_snapshot()
+
+
+class DynamixelBulkWriteLoop(DynamixelSync):
     """Implements BulkWrite as specified in the frequency parameter.
 
     The devices are provided in the `group` parameter and the registers
     in the `registers` as a list of register names. The registers do not need
-    to be sequential.
+    to be sequential: they are split in segments (see
+    :py:meth:`~roboglia.base.BaseSync.plan_segments`) and a BulkWrite
+    packet is sent for each segment, all within one use of the bus.
     It will update from `int_value` of each register for every device.
     Will raise exceptions if the BulkWrite cannot be setup or fails to
     execute.
+    If ``coalesce`` is ``True`` the packets are merged with the ones of the
+    other coalesced syncs on the bus.
     Only works with Protocol 2.0.
     """
     def __init__(self, **kwargs):
@@ -160,54 +261,111 @@ class DynamixelBulkWriteLoop(BaseSync):
         not in the constructor as this is part of the wrapped execution
         that is produced by :py:class:`BaseThread` class.
         """
-
-        self.__start_address, self.__length, cont = self.get_register_range()
-        if not cont:
-            mess = f'BulkWrite {self.name} requires registers to be contiguous'
-            logger.error(mess)
-            raise RuntimeError(mess)
-        self.gbw = GroupBulkWrite(self.bus.port_handler,
-                                  self.bus.packet_handler)
+        devs = len(self.devices)
+        # header and id, address and length for each device
+        packet_cost = self.bus.instruction_overhead + 5 * devs
+        self.__segments = []
+        for start, length in self.plan_segments(packet_cost=packet_cost,
+                                                byte_cost=devs,
+                                                writable=True):
+            gbw = GroupBulkWrite(self.bus.port_handler,
+                                 self.bus.packet_handler)
+            # the packing plan for each device
+            blocks = self.register_blocks(start, length, fill=True)
+            self.__segments.append((gbw, blocks))
+        logger.debug(f'BulkWrite {self.name} uses {len(self.__segments)} '
+                     f'segment(s)')
+
+    @property
+    def segments(self):
+        """The segments used by the BulkWrite as a list of tuples
+        ``(GroupBulkWrite, blocks)``."""
+        return self.__segments
 
     def atomic(self):
-        """Executes a BulkWrite."""
-        for device in self.devices:
-            data = [0] * self.__length
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                pos = register.address - self.__start_address
-                data[pos: pos + register.size] = device.register_low_endian(
-                    register.int_value, register.size)
-            # addParam
-            result = self.gbw.addParam(device.dev_id, self.__start_address,
-                                       self.__length, data)
-            if not result:      # pragma: no cover
-                logger.error(f'Failed to setup BulkWrite for loop '
-                             f'{self.name} for device {device.name}')
+        """Executes a BulkWrite for each segment with changes. For each device
+        only the range between the first and the last ``dirty`` register is
+        sent and if no register changed no packet is sent."""
+        if self.coalesce:
+            chunks = []
+            for _, blocks in self.__segments:
+                for block in blocks:
+                    dirty_range = block.dirty_range()
+                    if dirty_range:
+                        offset, length = dirty_range
+                        data = memoryview(block.pack())
+                        chunks.append((block, block.start + offset,
+                                       data[offset: offset + length]))
+            if chunks:
+                self.stats.record_traffic(0, sum(len(data)
+                                                 for _, _, data in chunks))
+                self.bus.coalescer.write(self, chunks)
+            return
+        packets = []
+        data_length = 0
+        for gbw, blocks in self.__segments:
+            dirty = []
+            for block in blocks:
+                dirty_range = block.dirty_range()
+                if not dirty_range:
+                    continue
+                offset, length = dirty_range
+                data = memoryview(block.pack())[offset: offset + length]
+                # addParam
+                result = gbw.addParam(block.device.dev_id,
+                                      block.start + offset, length, data)
+                data_length += length
+                if not result:      # pragma: no cover
+                    logger.error(f'Failed to setup BulkWrite for loop '
+                                 f'{self.name} for device '
+                                 f'{block.device.name}')
+                dirty.append(block)
+            if dirty:
+                packets.append((gbw, dirty))
+        if not packets:
+            return
         # execute write
-        if self.bus.can_use():
-            result = self.gbw.txPacket()
+        if self.acquire_bus():
+            results = [gbw.txPacket() for gbw, _ in packets]
             self.bus.stop_using()       # !! as soon as possible
-            error = self.gbw.ph.getTxRxResult(result)
-            logger.debug(f'[bulk write {self.name}], result: {error}')
-            if result != 0:
-                logger.error(f'Failed to execute BulkWrite {self.name}: '
-                             f'cerr={error}')
+            self.stats.record_traffic(len(packets), data_length)
+            for (gbw, dirty), result in zip(packets, results):
+                error = gbw.ph.getTxRxResult(result)
+                logger.debug(f'[bulk write {self.name}], result: {error}')
+                if result != 0:
+                    logger.error(f'Failed to execute BulkWrite {self.name}: '
+                                 f'cerr={error}')
+                    for block in dirty:
+                        block.mark_dirty()
         else:
             logger.error(f'Sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
+            for _, dirty in packets:
+                for block in dirty:
+                    block.mark_dirty()
         # cleanup
-        self.gbw.clearParam()
+        for gbw, _ in packets:
+            gbw.clearParam()
 
 
-class DynamixelBulkReadLoop(BaseSync):
+class DynamixelBulkReadLoop(DynamixelSync):
     """Implements BulkRead as specified in the frequency parameter.
 
     The devices are provided in the `group` parameter and the registers
     in the `registers` as a list of register names. The registers do not
     need to be sequential.
     It will update the `int_value` of each register in every device with
-    the result of the call.
+    the result of the call and publish a
+    :py:class:`~roboglia.base.SyncSnapshot` of the values.
+
+    Depending on the gaps between the registers the loop will either read
+    the whole range or split it in several BulkReads, one for each segment
+    (see :py:meth:`~roboglia.base.BaseSync.plan_segments`). The choice
+    is based on the baud rate, the size of the packet headers and the
+    return delay time of the devices; the chosen segments are available
+    in :py:meth:`~roboglia.base.BaseSync.plan`.
+    If ``coalesce`` is ``True`` the segments are read together with the
+    other coalesced syncs on the bus.
     Will raise exceptions if the BulkRead cannot be setup or fails to
     execute.
     With Protocol 1.0 officially works only with MX devices.
@@ -215,43 +373,76 @@ class DynamixelBulkReadLoop(BaseSync):
 
     def setup(self):
         """Prepares to start the loop."""
-        self.__start_address, self.__length, _ = self.get_register_range()
-        self.gbr = GroupBulkRead(self.bus.port_handler,
-                                 self.bus.packet_handler)
-        for device in self.devices:
-            result = self.gbr.addParam(device.dev_id, self.__start_address,
-                                       self.__length)
-            if result is not True:          # pragma: no cover
-                logger.error(f'Failed to setup BulkRead for loop '
-                             f'{self.name} for device {device.name}')
+        bus = self.bus
+        devs = len(self.devices)
+        delay = max(device.return_delay for device in self.devices)
+        # P2.0: id, address and length for each device
+        # P1.0: one extra byte and id, address, length for each device
+        params = 5 * devs if bus.protocol == 2.0 else 1 + 3 * devs
+        packet_cost = (bus.instruction_overhead + params +
+                       devs * bus.status_overhead) * bus.byte_time + \
+            devs * delay
+        self.__segments = []
+        for start, length in self.plan_segments(packet_cost,
+                                                devs * bus.byte_time):
+            gbr = GroupBulkRead(bus.port_handler, bus.packet_handler)
+            # the decoding plan for each device
+            blocks = self.register_blocks(start, length)
+            for block in blocks:
+                result = gbr.addParam(block.device.dev_id, block.start,
+                                      block.length)
+                if result is not True:          # pragma: no cover
+                    logger.error(f'Failed to setup BulkRead for loop '
+                                 f'{self.name} for device '
+                                 f'{block.device.name}')
+            self.__segments.append((gbr, blocks))
+        self.__data_length = sum(block.length
+                                 for _, blocks in self.__segments
+                                 for block in blocks)
+
+    @property
+    def segments(self):
+        """The segments used by the BulkRead as a list of tuples
+        ``(GroupBulkRead, blocks)``."""
+        return self.__segments
 
     def atomic(self):
-        """Executes a BulkRead."""
+        """Executes a BulkRead for each segment."""
+        if self.coalesce:
+            self.stats.record_traffic(0, self.__data_length)
+            blocks = [block for _, blocks in self.__segments
+                      for block in blocks]
+            # a failed batch must not publish the stale values
+            if self.bus.coalescer.read(self, blocks):
+                self.publish_snapshot()
+            return
         # execute read
-        if not self.bus.can_use():
+        if not self.acquire_bus():
             logger.error(f'Sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
-        else:
-            result = self.gbr.txRxPacket()
-            self.bus.stop_using()       # !! as soon as possible
+            return
+        results = [gbr.txRxPacket() for gbr, _ in self.__segments]
+        self.bus.stop_using()       # !! as soon as possible
+        self.stats.record_traffic(len(self.__segments), self.__data_length)
+        success = True
+        for (gbr, blocks), result in zip(self.__segments, results):
             if result != 0:
-                error = self.gbr.ph.getTxRxResult(result)
+                error = gbr.ph.getTxRxResult(result)
                 logger.error(f'BulkRead {self.name}, cerr={error}')
-            else:
-                # retrieve data
-                for device in self.devices:
-                    for reg_name in self.register_names:
-                        register = getattr(device, reg_name)
-                        if not self.gbr.isAvailable(device.dev_id,
-                                                    register.address,
-                                                    register.size):
-                            logger.error(f'Failed to retrieve data in '
-                                         f'BulkRead {self.name} for '
-                                         f'device {device.name} and '
-                                         f'register {register.name}')
-                        else:
-                            register.int_value = self.gbr.getData(
-                                device.dev_id, register.address, register.size)
+                success = False
+                continue
+            # retrieve data; each response is decoded in one go
+            for block in blocks:
+                # the data is the first item in the SDK's record
+                data = gbr.data_dict[block.device.dev_id][0]
+                if not block.unpack(data):
+                    logger.error(f'Failed to retrieve data in '
+                                 f'BulkRead {self.name} for '
+                                 f'device {block.device.name}')
+                    success = False
+        # a partial read must not publish the stale values
+        if success:
+            self.publish_snapshot()
 
 
 class DynamixelRangeReadLoop(BaseSync):
@@ -268,7 +459,15 @@ class DynamixelRangeReadLoop(BaseSync):
     in the `registers` as a list of register names. The registers do not
     need to be sequential.
     It will update the `int_value` of each register in every device with
-    the result of the call.
+    the result of the call and publish a
+    :py:class:`~roboglia.base.SyncSnapshot` of the values.
+
+    Depending on the gaps between the registers the loop will either read
+    the whole range or split it in several reads for each device, one for
+    each segment (see :py:meth:`~roboglia.base.BaseSync.plan_segments`).
+    The choice is based on the baud rate, the size of the packet headers
+    and the return delay time of the devices; the chosen segments are
+    available in :py:meth:`~roboglia.base.BaseSync.plan`.
     Will raise exceptions if the BulkRead cannot be setup or fails to
     execute.
     """
@@ -276,58 +475,68 @@ class DynamixelRangeReadLoop(BaseSync):
     def setup(self):
         """Prepares to start the loop."""
         self.start_address, self.length, _ = self.get_register_range()
+        bus = self.bus
+        delay = max(device.return_delay for device in self.devices)
+        # address and length
+        params = 4 if bus.protocol == 2.0 else 2
+        packet_cost = (bus.instruction_overhead + params +
+                       bus.status_overhead) * bus.byte_time + delay
+        self.__segments = []
+        for start, length in self.plan_segments(packet_cost, bus.byte_time):
+            # the decoding plan for each device
+            self.__segments.append(self.register_blocks(start, length))
 
     def atomic(self):
         """Executes a RangeRead for all devices."""
         # execute read
-        if not self.bus.can_use():
+        if not self.acquire_bus():
             logger.error(f'Sync "{self.name}" '
                          f'failed to acquire bus "{self.bus.name}"')
             return
 
-        for device in self.devices:
-            # call the function
-            try:
-                res, cerr, derr = self.bus.packet_handler.readTxRx(
-                    self.bus.port_handler, device.dev_id,
-                    self.start_address, self.length)
-            except Exception as e:
-                logger.error(f'Exception raised while reading bus '
-                             f'"{self.name}" device "{device.name}"')
-                logger.error(str(e))
-                continue
-
-            # success call - log DEBUG
-            logger.debug(f'[RangeRead] dev={device.dev_id} '
-                         f'{res} (cerr={cerr}, derr={derr})')
-            # process result
-            if cerr != 0:
-                # communication error
-                err_desc = self.bus.packet_handler.getTxRxResult(cerr)
-                logger.error(f'[RangeRead "{self.name}"] '
-                             f'device "{device.name}", cerr={err_desc}')
-                continue
-
-            if derr != 0:
-                # device error
-                err_desc = self.bus.packet_handler.getRxPacketError(derr)
-                logger.warning(f'Device "{device.name}" responded with a '
-                               f'return error: {err_desc}')
-
-            # process results
-            for reg_name in self.register_names:
-                reg = getattr(device, reg_name)
-                pos = reg.address - self.start_address
-                if reg.size == 1:
-                    value = res[pos]
-                elif reg.size == 2:
-                    value = res[pos] + res[pos + 1] * 256
-                elif reg.size == 4:
-                    value = res[pos] + res[pos + 1] * 256 + \
-                        res[pos + 2] * 65536 + \
-                        res[pos + 3] * 16777216
-                else:
-                    raise NotImplementedError
-                reg.int_value = value
+        success = True
+        for blocks in self.__segments:
+            for block in blocks:
+                if not self.__read_block(block):
+                    success = False
 
         self.bus.stop_using()       # !! as soon as possible
+        # a partial read must not publish the stale values
+        if success:
+            self.publish_snapshot()
+
+    def __read_block(self, block):
+        """Reads the range of one block from the device and decodes it.
+        Returns ``True`` if the block was updated."""
+        device = block.device
+        # call the function
+        try:
+            res, cerr, derr = self.bus.packet_handler.readTxRx(
+                self.bus.port_handler, device.dev_id,
+                block.start, block.length)
+        except Exception as e:
+            logger.error(f'Exception raised while reading bus '
+                         f'"{self.name}" device "{device.name}"')
+            logger.error(str(e))
+            return False
+
+        # success call - log DEBUG
+        logger.debug(f'[RangeRead] dev={device.dev_id} '
+                     f'{res} (cerr={cerr}, derr={derr})')
+        # process result
+        if cerr != 0:
+            # communication error
+            err_desc = self.bus.packet_handler.getTxRxResult(cerr)
+            logger.error(f'[RangeRead "{self.name}"] '
+                         f'device "{device.name}", cerr={err_desc}')
+            return False
+
+        if derr != 0:
+            # device error
+            err_desc = self.bus.packet_handler.getRxPacketError(derr)
+            logger.warning(f'Device "{device.name}" responded with a '
+                           f'return error: {err_desc}')
+
+        # process results
+        self.stats.record_traffic(1, block.length)
+        return block.unpack(res)
@@ -170,9 +170,15 @@ class I2CBus(BaseBus):
     def write(self, reg, value):
         """Depending on the size of the register it calls the corresponding
         write function from ``SMBus``.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the value was written.
         """
         if not self.is_open:
             logger.error(f'attempted to write to a closed bus: {self.name}')
+            return False
 
         dev = reg.device
         if reg.word:
@@ -197,7 +203,8 @@ class I2CBus(BaseBus):
                              f'{self.name} for device {dev.name} and '
                              f'register {reg.name}')
                 logger.error(str(e))
-                return None
+                return False
+        return True
 
     def read_block(self, device, start_address, length):
         """Reads a block of registers of given length.
@@ -250,11 +257,14 @@ class I2CBus(BaseBus):
 
         Returns
         -------
-        ``None``:
-            It intercepts any exceptions and logs them.
+        bool:
+            ``True`` if the data was sent successfully. It intercepts any
+            exceptions and logs them, in that case the return will be
+            ``False``.
         """
         if not self.is_open:
             logger.error(f'attempted to write to a closed bus: {self.name}')
+            return False
 
         try:
             self.__i2cbus.write_i2c_block_data(
@@ -263,6 +273,8 @@ class I2CBus(BaseBus):
             logger.error(f'Failed to execute write block command on I2C bus '
                          f'{self.name} for device {device.name}')
             logger.error(str(e))
+            return False
+        return True
 
 
 class SharedI2CBus(SharedBus):
@@ -27,41 +27,53 @@ class I2CWriteLoop(BaseSync):
     The devices are provided in the `group` parameter and the registers
     in the `registers` as a list of register names.
     It will update from `int_value` of each register for every device.
+    The registers do not need to be contiguous: they are split in segments
+    (see :py:meth:`~roboglia.base.BaseSync.plan_segments`) and a block
+    write is performed for each segment.
     Will log errors and not raise any exceptions.
     """
+    PACKET_COST = 3
+    """The overhead in bytes of a block write (device address, register
+    address, start / stop conditions and acknowledgements)."""
+
     def setup(self):
-        """ Determines the start address and lengths for each bulk write.
+        """ Determines the segments and the packing plans for each device.
         Previously the constructor checked that all registers are
         available in all devices.
         """
-        self.start_address, self.length, cont = self.get_register_range()
-        if not cont:
-            mess = f'WriteLoop {self.name} requires registers to be contiguous'
-            logger.error(mess)
-            raise RuntimeError(mess)
+        self.__blocks = []
+        for start, length in self.plan_segments(self.PACKET_COST,
+                                                writable=True):
+            # the packing plan for each device
+            self.__blocks.extend(self.register_blocks(start, length,
+                                                      fill=True))
 
     def atomic(self):
-        """Executes a SyncWrite."""
-        for device in self.devices:
-            # prepare data
-            data = [0] * self.length
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                pos = register.address - self.start_address
-                if register.size == 1:
-                    data[pos] = register.int_value
-                elif register.size == 2:
-                    data[pos] = register.int_value % 256
-                    data[pos + 1] = register.int_value // 256
-                else:
-                    raise NotImplementedError
-
+        """Executes a SyncWrite. For each device only the range between the
+        first and the last ``dirty`` register is written and devices without
+        changes are skipped."""
+        dirty = []
+        for block in self.__blocks:
+            dirty_range = block.dirty_range()
+            if dirty_range:
+                dirty.append((block, dirty_range))
+        if not dirty:
+            return
+        if not self.acquire_bus():
+            logger.error(f'Sync {self.name} '
+                         f'failed to acquire bus {self.bus.name}')
+            return
+        for block, (offset, length) in dirty:
+            data = memoryview(block.pack())[offset: offset + length]
+            self.stats.record_traffic(1, length)
             # write
             # I2CSharedBus does to handling of exceptions
-            self.bus.write_block(device,
-                                 self.start_address,
-                                 data)
-            logger.debug(f'{self.name} written block data {data}')
+            if self.bus.naked_write_block(block.device, block.start + offset,
+                                          data):
+                logger.debug(f'{self.name} written block data {list(data)}')
+            else:
+                block.mark_dirty()
+        self.bus.stop_using()
 
 
 class I2CReadLoop(BaseSync):
@@ -70,32 +82,49 @@ class I2CReadLoop(BaseSync):
 
     The devices are provided in the `group` parameter and the registers
     in the `registers` as a list of register names.
-    It will update the `int_value` of each register for every device.
+    It will update the `int_value` of each register for every device and
+    publish a :py:class:`~roboglia.base.SyncSnapshot` of the values.
+    Depending on the gaps between the registers the loop will either read
+    the whole range or split it in several block reads, one for each
+    segment (see :py:meth:`~roboglia.base.BaseSync.plan_segments`); the
+    chosen segments are available in
+    :py:meth:`~roboglia.base.BaseSync.plan`.
     Will log errors and not raise any exceptions.
     """
+    PACKET_COST = 4
+    """The overhead in bytes of a block read (device address twice,
+    register address, start / stop conditions and acknowledgements)."""
+
     def setup(self):
-        """ Determines the start address and lengths for each bulk write.
+        """ Determines the segments and the decoding plans for each device.
         Previously the constructor checked that all registers are
         available in all devices.
         """
         self.start_address, self.length, _ = self.get_register_range()
+        self.__blocks = []
+        for start, length in self.plan_segments(self.PACKET_COST):
+            # the decoding plan for each device
+            self.__blocks.extend(self.register_blocks(start, length))
+        self.__data_length = sum(block.length for block in self.__blocks)
 
     def atomic(self):
         """Executes a SyncRead."""
-        for device in self.devices:
+        if not self.acquire_bus():
+            logger.error(f'Sync {self.name} '
+                         f'failed to acquire bus {self.bus.name}')
+            return
+        success = True
+        for block in self.__blocks:
             # read one device
             # I2CSharedBus does to handling of exceptions
-            data = self.bus.read_block(device,
-                                       self.start_address,
-                                       self.length)
+            data = self.bus.naked_read_block(block.device,
+                                             block.start,
+                                             block.length)
             logger.debug(f'{self.name} read block data {data}')
-            if data is not None:
-                for reg_name in self.register_names:
-                    register = getattr(device, reg_name)
-                    pos = register.address - self.start_address
-                    if register.size == 1:
-                        register.int_value = data[pos]
-                    elif register.size == 2:
-                        register.int_value = data[pos] + data[pos + 1] * 256
-                    else:
-                        raise NotImplementedError
+            if data is None or not block.unpack(data):
+                success = False
+        self.bus.stop_using()
+        self.stats.record_traffic(len(self.__blocks), self.__data_length)
+        # a partial read must not publish the stale values
+        if success:
+            self.publish_snapshot()
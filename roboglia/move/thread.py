@@ -107,13 +107,20 @@ class Motion(BaseLoop):
         calculated over a period of time specified by the parameter `review`.
 
     throttle: float
-        Is a float (< 1.0) that is used by the monitoring of
-        execution statistics to adjust the wait time in order to produce
-        the desired processing frequency.
+        Kept for compatibility; not used (see :py:class:`BaseLoop`).
 
     review: float
         The time in [s] to calculate the statistics for the frequency.
 
+    spin: float
+        The time in [s] before each deadline when the loop busy-waits
+        instead of sleeping (see :py:class:`BaseLoop`). Default 0.0.
+
+    overrun: str
+        The policy for executions that take longer than the period:
+        ``skip``, ``catchup`` or ``slip`` (see :py:class:`BaseLoop`).
+        Default ``skip``.
+
     robot: JointManager or subclass
         The robot Joint Manager that controls the moves.
 
@@ -121,10 +128,11 @@ class Motion(BaseLoop):
         The joints used by the motion process.
     """
     def __init__(self, name='MOTION', patience=1.0, frequency=None,
-                 warning=0.90, throttle=0.1, review=1.0, manager=None,
-                 joints=[]):
+                 warning=0.90, throttle=0.1, review=1.0, spin=0.0,
+                 overrun='skip', manager=None, joints=[]):
         super().__init__(name=name, patience=patience, frequency=frequency,
-                         warning=warning, throttle=throttle, review=review)
+                         warning=warning, throttle=throttle, review=review,
+                         spin=spin, overrun=overrun)
         check_not_empty(manager, 'manager', 'motion', self.name, logger)
         self.__manager = manager
         check_not_empty(joints, 'joints', 'motion', self.name, logger)
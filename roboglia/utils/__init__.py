@@ -9,3 +9,7 @@ from .factory import get_registered_class   # noqa F401
 from .factory import registered_classes     # noqa F401
 
 from .extyaml import load_yaml_with_include    # noqa F401
+from .extyaml import load_yaml                 # noqa F401
+from .extyaml import default_cache_dir         # noqa F401
+
+from .aio import run_blocking                  # noqa F401
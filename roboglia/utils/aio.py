@@ -0,0 +1,33 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import functools
+
+
+def run_blocking(function, *args, **kwargs):
+    """Returns an awaitable for the execution of ``function(*args,
+    **kwargs)`` on the default executor of the running event loop, so that
+    a blocking call does not block the loop. It must be called from a
+    coroutine.
+
+    Returns
+    -------
+    asyncio.Future:
+        The future with the result of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(None, functools.partial(function, *args,
+                                                        **kwargs))
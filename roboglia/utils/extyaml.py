@@ -1,9 +1,117 @@
 import yaml
 import os
-import collections
+import collections.abc
+import hashlib
+import logging
+import pickle
 
+logger = logging.getLogger(__name__)
 
-def load_yaml_with_include(file_name):
+CACHE_VERSION = 1
+"""The version of the format of the files in the model cache. Files with a
+different version are ignored."""
+
+_parsed = {}
+# the YAML files parsed in this process: {path: (signature, content)}
+
+
+def default_cache_dir():
+    """Returns the directory used for the persistent cache of the resolved
+    YAML files. The cache is opt-in: the directory is the content of the
+    ``ROBOGLIA_CACHE`` environment variable and if the variable is not
+    defined or is empty the function returns ``None`` (no cache).
+
+    .. warning:: The cache files are pickles and loading them can execute
+        code. The cache directory must only be writable by the user; it is
+        created with permissions ``0o700`` and, on POSIX systems, a
+        directory owned by another user or writable by the group or by
+        others is not used.
+    """
+    return os.environ.get('ROBOGLIA_CACHE') or None
+
+
+def _safe_cache_dir(cache_dir):
+    """Checks that the cache directory is private to the user (on POSIX
+    systems); the files in it are unpickled."""
+    if os.name != 'posix':                      # pragma: no cover
+        return True
+    try:
+        stat = os.stat(cache_dir)
+    except OSError:
+        return False
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        logger.warning(f'cache directory {cache_dir} is not private to the '
+                       f'user; the cache is not used')
+        return False
+    return True
+
+
+def _signature(file_name):
+    """The modification time and the size of a file."""
+    stat = os.stat(file_name)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_yaml(file_name):
+    """Loads a YAML file safely. Each file is parsed only once in a
+    process; subsequent calls return the same dictionary for as long as the
+    file is not changed on disk, therefore the result must not be modified
+    by the caller.
+    """
+    path = os.path.normpath(os.path.abspath(file_name))
+    signature = _signature(path)
+    entry = _parsed.get(path)
+    if entry is None or entry[0] != signature:
+        with open(path, 'r') as f:
+            entry = (signature, yaml.safe_load(f))
+        _parsed[path] = entry
+    return entry[1]
+
+
+def _cache_file(file_name, cache_dir):
+    """The file in the cache for a YAML file."""
+    key = hashlib.sha1(os.path.abspath(file_name).encode()).hexdigest()
+    return os.path.join(cache_dir, key + '.pickle')
+
+
+def _load_cached(file_name, cache_dir):
+    """Returns the resolved content of a YAML file from the cache or
+    ``None`` if it is missing or any of the source files has changed."""
+    if not _safe_cache_dir(cache_dir):
+        return None
+    try:
+        with open(_cache_file(file_name, cache_dir), 'rb') as f:
+            cached = pickle.load(f)
+        if cached['version'] != CACHE_VERSION:
+            return None
+        for path, signature in cached['sources'].items():
+            if _signature(path) != signature:
+                return None
+        return cached['data']
+    except Exception:
+        # missing, unreadable or corrupted cache file; will be recreated
+        return None
+
+
+def _store_cached(file_name, cache_dir, sources, data):
+    """Writes the resolved content of a YAML file in the cache."""
+    cache_file = _cache_file(file_name, cache_dir)
+    temp_file = f'{cache_file}.{os.getpid()}'
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        if not _safe_cache_dir(cache_dir):
+            return
+        with open(temp_file, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION,
+                         'sources': sources,
+                         'data': data}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except (OSError, pickle.PicklingError) as e:
+        logger.warning(f'could not write the cache for {file_name} '
+                       f'in {cache_dir}: {e}')
+
+
+def load_yaml_with_include(file_name, cache_dir=None):
     """Loads a YAML file safely and returns a dictionary with the configuration
     data.
     Suppports ``include`` directive. If there is an ``include`` key at the top
@@ -13,23 +121,37 @@ def load_yaml_with_include(file_name):
     the content of the original file is merged in the same manner in the
     final dictionary. The ``include`` statements are removed from the final
     dictionary.
+
+    The files are parsed with :py:func:`load_yaml`, so that files included
+    by several others are parsed only once. If ``cache_dir`` is provided
+    the resolved dictionary is also stored in that directory and reused in
+    other processes for as long as the file and all its includes have the
+    same modification time and size. See :py:func:`default_cache_dir` for
+    the security requirements of the directory.
     """
+    if cache_dir:
+        data = _load_cached(file_name, cache_dir)
+        if data is not None:
+            return data
     base_path = os.path.dirname(file_name)
-    with open(file_name, 'r') as f:
-        main_dict = yaml.safe_load(f)
-    if 'include' not in main_dict:
-        return main_dict
-    else:
-        full_dict = {}
-        includes = main_dict['include']
-        del main_dict['include']
-        for include_file in includes:
-            include_path = os.path.join(base_path, include_file)
-            norm_include_path = os.path.normpath(include_path)
-            with open(norm_include_path, 'r') as f:
-                include_dict = yaml.safe_load(f)
-                deep_update(source=full_dict, overrides=include_dict)
-        return deep_update(source=full_dict, overrides=main_dict)
+    paths = []
+    main_dict = load_yaml(file_name)
+    paths.append(os.path.normpath(os.path.abspath(file_name)))
+    full_dict = {}
+    for include_file in main_dict.get('include', []):
+        include_path = os.path.join(base_path, include_file)
+        norm_include_path = os.path.normpath(include_path)
+        include_dict = load_yaml(norm_include_path)
+        paths.append(os.path.normpath(os.path.abspath(norm_include_path)))
+        deep_update(source=full_dict, overrides=include_dict)
+    # the parsed files are shared; the merge creates new dictionaries
+    main_dict = {key: value for key, value in main_dict.items()
+                 if key != 'include'}
+    data = deep_update(source=full_dict, overrides=main_dict)
+    if cache_dir:
+        sources = {path: _parsed[path][0] for path in paths}
+        _store_cached(file_name, cache_dir, sources, data)
+    return data
 
 
 def deep_update(source, overrides):
@@ -38,7 +160,7 @@ def deep_update(source, overrides):
     Modify ``source`` in place.
     """
     for k, v in overrides.items():
-        if isinstance(v, collections.Mapping) and v:
+        if isinstance(v, collections.abc.Mapping) and v:
             returned = deep_update(source.get(k, {}), v)
             source[k] = returned
         else:
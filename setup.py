@@ -38,6 +38,7 @@ manually as needed.
  - if you want to use Dynamixel servos you need to install dynamixel_sdk
  - if you want to use I2C devices you need to install SMBus
  - if you want to use SPI devices you need to install spidev
+ - if you want to use the batch conversions you need to install numpy
 """
 install_requires = ['pyyaml']
 
@@ -45,7 +46,8 @@ extras = {
     "spi": ['spidev'],
     "i2c": ['smbus2'],
     "dynamixel": ['dynamixel-sdk'],
-    "all": ['spidev','smbus2','dynamixel-sdk']
+    "numpy": ['numpy'],
+    "all": ['spidev','smbus2','dynamixel-sdk','numpy']
 }
 
 if sys.version_info < (3, 0):
@@ -1,20 +1,37 @@
 import pytest
+import asyncio
 import logging
 import time
+import threading
 import yaml
 from math import nan
 
 from roboglia.utils import register_class, unregister_class, registered_classes, get_registered_class
 from roboglia.utils import check_key, check_options, check_type, check_not_empty
+from roboglia.utils import load_yaml_with_include, load_yaml, default_cache_dir
+import roboglia.utils.extyaml
+import roboglia.base.thread
+import roboglia.dynamixel.coalesce
+import roboglia.dynamixel.sync
 
 from roboglia.base import BaseRobot, BaseDevice, BaseBus, BaseRegister
 from roboglia.base import RegisterWithConversion, RegisterWithThreshold
 from roboglia.base import RegisterWithMapping
-from roboglia.base import BaseThread
+from roboglia.base import RegisterDescriptor
+from roboglia.base import BaseThread, BaseLoop
 from roboglia.base import PVL, PVLList
 from roboglia.base import SharedFileBus
+from roboglia.base import FileBus, FileBusJournal
+from roboglia.base import RegisterBlock
+from roboglia.base import BusScheduler
+from roboglia.base import LoopStats
+from roboglia.base import SyncSnapshot
+from roboglia.base import BaseReadSync
+from roboglia.base import BatchConverter
+from roboglia.base import AsyncRobot
 
 from roboglia.dynamixel import DynamixelBus
+from roboglia.dynamixel import DynamixelCoalescer
 
 from roboglia.i2c import SharedI2CBus
 
@@ -26,6 +43,13 @@ from roboglia.move import Script
 #                     level=60)    # silent
 logger = logging.getLogger(__name__)
 
+
+@pytest.fixture(autouse=True)
+def no_model_cache(monkeypatch):
+    # the tests must not use or write the user's persistent model cache
+    monkeypatch.delenv('ROBOGLIA_CACHE', raising=False)
+
+
 class TestManualRobot:
 
     def test_manual_robot(self):
@@ -251,6 +275,288 @@ class TestMockRobot:
         assert read_sync.review == 1.0      # default
         assert read_sync.frequency == 100
 
+    def test_loop_deadlines(self, monkeypatch):
+
+        class Clock():
+            # a simulated time source: sleeping advances it exactly
+            def __init__(self):
+                self.now = 0.0
+
+            def perf_counter(self):
+                return self.now
+
+            def sleep(self, duration):
+                self.now += duration
+
+        class Counter(BaseLoop):
+            def __init__(self, clock, delays=[], delay=0.125, **kwargs):
+                super().__init__(**kwargs)
+                self.clock = clock
+                self.delays = list(delays)
+                self.delay = delay
+                self.starts = []
+                self.done = threading.Event()
+
+            def atomic(self):
+                self.starts.append(self.clock.now)
+                if self.delays:
+                    self.clock.sleep(self.delays.pop(0))
+                else:
+                    self.clock.sleep(self.delay)
+                if self.clock.now >= 2.0:
+                    self.stop()
+
+            def teardown(self):
+                self.done.set()
+
+        def run(**kwargs):
+            clock = Clock()
+            monkeypatch.setattr(roboglia.base.thread, 'time', clock)
+            loop = Counter(clock, frequency=4.0, **kwargs)
+            # the simulated loop can finish before start() would see it
+            loop.start(wait=False)
+            assert loop.done.wait(5.0)
+            return loop
+
+        assert Counter(Clock(), name='idle', frequency=4.0).jitter() == {}
+        loop = run(name='counter')
+        assert loop.starts == [i * 0.25 for i in range(9)]
+        assert loop.overruns == 0
+        jitter = loop.jitter([50, 99])
+        assert jitter == {50: 0.0, 99: 0.0}
+        # the first execution overruns by one and a half periods
+        loop = run(name='skip', delays=[0.625], overrun='skip')
+        assert loop.overrun == 'skip'
+        # skip keeps the schedule and drops the two missed executions
+        assert loop.starts == [0.0, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0]
+        assert loop.overruns == 1
+        assert loop.skipped == 2
+        loop = run(name='catchup', delays=[0.625], overrun='catchup')
+        # catchup runs back-to-back until it is again on schedule
+        assert loop.starts == [0.0, 0.625, 0.75, 0.875, 1.0,
+                               1.25, 1.5, 1.75, 2.0]
+        assert loop.overruns == 3
+        assert loop.skipped == 0
+        loop = run(name='slip', delays=[0.625], overrun='slip')
+        # slip shifts the schedule to the end of the late execution
+        assert loop.starts == [0.0, 0.625, 0.875, 1.125, 1.375,
+                               1.625, 1.875]
+        assert loop.overruns == 1
+        assert loop.skipped == 0
+        with pytest.raises(ValueError):
+            Counter(Clock(), name='wrong', frequency=10.0, overrun='wait')
+
+    def test_loop_stats(self, mock_robot):
+        read_sync = mock_robot.syncs['read']
+        assert isinstance(read_sync.stats, LoopStats)
+        assert isinstance(mock_robot.manager.stats, LoopStats)
+        read_sync.start()
+        time.sleep(0.5)
+        read_sync.stop()
+        stats = read_sync.stats
+        assert stats.executions > 0
+        assert 0 < stats.frequency <= read_sync.frequency * 1.1
+        assert sum(count for _, count in stats.histogram) == \
+            stats.executions
+        assert stats.mean_duration <= stats.max_duration
+        assert stats.packets_per_second > 0
+        assert stats.bytes_per_second >= stats.packets_per_second
+        assert stats.bus_wait <= stats.max_bus_wait
+        snapshot = stats.snapshot()
+        assert snapshot['executions'] == stats.executions
+        assert set(snapshot['jitter'].keys()) == {50, 90, 99}
+        stats.reset()
+        assert stats.executions == 0
+        assert stats.histogram[0] == (0.0001, 0)
+        assert stats.jitter() == {}
+
+    def test_sync_snapshot(self, mock_robot, monkeypatch):
+        read_sync = mock_robot.syncs['read']
+        read_sync.start()
+        time.sleep(0.2)
+        snapshot = read_sync.snapshot
+        time.sleep(0.1)
+        read_sync.stop()
+        assert isinstance(snapshot, SyncSnapshot)
+        assert read_sync.snapshot.epoch > snapshot.epoch > 0
+        assert snapshot.registers == read_sync.all_registers
+        reg = read_sync.all_registers[0]
+        assert reg in snapshot
+        value = snapshot[reg]
+        assert snapshot.value(reg) == reg.value_to_external(value)
+        # later changes do not alter a published snapshot
+        reg.int_value = value + 1
+        assert snapshot[reg] == value
+        assert 'epoch' in repr(snapshot)
+        # a partial read does not publish a new snapshot
+        epoch = read_sync.snapshot.epoch
+        bus = read_sync.bus
+        read = bus.naked_read
+        monkeypatch.setattr(bus, 'naked_read',
+                            lambda reg: None if reg is reg_failed
+                            else read(reg))
+        reg_failed = read_sync.all_registers[-1]
+        read_sync.atomic()
+        assert read_sync.snapshot.epoch == epoch
+
+    def test_sync_register_claims(self, mock_robot, caplog):
+        read_sync = mock_robot.syncs['read']
+        other = BaseReadSync(name='other', frequency=100.0,
+                             group=set(read_sync.devices),
+                             registers=['current_pos'])
+        reg = read_sync.all_registers[0]
+        read_sync.start()
+        assert reg.owner is read_sync
+        assert reg.sync
+        caplog.clear()
+        assert not reg.claim(other)
+        assert 'already synced by read' in caplog.text
+        # registers cannot be flagged directly
+        caplog.clear()
+        reg.sync = False
+        assert reg.sync
+        assert len(caplog.records) == 1
+        # only the owner can release
+        assert not reg.release(other)
+        read_sync.stop()
+        assert reg.owner is None
+        assert not reg.sync
+        assert reg.claim(other)
+        assert reg.release(other)
+
+    def test_register_max_age(self, mock_robot):
+        dev = mock_robot.devices['d03']
+        reg = dev.current_voltage
+        assert reg.max_age == BaseRegister.default_max_age == 0
+        reg.value
+        reg.value
+        assert reg.cache_hits == 0
+        assert reg.cache_misses >= 2
+        misses = reg.cache_misses
+        BaseRegister.default_max_age = 10.0
+        try:
+            reg.value
+            reg.value
+            assert reg.cache_hits == 2
+            assert reg.cache_misses == misses
+            reg.invalidate()
+            reg.value
+            assert reg.cache_misses == misses + 1
+            assert dev.cache_stats()[0] >= 2
+        finally:
+            BaseRegister.default_max_age = 0.0
+        assert reg.max_age == 0
+
+    def test_register_dirty(self, mock_robot):
+        reg = mock_robot.devices['d01'].desired_pos
+        reg.read()
+        assert not reg.dirty
+        reg.int_value = reg.int_value
+        assert not reg.dirty
+        reg.int_value = reg.int_value + 1
+        assert reg.dirty
+        reg.read()
+        assert not reg.dirty
+
+    def test_write_sync_dirty(self, mock_robot):
+        write_sync = mock_robot.syncs['write']
+        write_sync.start()
+        assert write_sync.dirty_devices() == []
+        dev = mock_robot.devices['d02']
+        dev.desired_load.int_value = dev.desired_load.int_value + 1
+        dirty = write_sync.dirty_devices(trim=True)
+        assert len(dirty) == 1
+        assert dirty[0][0] == dev
+        assert dirty[0][1] == [dev.desired_load]
+        time.sleep(0.1)
+        assert not dev.desired_load.dirty
+        assert write_sync.dirty_devices() == []
+        write_sync.stop()
+
+    def test_read_refresh_not_dirty(self, mock_robot):
+        read_sync = mock_robot.syncs['read']
+        dev = mock_robot.devices['d01']
+        dev.current_pos.dirty = False
+        mock_robot.buses['busA'].naked_read = lambda reg: 42
+        read_sync.atomic()
+        assert dev.current_pos.int_value == 42
+        assert not dev.current_pos.dirty
+        # blocks decoded from the device are not dirty either
+        block = RegisterBlock([dev.desired_pos])
+        assert block.unpack(bytes([0x34, 0x12]))
+        assert dev.desired_pos.int_value == 0x1234
+        assert not dev.desired_pos.dirty
+
+    def test_write_sync_failed_write(self, mock_robot):
+        write_sync = mock_robot.syncs['write']
+        bus = mock_robot.buses['busA']
+        dev = mock_robot.devices['d02']
+        dev.desired_load.int_value = dev.desired_load.int_value + 1
+        bus.naked_write = lambda reg, value: False
+        write_sync.atomic()
+        assert dev.desired_load.dirty
+        del bus.naked_write
+        write_sync.atomic()
+        assert not dev.desired_load.dirty
+
+    def test_register_block_pack(self, dummy_device):
+        regs = [dummy_device.desired_load, dummy_device.desired_pos,
+                dummy_device.enable_device]
+        block = RegisterBlock(regs)
+        assert block.start == 30
+        assert block.length == 31
+        assert block.registers == [dummy_device.desired_pos,
+                                   dummy_device.desired_load,
+                                   dummy_device.enable_device]
+        dummy_device.desired_pos.int_value = 0x1234
+        dummy_device.desired_load.int_value = 0x0102
+        dummy_device.enable_device.int_value = 1
+        assert block.dirty_range() == (0, 31)
+        data = block.pack()
+        assert data is block.buffer
+        assert data[0:2] == bytes([0x34, 0x12])
+        assert data[20:22] == bytes([0x02, 0x01])
+        assert data[30] == 1
+        assert not block.dirty
+        assert block.dirty_range() is None
+        dummy_device.desired_load.int_value = 0x0201
+        assert block.dirty_range() == (20, 2)
+        block.mark_dirty()
+        assert dummy_device.desired_pos.dirty
+        with pytest.raises(ValueError):
+            RegisterBlock(regs, start=40)
+
+    def test_register_block_unpack(self, dummy_device, caplog):
+        regs = [dummy_device.desired_pos, dummy_device.desired_load,
+                dummy_device.enable_device]
+        block = RegisterBlock(regs, start=30, length=32)
+        data = bytearray(32)
+        data[0:2] = bytes([0x34, 0x02])
+        data[20:22] = bytes([0x02, 0x01])
+        data[30] = 1
+        assert block.unpack(list(data))
+        assert dummy_device.desired_pos.int_value == 0x0234
+        assert dummy_device.desired_load.int_value == 0x0102
+        assert dummy_device.enable_device.int_value == 1
+        # offset
+        assert block.unpack(bytes(2) + data, offset=2)
+        # short data
+        caplog.clear()
+        assert not block.unpack(data[:20])
+        assert 'expected 32' in caplog.text
+
+    def test_register_block_mixed_order(self, dummy_device):
+        reg_lh = BaseRegister(name='lh', device=dummy_device, address=100,
+                              size=2, maxim=65535, access='RW')
+        reg_hl = BaseRegister(name='hl', device=dummy_device, address=102,
+                              size=2, maxim=65535, access='RW', order='HL')
+        block = RegisterBlock([reg_hl, reg_lh])
+        assert block.unpack([0x34, 0x12, 0x12, 0x34])
+        assert reg_lh.int_value == 0x1234
+        assert reg_hl.int_value == 0x1234
+        reg_hl.int_value = 0x0102
+        assert block.pack() == bytearray([0x34, 0x12, 0x01, 0x02])
+
     def test_sync_with_closed_bus(self, mock_robot, caplog):
         write_sync = mock_robot.syncs['write']
         assert write_sync.stopped
@@ -376,6 +682,53 @@ class TestMockRobot:
         bus.stop_using()
         mock_robot.stop()
 
+    def test_bus_scheduler(self):
+        scheduler = BusScheduler()
+        assert scheduler.acquire()
+        order = []
+
+        def user(name, priority, deadline=None):
+            if scheduler.acquire(priority=priority, deadline=deadline,
+                                 timeout=2.0):
+                order.append(name)
+                scheduler.release()
+
+        now = time.perf_counter()
+        threads = [threading.Thread(target=user, args=args) for args in
+                   [('low', 0), ('high', 5), ('late', 5, now + 0.5),
+                    ('early', 5, now + 0.1)]]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        assert scheduler.waiting == 4
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        assert order == ['early', 'late', 'high', 'low']
+        assert scheduler.granted == 5
+        # 'early' was granted after its deadline
+        assert scheduler.missed_deadlines == 1
+        # timeout
+        assert scheduler.acquire()
+        assert not scheduler.acquire(deadline=time.perf_counter(),
+                                     timeout=0.1)
+        assert scheduler.missed_deadlines == 2
+        scheduler.release()
+        scheduler.reset_statistics()
+        assert scheduler.granted == 0
+
+    def test_bus_with_scheduler(self, caplog):
+        bus = SharedFileBus(name='busS', robot='robot', port='/tmp/busS.log',
+                            scheduler=True, priority=2)
+        assert isinstance(bus.scheduler, BusScheduler)
+        assert bus.lock is bus.scheduler
+        assert bus.priority == 2
+        assert bus.can_use(priority=5, deadline=time.perf_counter() + 1)
+        caplog.clear()
+        bus.write(None, 10)
+        assert 'failed to acquire bus busS' in caplog.text
+        bus.stop_using()
+
     def test_bus_small_branches(self, mock_robot, caplog):
         bus = mock_robot.buses['busA']
         # close bus used by syncs
@@ -401,6 +754,215 @@ class TestMockRobot:
         # timeout
         assert bus.timeout == 0.5
 
+    def test_bus_worker(self):
+        with open('tests/dummy_robot.yml', 'r') as f:
+            init = yaml.load(f, Loader=yaml.FullLoader)['dummy']
+        for bus_init in init['buses'].values():
+            bus_init['worker'] = True
+            bus_init['auto'] = True
+        robot = BaseRobot(**init)
+        busA, busB = robot.buses['busA'], robot.buses['busB']
+        assert busA.worker
+        name = busA.submit(lambda: threading.current_thread().name).result()
+        assert name.startswith('busA-io')
+        # functions are executed in the order submitted
+        order = []
+        futures = [busA.submit(order.append, i) for i in range(5)]
+        assert [future.result() for future in futures] == [None] * 5
+        assert order == list(range(5))
+        # exceptions are passed to the future
+        with pytest.raises(ZeroDivisionError):
+            busA.submit(lambda: 1 / 0).result()
+        # the start and stop are performed on the workers of the buses
+        threads = {}
+        robot.for_each_bus(
+            lambda bus: threads.update({bus.name: threading.current_thread()}),
+            [(busA, busA), (busB, busB)])
+        assert threads['busA'].name.startswith('busA-io')
+        assert threads['busB'].name.startswith('busB-io')
+        robot.start()
+        assert busA.is_open and busB.is_open
+        robot.stop()
+        assert not busA.is_open and not busB.is_open
+        # without a worker the function runs in the caller
+        bus = SharedFileBus(name='busC', robot=robot, port='/tmp/busC.log')
+        assert not bus.worker
+        assert bus.submit(threading.current_thread).result() is \
+            threading.current_thread()
+
+    @staticmethod
+    def spread_robot_init(sync_class, worker=False):
+        with open('tests/dummy_robot.yml', 'r') as f:
+            init = yaml.load(f, Loader=yaml.FullLoader)['dummy']
+        for bus_init in init['buses'].values():
+            bus_init['auto'] = True
+            bus_init['worker'] = worker
+        init['groups']['spread'] = {'devices': ['d01', 'd02', 'd04']}
+        init['syncs'] = {'read': {
+            'class': sync_class, 'sync_class': 'BaseReadSync',
+            'frequency': 50.0, 'group': 'spread',
+            'registers': ['current_pos', 'current_speed']}}
+        return init
+
+    @pytest.mark.parametrize('worker', [False, True])
+    def test_group_sync(self, worker):
+        robot = BaseRobot(**self.spread_robot_init('GroupSync', worker))
+        sync = robot.syncs['read']
+        assert sync.bus is None
+        assert sorted(bus.name for bus in sync.buses) == ['busA', 'busB']
+        assert len(sync.devices) == 3
+        assert len(sync.all_registers) == 6
+        robot.start()
+        time.sleep(0.2)
+        assert sync.running
+        assert all(reg.owner in sync.syncs for reg in sync.all_registers)
+        sync.stop()
+        assert all(reg.owner is None for reg in sync.all_registers)
+        snapshot = sync.snapshot
+        assert snapshot is not None
+        assert set(snapshot.registers) == set(sync.all_registers)
+        for reg in sync.all_registers:
+            assert snapshot[reg] == reg.int_value
+        # the group publishes only when every bus was read
+        sync.setup()
+        epoch = sync.snapshot.epoch
+        sync.atomic()
+        assert sync.snapshot.epoch == epoch + 1
+        sync.syncs[1].atomic = lambda: None
+        sync.atomic()
+        assert sync.snapshot.epoch == epoch + 1
+        sync.teardown()
+        robot.stop()
+        # a failing sub-sync does not leave the others running
+        finished = []
+
+        def fail():
+            raise RuntimeError('sub-sync failed')
+
+        def slow():
+            time.sleep(0.1)
+            finished.append(True)
+
+        sync.syncs[0].atomic = fail
+        sync.syncs[1].atomic = slow
+        sync.setup()
+        with pytest.raises(RuntimeError):
+            sync.atomic()
+        assert finished == [True]
+        sync.teardown()
+        # multi-bus groups are still rejected by the plain syncs
+        init = self.spread_robot_init('BaseReadSync')
+        del init['syncs']['read']['sync_class']
+        with pytest.raises(ValueError):
+            BaseRobot(**init)
+
+    def test_async_robot(self):
+        robot = AsyncRobot.from_yaml('tests/dummy_robot.yml')
+        read, write = robot.syncs['read'], robot.syncs['write']
+        device = robot.robot.devices['d01']
+
+        class Stream():
+            name = 'behaviour'
+
+        async def behaviour():
+            await robot.start()
+            assert read.running and not write.running
+            assert not read.sync.started
+            assert device.current_pos.owner is read.sync
+            await asyncio.sleep(0.1)
+            assert read.sync.stats.executions > 2
+            assert read.sync.snapshot is not None
+            # devices and buses
+            await device.awrite('delay', 50.0)
+            assert await device.aread('delay') == 50.0
+            assert await device.bus.aread(device.delay) == \
+                device.delay.int_value
+            # joints
+            pvl = await robot.joint_value('pan')
+            assert pvl == robot.joints['pan'].value
+            assert await robot.submit(Stream(), {'pan': (10,)})
+            assert await robot.stop_submit(Stream())
+            await robot.stop()
+            assert not read.running
+            assert device.current_pos.owner is None
+            assert not device.bus.is_open
+
+        asyncio.run(behaviour())
+
+    def test_async_sync_stop_waits(self):
+        robot = AsyncRobot.from_yaml('tests/dummy_robot.yml')
+        read = robot.syncs['read']
+        events = []
+        atomic, teardown = read.sync.atomic, read.sync.teardown
+
+        def slow_atomic():
+            events.append('start')
+            time.sleep(0.2)
+            atomic()
+            events.append('done')
+
+        def logged_teardown():
+            events.append('teardown')
+            teardown()
+
+        async def behaviour():
+            await robot.start()
+            read.sync.atomic = slow_atomic
+            read.sync.teardown = logged_teardown
+            while 'start' not in events:
+                await asyncio.sleep(0.01)
+            # the cleanup does not race the execution in progress
+            await read.stop()
+            assert events == ['start', 'done', 'teardown']
+            await robot.stop()
+
+        asyncio.run(behaviour())
+
+    def test_file_bus_journal(self, tmp_path):
+        journal_file = str(tmp_path / 'busA.jrn')
+        with open('tests/dummy_robot.yml', 'r') as f:
+            init = yaml.load(f, Loader=yaml.FullLoader)['dummy']
+        init['buses']['busA']['journal'] = True
+        init['buses']['busA']['port'] = journal_file
+        robot = BaseRobot(**init)
+        bus = robot.buses['busA']
+        assert bus.journal
+        robot.start()
+        device = robot.devices['d01']
+        for value in [10, 20, 30]:
+            device.delay.value = value
+        # non-integer internal values are rounded
+        assert bus.write(device.delay, 7.6)
+        assert bus.write(device.delay, 15)
+        # a quiet bus is flushed by the timer
+        time.sleep(1.2)
+        assert list(FileBusJournal(journal_file))[-1][1:] == \
+            (1, device.delay.address, 15)
+        robot.stop()
+        journal = FileBusJournal(journal_file)
+        records = [record for record in journal
+                   if record[1:3] == (1, device.delay.address)]
+        assert [record[3] for record in records][-5:] == [5, 10, 15, 8, 15]
+        assert journal.values()[(1, device.delay.address)] == 15
+        assert 'written 15 in register "delay" (20) of device "d01" (1)' \
+            in journal.render(robot)
+        assert 'written 15 in register (20) of device (1)' in \
+            journal.render()
+        # replay in a new bus
+        replay = FileBus(name='replay', port=str(tmp_path / 'replay.log'))
+        assert replay.replay(journal_file) == len(list(journal))
+        replay.open()
+        reg = BaseRegister(name='delay', device=device, address=20)
+        assert replay.read(reg) == 15
+        replay.close()
+        # incomplete records are ignored and other files rejected
+        count = len(list(journal))
+        with open(journal_file, 'ab') as f:
+            f.write(b'123')
+        assert len(list(FileBusJournal(journal_file))) == count
+        with pytest.raises(ValueError):
+            FileBusJournal('tests/dummy_robot.yml')
+
     def test_thread_crash(self):
         class CrashAtRun(BaseThread):
             def run(self):
@@ -529,6 +1091,42 @@ class TestUtilsChecks:
         assert 'custom' in str(excinfo.value)
 
 
+class TestUtilsYaml:
+
+    def test_load_yaml_with_include_cache(self, tmp_path, monkeypatch):
+        common = tmp_path / 'common.yml'
+        common.write_text('registers:\n  a: {address: 1}\n  b: {address: 2}\n')
+        model = tmp_path / 'model.yml'
+        model.write_text('include: [common.yml]\n'
+                         'registers:\n  b: {address: 3}\n')
+        cache_dir = str(tmp_path / 'cache')
+        data = load_yaml_with_include(str(model), cache_dir)
+        assert 'include' not in data
+        assert data['registers'] == {'a': {'address': 1}, 'b': {'address': 3}}
+        # the included files are parsed only once in a process
+        assert load_yaml(str(common)) is load_yaml(str(common))
+        assert load_yaml(str(common))['registers']['b'] == {'address': 2}
+        # the second load comes from the cache, without parsing
+        with monkeypatch.context() as m:
+            m.setattr(roboglia.utils.extyaml, 'load_yaml', None)
+            assert load_yaml_with_include(str(model), cache_dir) == data
+        # changing an include invalidates the cache
+        common.write_text('registers:\n  a: {address: 5}\n')
+        data = load_yaml_with_include(str(model), cache_dir)
+        assert data['registers'] == {'a': {'address': 5}, 'b': {'address': 3}}
+        # the persistent cache is opt-in
+        assert default_cache_dir() is None
+        monkeypatch.setenv('ROBOGLIA_CACHE', '')
+        assert default_cache_dir() is None
+        monkeypatch.setenv('ROBOGLIA_CACHE', cache_dir)
+        assert default_cache_dir() == cache_dir
+        # a cache directory writable by others is not used
+        (tmp_path / 'cache').chmod(0o777)
+        with monkeypatch.context() as m:
+            m.setattr(roboglia.utils.extyaml, 'pickle', None)
+            assert load_yaml_with_include(str(model), cache_dir) == data
+
+
 class TestDynamixelRobot:
 
     @pytest.fixture
@@ -667,6 +1265,425 @@ class TestDynamixelRobot:
         time.sleep(1)
         robot.stop()
 
+    def test_dynamixel_syncwrite_dirty(self, mock_robot_init):
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        robot.start()
+        sync = robot.syncs['syncwrite']
+        sync.start()
+        dev = robot.devices['d12']
+        dev.goal_position_deg.value = dev.goal_position_deg.value + 5
+        assert dev.goal_position_deg.dirty
+        time.sleep(0.5)
+        # comm errors are re-flagged and retried
+        for _ in range(10):
+            if not dev.goal_position_deg.dirty:
+                break
+            time.sleep(0.2)
+        assert not dev.goal_position_deg.dirty
+        assert sync.dirty_devices() == []
+        robot.stop()
+
+    def test_dynamixel_bulkwrite_dirty(self, mock_robot_init):
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        robot.start()
+        sync = robot.syncs['bulkwrite']
+        sync.start()
+        dev = robot.devices['d11']
+        dev.p_gain.value = dev.p_gain.value + 1
+        dirty = sync.dirty_devices(trim=True)
+        assert dirty == [(dev, [dev.p_gain])]
+        time.sleep(0.5)
+        for _ in range(10):
+            if not dev.p_gain.dirty:
+                break
+            time.sleep(0.2)
+        assert not dev.p_gain.dirty
+        robot.stop()
+
+    def test_dynamixel_syncwrite_segments(self, mock_robot_init):
+        syncs = mock_robot_init['dynamixel']['syncs']
+        syncs['syncwrite']['registers'] = ['d_gain', 'goal_position_deg',
+                                           'torque_limit']
+        syncs['bulkwrite']['registers'] = ['led', 'goal_position_deg']
+        syncs['syncread']['registers'] = ['i_gain', 'p_gain']
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        robot.start()
+        sync = robot.syncs['syncwrite']
+        # i_gain and p_gain are not kept current by another sync
+        assert sync.plan_segments(16, 2, writable=True) == \
+            [(27, 1), (30, 2), (35, 2)]
+        robot.syncs['syncread'].start()
+        # i_gain and p_gain are carried, 34 is not a register
+        assert sync.plan_segments(16, 2, writable=True) == [(27, 5), (35, 2)]
+        # too expensive to carry
+        assert sync.plan_segments(1, 2, writable=True) == \
+            [(27, 1), (30, 2), (35, 2)]
+        sync.start()
+        assert len(sync.segments) == 2
+        _, blocks = sync.segments[0]
+        dev = robot.devices['d11']
+        block = [block for block in blocks if block.device == dev][0]
+        assert block.registers == [dev.d_gain, dev.i_gain, dev.p_gain,
+                                       dev.goal_position_deg]
+        dev.torque_limit.value = dev.torque_limit.value / 2
+        for _ in range(10):
+            time.sleep(0.2)
+            if not dev.torque_limit.dirty:
+                break
+        assert not dev.torque_limit.dirty
+        sync.stop()
+        sync = robot.syncs['bulkwrite']
+        sync.start()
+        assert len(sync.segments) == 2
+        dev.led.value = not dev.led.value
+        for _ in range(10):
+            time.sleep(0.2)
+            if not dev.led.dirty:
+                break
+        assert not dev.led.dirty
+        robot.stop()
+
+    def test_dynamixel_read_plan(self, mock_robot_init, monkeypatch):
+        syncs = mock_robot_init['dynamixel']['syncs']
+        syncs['rangeread']['registers'] = ['model_number', 'punch']
+        syncs['bulkread']['registers'] = ['present_position_deg',
+                                          'hardware_error']
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        robot.start()
+        dev = robot.devices['d11']
+        assert dev.return_delay == 0.0005
+        sync = robot.syncs['rangeread']
+        assert sync.plan is None
+        sync.start()
+        # 49 bytes gap are more expensive than a new read
+        assert sync.plan == [(0, 2), (51, 2)]
+        time.sleep(0.3)
+        sync.stop()
+        assert sync.stats.snapshot()['plan'] == [(0, 2), (51, 2)]
+        sync = robot.syncs['bulkread']
+        sync.start()
+        # 10 bytes gap are cheaper than a new bulk read
+        assert sync.plan == [(37, 14)]
+        assert len(sync.segments) == 1
+        time.sleep(0.3)
+        sync.stop()
+        # failed reads do not publish a new snapshot
+        ph = robot.buses['ttys1'].packet_handler
+        for sync, name, failure in [
+                (robot.syncs['bulkread'], None, None),
+                (robot.syncs['rangeread'], 'readTxRx',
+                 lambda *args: ([], -3001, 0))]:
+            sync.setup()
+            for _ in range(10):
+                if sync.snapshot is not None:
+                    break
+                sync.atomic()
+            epoch = sync.snapshot.epoch
+            with monkeypatch.context() as m:
+                if name is None:
+                    m.setattr(roboglia.dynamixel.sync.GroupBulkRead,
+                              'txRxPacket', lambda self: -3001)
+                else:
+                    m.setattr(ph, name, failure)
+                sync.atomic()
+            assert sync.snapshot.epoch == epoch
+            sync.teardown()
+        robot.stop()
+
+    def test_dynamixel_coalesce(self, mock_robot_init, monkeypatch):
+        init = mock_robot_init['dynamixel']
+        init['buses']['ttys1']['coalesce_window'] = 0.2
+        for name in ['syncread', 'bulkread', 'syncwrite', 'bulkwrite']:
+            init['syncs'][name]['coalesce'] = True
+        robot = BaseRobot(**init)
+        robot.start()
+        coalescer = robot.buses['ttys1'].coalescer
+        assert isinstance(coalescer, DynamixelCoalescer)
+        assert robot.syncs['syncread'].coalesce
+        # the two reads are due together: one BulkRead for both
+        syncs = [robot.syncs['syncread'], robot.syncs['bulkread']]
+        for sync in syncs:
+            sync.setup()
+        threads = [threading.Thread(target=sync.atomic) for sync in syncs]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        for thread in threads:
+            thread.join()
+        assert coalescer.requests == 2
+        assert coalescer.packets == 1
+        # a failed read does not publish a new snapshot
+        sync = robot.syncs['syncread']
+        for _ in range(10):
+            if sync.snapshot is not None:
+                break
+            sync.atomic()
+        epoch = sync.snapshot.epoch
+        with monkeypatch.context() as m:
+            m.setattr(roboglia.dynamixel.coalesce.GroupBulkRead,
+                      'txRxPacket', lambda self: -3001)
+            sync.atomic()
+        assert sync.snapshot.epoch == epoch
+        # writes
+        syncs = [robot.syncs['syncwrite'], robot.syncs['bulkwrite']]
+        for sync in syncs:
+            sync.setup()
+        dev = robot.devices['d11']
+        for _ in range(10):
+            dev.goal_position_deg.value = dev.goal_position_deg.value + 1
+            dev.p_gain.value = dev.p_gain.value + 1
+            threads = [threading.Thread(target=sync.atomic)
+                       for sync in syncs]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # comm errors are re-flagged and retried
+            if not dev.goal_position_deg.dirty and not dev.p_gain.dirty:
+                break
+        assert not dev.goal_position_deg.dirty
+        assert not dev.p_gain.dirty
+        robot.stop()
+
+    def test_protocol1_coalesced_syncwrite(self, mock_robot_init):
+        init = mock_robot_init['dynamixel']
+        init['buses']['ttys1']['protocol'] = 1.0
+        init['syncs'] = {'syncwrite': init['syncs']['syncwrite']}
+        init['syncs']['syncwrite']['coalesce'] = True
+        with pytest.raises(ValueError) as excinfo:
+            _ = BaseRobot(**init)
+        assert 'coalesced SyncWrite only supported' in str(excinfo.value)
+
+    def test_dynamixel_register_file(self, mock_robot_init, monkeypatch):
+        init = mock_robot_init['dynamixel']
+        for device in init['devices'].values():
+            device['register_file'] = True
+        robot = BaseRobot(**init)
+        robot.start()
+        dev = robot.devices['d11']
+        assert isinstance(dev.image, bytearray)
+        reg = dev.goal_position_deg
+        assert reg.image is dev.image
+        reg.int_value = 700
+        assert reg.dirty
+        assert dev.image[30:32] == (700).to_bytes(2, 'little')
+        # registers with the same address share the storage
+        assert dev.goal_position_rad.int_value == 700
+        # blocks copy the data directly in the image
+        block = RegisterBlock([dev.present_position_deg,
+                               dev.present_speed_rpm])
+        dev.present_position_deg.int_value = 5
+        assert dev.present_position_deg.dirty
+        assert block.unpack([1, 2, 3, 4])
+        assert dev.present_position_deg.int_value == 0x0201
+        assert dev.present_speed_rpm.int_value == 0x0403
+        # the registers mirror the device, as with refresh()
+        assert not dev.present_position_deg.dirty
+        monkeypatch.setattr(BaseRegister, 'default_max_age', 10.0)
+        hits = dev.present_speed_rpm.cache_hits
+        _ = dev.present_speed_rpm.value
+        assert dev.present_speed_rpm.cache_hits == hits + 1
+        assert block.pack() == bytearray([1, 2, 3, 4])
+        for name in ['syncread', 'syncwrite', 'bulkread', 'bulkwrite']:
+            robot.syncs[name].start()
+        time.sleep(0.5)
+        robot.stop()
+
+    def test_dynamixel_lazy_registers(self, mock_robot_init):
+        init = mock_robot_init['dynamixel']
+        for device in init['devices'].values():
+            device['lazy'] = True
+            device['register_file'] = True
+        robot = BaseRobot(**init)
+        dev = robot.devices['d11']
+        created = set(dev.registers.created)
+        # only the registers used by syncs, joints, etc. are created
+        assert 0 < len(created) < len(dev.registers)
+        assert 'model_number' in dev.registers
+        assert 'model_number' not in created
+        reg = dev.model_number
+        assert dev.registers['model_number'] is reg
+        assert dev.register_by_address(reg.address) is reg
+        # registers created on request use the register file too
+        clone = dev.registers['goal_position_rad']
+        assert clone.image is dev.image
+        with pytest.raises(AttributeError):
+            dev.not_a_register
+        assert len(list(dev.registers.values())) == len(dev.registers)
+        robot.start()
+        time.sleep(0.2)
+        robot.stop()
+
+    def test_dynamixel_register_descriptors(self, mock_robot_init):
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        dev1 = robot.devices['d11']
+        dev2 = robot.devices['d12']
+        reg1 = dev1.present_position_deg
+        reg2 = dev2.present_position_deg
+        assert type(reg1) is type(reg2)
+        # the description is shared, the state is not
+        assert isinstance(reg1, RegisterWithConversion)
+        assert RegisterDescriptor.base_class(reg1) is RegisterWithConversion
+        assert reg1.__dict__ == {} and reg2.__dict__ == {}
+        assert reg1.device is dev1 and reg2.device is dev2
+        # attributes set later belong only to their register
+        reg1.note = 'calibrated'
+        assert not hasattr(reg2, 'note')
+        reg1.int_value = 100
+        reg2.int_value = 200
+        assert reg1.int_value == 100
+        descriptor = reg1.descriptor()
+        assert isinstance(descriptor, RegisterDescriptor)
+        assert descriptor.name == 'present_position_deg'
+        reg3 = descriptor.create(dev1)
+        assert reg3.address == reg1.address and reg3.device is dev1
+
+    @pytest.mark.parametrize('protocol,packet', [(2.0, 'bulkWriteTxOnly'),
+                                                 (1.0, 'syncWriteTxOnly')])
+    def test_dynamixel_write_behind(self, mock_robot_init, monkeypatch,
+                                    protocol, packet):
+        init = mock_robot_init['dynamixel']
+        init['buses']['ttys1']['protocol'] = protocol
+        init['buses']['ttys1']['write_behind'] = 10.0
+        init.pop('syncs', None)
+        robot = BaseRobot(**init)
+        robot.start()
+        bus = robot.buses['ttys1']
+        calls = []
+        for name in ['bulkWriteTxOnly', 'syncWriteTxOnly', 'writeTxRx',
+                     'write2ByteTxRx']:
+            monkeypatch.setattr(bus.packet_handler, name,
+                                lambda *args, name=name:
+                                calls.append(name) or
+                                ((0, 0) if 'TxRx' in name else 0))
+        for dev in robot.devices.values():
+            dev.goal_position_deg.value = 10
+            dev.moving_speed_rpm.value = 20
+            dev.goal_position_deg.value = 15
+        assert len(bus.pending) == 4
+        assert calls == []
+        assert bus.flush()
+        assert bus.pending == []
+        # one packet for both devices, each with one range
+        assert calls == [packet]
+        # a single register is written with status
+        dev.moving_speed_rpm.value = 30
+        assert bus.flush()
+        assert calls == [packet, 'writeTxRx']
+        # reads wait for the pending writes
+        dev.goal_position_deg.value = 20
+        bus.read(dev.present_position_deg)
+        assert bus.pending == []
+        # writes that could not be sent are kept for the next flush
+        dev.goal_position_deg.value = 25
+        with monkeypatch.context() as m:
+            m.setattr(bus, 'can_use', lambda: False)
+            assert not bus.flush()
+        assert bus.pending == [dev.goal_position_deg]
+        assert bus.flush()
+        assert bus.pending == []
+        assert calls[-1] == 'writeTxRx'
+        # writes that failed are kept for the next flush
+        dev.goal_position_deg.value = 30
+        with monkeypatch.context() as m:
+            m.setattr(bus.packet_handler, 'writeTxRx',
+                      lambda *args: (-3001, 0))
+            assert not bus.flush()
+        assert bus.pending == [dev.goal_position_deg]
+        assert bus.flush()
+        assert bus.pending == []
+        robot.stop()
+
+    def test_dynamixel_range_registers(self, mock_robot_init, monkeypatch,
+                                       caplog):
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        robot.start()
+        dev = robot.devices['d11']
+        ph = dev.bus.packet_handler
+        calls = []
+        monkeypatch.setattr(ph, 'readTxRx',
+                            lambda port, dev_id, address, length:
+                            calls.append((dev_id, address, length)) or
+                            (list(range(length)), 0, 0))
+        monkeypatch.setattr(ph, 'writeTxRx',
+                            lambda port, dev_id, address, length, data:
+                            calls.append((dev_id, address, data)) or (0, 0))
+        values = dev.read_registers(['moving_speed_rpm', 'goal_position_deg',
+                                     'goal_position_rad'])
+        assert calls == [(11, 30, 4)]
+        assert dev.goal_position_deg.int_value == 0x0100
+        assert dev.goal_position_rad.int_value == 0x0100
+        assert dev.moving_speed_rpm.int_value == 0x0302
+        assert not dev.moving_speed_rpm.dirty
+        assert values['goal_position_deg'] == \
+            dev.goal_position_deg.value_to_external(0x0100)
+        calls.clear()
+        caplog.clear()
+        assert dev.write_registers({'goal_position_deg': 0,
+                                    'moving_speed_rpm': 0,
+                                    'torque_limit': 0,
+                                    'present_position_deg': 0})
+        assert 'RO register' in caplog.text
+        assert [call[:2] for call in calls] == [(11, 30), (11, 35)]
+        assert len(calls[0][2]) == 4
+        robot.stop()
+
+    def test_dynamixel_clone_claims(self, mock_robot_init, caplog):
+        init = mock_robot_init['dynamixel']
+        init['devices']['d11']['model'] = 'AX-12A'
+        init.pop('syncs', None)
+        robot = BaseRobot(**init)
+        dev = robot.devices['d11']
+        first, second = [BaseReadSync(name=name, frequency=10.0,
+                                      group={dev},
+                                      registers=['cw_angle_limit'])
+                         for name in ['first', 'second']]
+        main = dev.cw_angle_limit_deg.clone
+        assert main is dev.cw_angle_limit
+        assert main.claim(first)
+        assert not dev.cw_angle_limit_deg.claim(second)
+        assert main.release(first)
+        # the main register and the other clones are checked too
+        assert dev.cw_angle_limit_deg.claim(first)
+        caplog.clear()
+        assert not main.claim(second)
+        assert not dev.cw_angle_limit_rad.claim(second)
+        assert 'already synced by first' in caplog.text
+        assert dev.cw_angle_limit_rad.claim(first)
+
+    def test_dynamixel_batch_conversion(self, mock_robot_init):
+        # numpy is an optional dependency
+        pytest.importorskip('numpy')
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        robot.start()
+        group = robot.groups['all_servos']
+        for name, kind in [('present_position_deg', 'linear'),
+                           ('present_speed_rpm', 'threshold'),
+                           ('torque_enable', 'bool'),
+                           ('led', 'identity'),
+                           ('baud_rate', 'scalar')]:
+            batch = BatchConverter(name, group)
+            assert batch.kind == kind
+            regs = batch.registers
+            assert [reg.device for reg in regs] == batch.devices
+            for reg in regs:
+                reg.read()
+            # same results as the scalar conversions
+            expected = [reg.value_to_external(reg.int_value) for reg in regs]
+            assert list(batch.values()) == pytest.approx(expected)
+            internal = batch.to_internal(expected)
+            assert list(internal) == [reg.int_value for reg in regs]
+        batch = BatchConverter('goal_position_deg', group)
+        batch.write([10.0, -20.0])
+        for reg, value in zip(batch.registers, [10.0, -20.0]):
+            assert reg.value_to_external(reg.int_value) == \
+                pytest.approx(value, abs=0.5)
+        batch = BatchConverter('present_position_deg', group)
+        batch.write([10.0, 20.0])
+        with pytest.raises(KeyError):
+            BatchConverter('no_register', group)
+        robot.stop()
+
     def test_protocol1_syncread(self, mock_robot_init):
         mock_robot_init['dynamixel']['buses']['ttys1']['protocol'] = 1.0
         # we remove the bulkwrite so that the error will refer to syncread
@@ -693,6 +1710,60 @@ class TestDynamixelRobot:
         assert 12 in ids
         robot.stop()
 
+    @pytest.mark.parametrize('protocol', [2.0, 1.0])
+    def test_dynamixel_discover(self, mock_robot_init, protocol):
+        init = mock_robot_init['dynamixel']
+        init['buses']['ttys1']['protocol'] = protocol
+        init.pop('syncs', None)
+        robot = BaseRobot(**init)
+        bus = robot.buses['ttys1']
+        assert bus.discover() == {}
+        robot.start()
+        model = robot.devices['d11'].model_number.int_value
+        found = bus.discover()
+        assert found == {bus.baudrate: {11: model, 12: model}}
+        found = bus.discover(ids=range(12, 20), baudrates=[57600, 1000000])
+        assert found == {57600: {12: model}, 1000000: {12: model}}
+        robot.stop()
+
+    def test_dynamixel_tune(self, mock_robot_init):
+        init = mock_robot_init['dynamixel']
+        init['buses']['ttys1']['tune'] = True
+        robot = BaseRobot(**init)
+        bus = robot.buses['ttys1']
+        assert bus.round_trip is None
+        assert bus.tune() is None
+        robot.start()
+        assert bus.round_trip > 0
+        # deterministic packet handler with simulated EEPROM
+        eeprom = {11: 250, 12: 0}
+        written = []
+        refuse = []
+
+        def write(port, dev_id, address, value):
+            written.append((dev_id, address, value))
+            if dev_id in refuse:
+                return 0, 8         # access error (torque enabled)
+            eeprom[dev_id] = value
+            return 0, 0
+
+        bus.packet_handler.write1ByteTxRx = write
+        bus.packet_handler.read1ByteTxRx = \
+            lambda port, dev_id, address: (eeprom[dev_id], 0, 0)
+        reg = robot.devices['d11'].return_delay_time
+        assert bus.tune() == bus.round_trip
+        # only the device with a different value is written
+        assert written == [(11, 5, 0)]
+        assert reg.int_value == 0
+        assert not reg.dirty
+        # a refused write leaves the value read from the device
+        eeprom[11] = 250
+        refuse.append(11)
+        bus.tune()
+        assert reg.int_value == 250
+        assert not reg.dirty
+        robot.stop()
+
     def test_dynamixel_ping(self, mock_robot_init):
         robot = BaseRobot(**mock_robot_init['dynamixel'])
         robot.start()
@@ -1013,6 +2084,21 @@ class TestI2CRobot:
         time.sleep(1)
         robot.stop()
 
+    def test_i2c_write_loop_dirty(self, mock_robot_init):
+        robot = BaseRobot(**mock_robot_init['i2crobot'])
+        robot.start()
+        sync = robot.syncs['write_xl']
+        sync.start()
+        device = robot.devices['imu']
+        device.word_xl_y.value = device.word_xl_y.value + 1
+        assert device.word_xl_y.dirty
+        for _ in range(10):
+            time.sleep(0.1)
+            if not device.word_xl_y.dirty:
+                break
+        assert not device.word_xl_y.dirty
+        robot.stop()
+
     def test_i2c_loop_failed_acquire(self, mock_robot_init, caplog):
         robot = BaseRobot(**mock_robot_init['i2crobot'])
         robot.start()